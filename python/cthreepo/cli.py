@@ -10,35 +10,323 @@
 import argparse
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
-from cthreepo.main import math
+import orjson
 
 
-def main():
+def _write(args, record, text):
+    ''' write a single output record, as a JSON line or as text '''
+    if args.format == 'json':
+        sys.stdout.write(orjson.dumps(record).decode('utf-8') + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+    sys.stdout.flush()
+
+
+def _get_cache(args):
+    ''' get the persistent cache, if a cache directory is set '''
+    from cthreepo.io.cache import DiskCache
+    return DiskCache(args.cache_dir) if args.cache_dir else None
+
+
+def _get_product(survey, name):
+    ''' get a product from the datamodel '''
+    from cthreepo.datamodel import dm
+    return dm[survey].products[name]
+
+
+def _expand_task(survey, name):
+    ''' expand a single product into a list of file records '''
+    from cthreepo.io.artifacts import describe_path
+    product = _get_product(survey, name)
+    return [dict(survey=survey, product=product.name, **describe_path(inst))
+            for inst in product.expand_product()]
+
+
+def list_datamodel(args):
+    ''' list the surveys, or the products of a survey '''
+    from cthreepo.datamodel import dm
+
+    if not args.survey:
+        for item in dm:
+            build_time = dm.build_times.get(item.survey, None)
+            record = {'survey': item.survey, 'n_products': len(item.products),
+                      'build_time': build_time}
+            _write(args, record, f'{item.survey}: {len(item.products)} products '
+                   f'(built in {build_time:.3f} s)')
+        for survey, error in dm.failures.items():
+            _write(args, {'survey': survey, 'error': str(error)},
+                   f'{survey}: failed to build ({error})')
+        return
+
+    for product in dm[args.survey].products:
+        record = {'survey': args.survey, 'product': product.name, 'short': product.short,
+                  'datatype': product.datatype, 'public': product.public,
+                  'versions': [str(v) for v in product.versions]}
+        _write(args, record, f'{product.name} ({product.datatype}): {product.short}')
+
+
+def expand(args):
+    ''' expand products into their files, in parallel across products '''
+    from cthreepo.datamodel import dm
+
+    names = args.products or [p.name.lower() for p in dm[args.survey].products]
+    if args.jobs and args.jobs > 1 and len(names) > 1:
+        from cthreepo.io.manifest import init_worker
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker,
+                                 initargs=(args.file_manifest,)) as executor:
+            results = executor.map(_expand_task, [args.survey] * len(names), names)
+            for records in results:
+                for record in records:
+                    _write(args, record, f"{record['product']} {record['version']}: "
+                           f"{record['path']} (exists={record['exists']})")
+        return
+
+    for name in names:
+        for record in _expand_task(args.survey, name):
+            _write(args, record, f"{record['product']} {record['version']}: "
+                   f"{record['path']} (exists={record['exists']})")
+
+
+def changelog(args):
+    ''' compute the changelog of a product, streaming each difference '''
+    product = _get_product(args.survey, args.product)
+    diffs = product.compute_changelog(versions=args.versions, stream=True, jobs=args.jobs,
+                                      cache=_get_cache(args))
+    for diff in diffs:
+        _write(args, diff.to_dict(), diff.report(full=args.full))
+
+
+def export(args):
+    ''' export the datamodel into JSON artifacts '''
+    from cthreepo.io.artifacts import export_datamodel
+
+    written = export_datamodel(args.outdir, surveys=args.surveys, jobs=args.jobs,
+                               cache_dir=args.cache_dir, manifest=args.file_manifest)
+    for path in written:
+        _write(args, {'path': str(path)}, str(path))
+
+
+def resolve(args):
+    ''' resolve a stream of file path requests from a file or stdin '''
+    from cthreepo.core.paths import resolve_paths
+
+    lines = open(args.input) if args.input and args.input != '-' else sys.stdin
+    try:
+        for item in resolve_paths(lines, check_exists=not args.no_check):
+            _write(args, item._asdict(), f'{item.path} {item.exists}')
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+
+def identify(args):
+    ''' identify the product and version of file paths from a file or stdin '''
+    from cthreepo.core.paths import ReverseIndex
+
+    lines = open(args.input) if args.input and args.input != '-' else sys.stdin
+    try:
+        for path, match in ReverseIndex().resolve_many(lines):
+            record = dict(path=path, **(match._asdict() if match else {}))
+            text = f'{match.survey} {match.product} {match.version} {match.kwargs}' \
+                if match else 'None'
+            _write(args, record, f'{path} {text}')
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+
+def inventory(args):
+    ''' scan the filesystem for all existing files of a product and release '''
+    from cthreepo.io.inventory import scan_inventory
+
+    for item in scan_inventory(args.name, args.release, manifest=args.manifest, jobs=args.jobs,
+                               refresh=args.refresh):
+        _write(args, item._asdict(), item.path)
 
-    # An example of how to write a command line parser that works with the
-    # main.math function. For more details on how to use argparse, start with
-    # this tutorial: http://bit.ly/2SGDf7h
+
+def scaling(args):
+    ''' report how loading a synthetic survey scales with its size '''
+    from cthreepo.io.synthetic import format_scaling_report, scaling_report
+
+    counts = {f'n_{k}': getattr(args, k) for k in ('products', 'versions', 'changelog', 'models')
+              if getattr(args, k) is not None and k != args.dimension}
+    results = scaling_report(sizes=args.sizes, dimension=args.dimension, outdir=args.outdir,
+                             files=not args.no_files, **counts)
+    if args.format == 'json':
+        for item in results:
+            _write(args, item._asdict(), '')
+    else:
+        print(format_scaling_report(results))
+
+
+def memory(args):
+    ''' report the memory footprint of each survey datamodel '''
+    from cthreepo.datamodel import dm
+
+    surveys = [dm[args.survey]] if args.survey else list(dm)
+    for item in surveys:
+        if args.expand:
+            for product in item.products:
+                product._expanded = product.expand_product()
+        report = item.memory_report()
+        _write(args, report.to_dict(n=args.top), report.format(n=args.top))
+
+
+def importtime(args):
+    ''' profile the cold import time of a module '''
+    from cthreepo.core.stats import format_import_profile, profile_imports
+
+    profile = profile_imports(args.module)
+    record = {'module': profile.module, 'time': profile.time, 'n_modules': profile.n_modules,
+              'imports': [item._asdict() for item in profile.imports]}
+    _write(args, record, format_import_profile(profile, n=args.top))
+
+
+def serve(args):
+    ''' run a local datamodel query server '''
+    from cthreepo.server import serve as run_server
+    run_server(host=args.host, port=args.port)
+
+
+def get_parser():
+    ''' build the command line parser '''
 
     parser = argparse.ArgumentParser(
         prog=os.path.basename(sys.argv[0]),
-        description='Performs an arithmetic operation.')
+        description='Explore and export the SDSS datamodel.')
 
-    parser.add_argument('VALUE1', type=float, help='The first operand')
-    parser.add_argument('OPERATOR', type=str, help='The operator [+, -, *, /]')
-    parser.add_argument('VALUE2', type=float, help='The second operand')
+    # options shared by all subcommands
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-f', '--format', choices=['text', 'json'], default='text',
+                        help='the output format; json writes one JSON object per line')
+    common.add_argument('--file-manifest', default=None,
+                        help='a CSV or SQLite file manifest used instead of the filesystem')
+    common.add_argument('--timings', action='store_true', default=False,
+                        help='report the time spent in each datamodel stage on stderr')
 
-    parser.add_argument('-v', '--verbose', action='store_true', default=False,
-                        help='sets verbose mode')
+    # options of subcommands that run in parallel workers
+    parallel = argparse.ArgumentParser(add_help=False)
+    parallel.add_argument('-j', '--jobs', type=int, default=None,
+                          help='the number of parallel workers')
 
-    args = parser.parse_args()
+    # options of subcommands that cache computed file differences
+    cached = argparse.ArgumentParser(add_help=False)
+    cached.add_argument('--cache-dir', default=None,
+                        help='a directory for a persistent cache of file differences')
 
-    result = math(args.VALUE1, args.VALUE2, arith_operator=args.OPERATOR)
+    subparsers = parser.add_subparsers(title='commands', dest='command')
+    subparsers.required = True
 
-    if args.verbose:
-        print('{} {} {} = {}'.format(args.VALUE1, args.OPERATOR, args.VALUE2, result))
-    else:
-        print(result)
+    list_parser = subparsers.add_parser('list', parents=[common],
+                                        help='list the surveys, or the products of a survey')
+    list_parser.add_argument('survey', nargs='?', default=None, help='the name of the survey')
+    list_parser.set_defaults(func=list_datamodel)
+
+    expand_parser = subparsers.add_parser('expand', parents=[common, parallel],
+                                          help='expand products into their files')
+    expand_parser.add_argument('survey', help='the name of the survey')
+    expand_parser.add_argument('products', nargs='*', help='the products.  Default is all.')
+    expand_parser.set_defaults(func=expand)
+
+    change_parser = subparsers.add_parser('changelog', parents=[common, parallel, cached],
+                                          help='compute the changelog of a product')
+    change_parser.add_argument('survey', help='the name of the survey')
+    change_parser.add_argument('product', help='the name of the product')
+    change_parser.add_argument('--versions', nargs='+', default=None,
+                               help='limit the changelog to these versions')
+    change_parser.add_argument('--full', action='store_true', default=False,
+                               help='include the full difference report')
+    change_parser.set_defaults(func=changelog)
+
+    export_parser = subparsers.add_parser('export', parents=[common, parallel, cached],
+                                          help='export the datamodel into JSON artifacts')
+    export_parser.add_argument('outdir', help='the output artifact directory')
+    export_parser.add_argument('--surveys', nargs='+', default=None,
+                               help='the surveys to export.  Default is all.')
+    export_parser.set_defaults(func=export)
+
+    resolve_parser = subparsers.add_parser('resolve', parents=[common],
+                                           help='resolve a stream of file path requests')
+    resolve_parser.add_argument('input', nargs='?', default='-',
+                                help='a file of "name release key=value ..." or JSON lines.  '
+                                'Default is stdin.')
+    resolve_parser.add_argument('--no-check', action='store_true', default=False,
+                                help='do not check whether the files exist')
+    resolve_parser.set_defaults(func=resolve)
+
+    identify_parser = subparsers.add_parser('identify', parents=[common],
+                                            help='identify the product of file paths')
+    identify_parser.add_argument('input', nargs='?', default='-',
+                                 help='a file of file paths, one per line.  Default is stdin.')
+    identify_parser.set_defaults(func=identify)
+
+    inventory_parser = subparsers.add_parser('inventory', parents=[common, parallel],
+                                             help='find all existing files of a product')
+    inventory_parser.add_argument('name', help='the sdss_access path name, or survey:product')
+    inventory_parser.add_argument('release', help='the data release')
+    inventory_parser.add_argument('--manifest', default=None,
+                                  help='a JSON scan manifest, for incremental re-scans')
+    inventory_parser.add_argument('--refresh', action='store_true', default=False,
+                                  help='ignore the manifest and scan all directories again')
+    inventory_parser.set_defaults(func=inventory)
+
+    scaling_parser = subparsers.add_parser('scaling', parents=[common],
+                                           help='report how a synthetic survey scales')
+    scaling_parser.add_argument('--dimension', default='products',
+                                choices=['products', 'versions', 'changelog', 'models'],
+                                help='the dimension to scale')
+    scaling_parser.add_argument('--sizes', type=int, nargs='+', default=[10, 20, 40],
+                                help='the sizes of the scaled dimension')
+    for name in ('products', 'versions', 'changelog', 'models'):
+        scaling_parser.add_argument(f'--{name}', type=int, default=None,
+                                    help=f'the fixed number of {name}')
+    scaling_parser.add_argument('--outdir', default=None,
+                                help='the directory for the synthetic surveys')
+    scaling_parser.add_argument('--no-files', action='store_true', default=False,
+                                help='do not write data files, or time expansion and diffs')
+    scaling_parser.set_defaults(func=scaling)
+
+    memory_parser = subparsers.add_parser('memory', parents=[common],
+                                          help='report the memory footprint of the datamodel')
+    memory_parser.add_argument('survey', nargs='?', default=None,
+                               help='the name of the survey.  Default is all.')
+    memory_parser.add_argument('--expand', action='store_true', default=False,
+                               help='expand all products first, to include their file objects')
+    memory_parser.add_argument('--top', type=int, default=10,
+                               help='the number of largest contributors to show')
+    memory_parser.set_defaults(func=memory)
+
+    import_parser = subparsers.add_parser('importtime', parents=[common],
+                                          help='profile the cold import time of a module')
+    import_parser.add_argument('module', nargs='?', default='cthreepo',
+                               help='the module to import.  Default is cthreepo.')
+    import_parser.add_argument('--top', type=int, default=20,
+                               help='the number of slowest imports to show')
+    import_parser.set_defaults(func=importtime)
+
+    serve_parser = subparsers.add_parser('serve', help='run a local datamodel query server')
+    serve_parser.add_argument('--host', default=None, help='the host address')
+    serve_parser.add_argument('--port', type=int, default=None, help='the port')
+    serve_parser.set_defaults(func=serve)
+
+    return parser
+
+
+def main(argv=None):
+
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'file_manifest', None):
+        from cthreepo.io.manifest import set_manifest
+        set_manifest(args.file_manifest)
+    if getattr(args, 'timings', None):
+        from cthreepo.core.stats import stats
+        stats.enable()
+    args.func(args)
+    if getattr(args, 'timings', None):
+        sys.stderr.write(stats.report() + '\n')
 
 
 if __name__ == '__main__':
@@ -17,9 +17,53 @@ import re
 import six
 import pathlib
 from io import StringIO
-from astropy.io import fits, ascii as astropy_ascii
-from sdss_access.path import Path
+from cthreepo.core.stats import timed
+from cthreepo.io import manifest as file_manifest
 from cthreepo.io.general import compute_diff
+from cthreepo.io.pool import HDUListProxy, pool
+
+
+class _SharedPath(object):
+    ''' A class attribute holding a shared sdss_access Path, created on first access '''
+
+    def __init__(self):
+        self._path = None
+
+    def __get__(self, obj, objtype=None):
+        if self._path is None:
+            from sdss_access.path import Path
+            self._path = Path()
+        return self._path
+
+
+def get_path_kwargs(keys, path_kwargs, version=None):
+    ''' Fill in the path keywords of a version
+
+    Keywords in the path template but missing from ``path_kwargs`` are set to a
+    string version, while the attributes of a version object update all keywords.
+
+    Parameters
+    ----------
+        keys : iterable
+            The keyword names of the path template
+        path_kwargs : dict
+            The product path keywords
+        version : str | object
+            The product version
+
+    Returns
+    -------
+        A new dictionary of path keywords
+    '''
+    args = dict(path_kwargs)
+    missing = set(keys) - set(args.keys())
+    if version:
+        if isinstance(version, six.string_types):
+            version_kwarg = dict.fromkeys(missing, version)
+        else:
+            version_kwarg = version.__dict__
+        args.update(version_kwarg)
+    return args
 
 
 class BaseObject(object):
@@ -33,7 +77,7 @@ class BaseObject(object):
 
 
 class FileObject(BaseObject):
-    path = Path()
+    path = _SharedPath()
 
     def __init__(self, inputs=None, filename=None, **kwargs):
         product = kwargs.pop('product', None)
@@ -92,7 +136,9 @@ class FileObject(BaseObject):
         self.filename = path.name
         self.fullpath = self.filepath / self.filename
 
-        self.file_exists = self.path.exists('', full=self.fullpath)
+        # check the active file manifest before the filesystem
+        exists = file_manifest.file_exists(self.fullpath)
+        self.file_exists = self.path.exists('', full=self.fullpath) if exists is None else exists
         # if not self.file_exists:
         #     raise NameError('{0} not a valid file'.format(self.fullpath))
 
@@ -131,14 +177,7 @@ class FileObject(BaseObject):
         elif path_kwargs:
             # to handle sdss_access path kwargs and versioning issues
             # TODO cleanup version handling to better handle path_kwarg inputs
-            args = path_kwargs.copy()
-            missing = set(cls.path.lookup_keys(path_name)) - set(args.keys())
-            if version:
-                if isinstance(version, six.string_types):
-                    version_kwarg = dict.fromkeys(missing, version)
-                else:
-                    version_kwarg = version.__dict__
-                args.update(version_kwarg)
+            args = get_path_kwargs(cls.path.lookup_keys(path_name), path_kwargs, version)
             kwargs.update(args)
         else:
             raise ValueError('no example string or sdss_access path kwargs found.  Cannot construct object.')
@@ -164,37 +203,54 @@ class Fits(FileObject):
     def __init__(self, inputs=None, filename=None, **kwargs):
         super(Fits, self).__init__(inputs=inputs, filename=filename, **kwargs)
 
-        # open the file if it exists
-        if self.file_exists:
+        # open the file if it exists, deferring it until loaded when using a manifest
+        if self.file_exists and file_manifest.manifest is None:
             self._read_file()
 
     def __repr__(self):
         return (f'Fits(name={self.filename}, version={self.version or "unknown"}, '
                 f'exists={self.file_exists}, loaded={self.loaded})')
 
+    @property
+    def hdulist(self):
+        ''' The FITS HDUList, served from the shared file handle pool
+
+        Returns an `HDUListProxy`, which fetches the HDUList from the pool on each access,
+        so it stays usable after the pool evicts the file.  HDUs taken from it may be
+        closed by a later eviction; use `lease` to keep the file open while using them.
+        '''
+        if not self.file_exists:
+            return None
+        return HDUListProxy(self.fullpath, pool)
+
+    def lease(self):
+        ''' Lease the FITS HDUList from the shared file handle pool, keeping it open '''
+        return pool.lease(self.fullpath)
+
+    @timed('read_fits')
     def _read_file(self):
         ''' Open and read the FITS file '''
 
         try:
-            hdulist = fits.open(self.fullpath)
+            with self.lease() as hdulist:
+                hdulist.verify()
+                self._get_info(hdulist)
         except Exception:
             raise ValueError('Filename does not appear to be a FITS file')
         else:
-            self.hdulist = hdulist
-            self.hdulist.verify()
-            self._get_info()
             self.loaded = True
 
-    def _get_info(self):
+    def _get_info(self, hdulist=None):
         if not self._info:
             s = StringIO()
-            self.hdulist.info(output=s)
+            (hdulist or self.hdulist).info(output=s)
             s.seek(0)
             self._info = ''.join(s.readlines())
             s.close()
 
     def info(self):
         ''' prints the info from the file '''
+        self.load()
         print(self._info)
 
     def load(self):
@@ -207,16 +263,18 @@ class Catalog(FileObject):
     def __init__(self, inputs=None, filename=None, **kwargs):
         super(Catalog, self).__init__(inputs=inputs, filename=filename, **kwargs)
 
-        # open the file if it exists
-        if self.file_exists:
+        # open the file if it exists, deferring it until loaded when using a manifest
+        if self.file_exists and file_manifest.manifest is None:
             self._read_file()
 
     def __repr__(self):
         return (f'Catalog(name={self.filename}, version={self.version or "unknown"}, '
                 f'exists={self.file_exists}, loaded={self.loaded})')
 
+    @timed('read_catalog')
     def _read_file(self):
         ''' Open and read the catalog file '''
+        from astropy.io import ascii as astropy_ascii
 
         try:
             table = astropy_ascii.read(self.fullpath)
@@ -246,6 +304,7 @@ class Catalog(FileObject):
 
     def info(self, option=None):
         ''' prints the info from the file '''
+        self.load()
         if option == 'stats':
             print(self._stats)
         else:
@@ -0,0 +1,173 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Filename: memory.py
+# Project: core
+# Author: Brian Cherinka
+# Created: Monday, 19th October 2026 8:10:37 pm
+# License: BSD 3-clause "New" or "Revised" License
+# Copyright (c) 2026 Brian Cherinka
+# Last Modified: Monday, 19th October 2026 8:10:37 pm
+# Modified By: Brian Cherinka
+
+
+from __future__ import print_function, division, absolute_import
+import gc
+import sys
+import types
+from collections import namedtuple
+
+MemoryItem = namedtuple('MemoryItem', ['category', 'name', 'size'])
+
+# objects shared across the process, which are never counted
+_shared_types = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                 types.CodeType, types.FrameType)
+
+# the cached product attributes, each reported in its own category
+_cached_attrs = {'_expanded': 'expanded', '_changes': 'changelogs', '_matrix': 'matrices',
+                 '_diffmatrix': 'matrices'}
+
+CATEGORIES = ('models', 'products', 'expanded', 'hdulists', 'changelogs', 'matrices')
+
+
+def deep_sizeof(obj, seen=None, exclude=None):
+    ''' Compute the deep size of an object and everything it references
+
+    Classes, modules and functions are shared across the process and are not counted.
+
+    Parameters
+    ----------
+        obj : object
+            The object to measure
+        seen : set
+            The ids of objects already counted, which are skipped.  Updated in place, so
+            objects shared across several measurements are only counted once.
+        exclude : set
+            The ids of objects to skip, without marking them as counted
+
+    Returns
+    -------
+        The size in bytes
+    '''
+    seen = set() if seen is None else seen
+    exclude = exclude or set()
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or id(item) in exclude or isinstance(item, _shared_types):
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        stack.extend(gc.get_referents(item))
+    return size
+
+
+def _format_size(size):
+    ''' format a size in bytes into a readable string '''
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GB'
+
+
+class MemoryReport(object):
+    ''' The memory footprint of a datamodel, broken down by category
+
+    Parameters
+    ----------
+        name : str
+            The name of the measured datamodel
+        items : list
+            A list of `MemoryItem` of category, name and size in bytes
+    '''
+
+    def __init__(self, name, items):
+        self.name = name
+        self.items = items
+
+    def __repr__(self):
+        return f"<MemoryReport(name='{self.name}', total='{_format_size(self.total)}')>"
+
+    @property
+    def total(self):
+        ''' The total size in bytes '''
+        return sum(item.size for item in self.items)
+
+    @property
+    def totals(self):
+        ''' The total size of each category in bytes '''
+        totals = dict.fromkeys(CATEGORIES, 0)
+        for item in self.items:
+            totals[item.category] += item.size
+        return totals
+
+    def largest(self, n=10):
+        ''' Get the n largest contributors, across all categories '''
+        return sorted(self.items, key=lambda item: item.size, reverse=True)[:n]
+
+    def to_dict(self, n=10):
+        ''' Convert the report into a dictionary '''
+        return {'name': self.name, 'total': self.total, 'totals': self.totals,
+                'largest': [item._asdict() for item in self.largest(n)]}
+
+    def format(self, n=10):
+        ''' Format the report as text, with the n largest contributors '''
+        lines = [f'{self.name}: {_format_size(self.total)}']
+        lines += [f'  {category:<12} {_format_size(size):>10}'
+                  for category, size in self.totals.items()]
+        lines.append('  largest:')
+        lines += [f'    {item.category:<12} {item.name:<30} {_format_size(item.size):>10}'
+                  for item in self.largest(n) if item.size]
+        return '\n'.join(lines)
+
+
+def measure_datamodel(datamodel, pool=None):
+    ''' Measure the memory footprint of a datamodel
+
+    Models are measured first, then each product without its cached results, so the
+    models referenced by products are not counted twice.  The expanded file objects,
+    changelogs and matrices cached on each product are measured next, followed by the
+    HDULists held open in the FITS handle pool for the expanded files of each product.
+
+    Parameters
+    ----------
+        datamodel : `DataModel`
+            The datamodel to measure
+        pool : `HandlePool`
+            The FITS handle pool.  Defaults to the shared pool.
+
+    Returns
+    -------
+        A `MemoryReport`
+    '''
+    if pool is None:
+        from cthreepo.io.pool import pool
+
+    seen = set()
+    items = []
+    for key, models in datamodel.models.items():
+        items.append(MemoryItem('models', str(key), deep_sizeof(models, seen)))
+
+    cached = {id(getattr(p, attr)) for p in datamodel.products for attr in _cached_attrs
+              if getattr(p, attr) is not None}
+    for product in datamodel.products:
+        items.append(MemoryItem('products', product.name,
+                                deep_sizeof(product, seen, exclude=cached)))
+
+    for product in datamodel.products:
+        for attr, category in _cached_attrs.items():
+            value = getattr(product, attr)
+            if value is not None:
+                items.append(MemoryItem(category, product.name, deep_sizeof(value, seen)))
+
+    handles = dict(pool._handles)
+    for product in datamodel.products:
+        paths = {str(getattr(inst, 'fullpath', None)) for inst in product._expanded or []}
+        size = sum(deep_sizeof(hdulist, seen) for filename, hdulist in handles.items()
+                   if filename in paths)
+        if size:
+            items.append(MemoryItem('hdulists', product.name, size))
+
+    return MemoryReport(datamodel.survey, items)
@@ -18,6 +18,7 @@ import six
 import orjson
 from marshmallow import Schema, fields, post_load
 from fuzzy_types.fuzzy import FuzzyList
+from cthreepo.core.stats import timed
 
 
 # core classes
@@ -52,8 +53,20 @@ class ObjectField(fields.Field):
     deserialized into an instance Wavelength('LOG'). Custom fields are described at
     https://marshmallow.readthedocs.io/en/3.0/custom_fields.html.
 
+    The datamodel models used for deserialization are bound to each field instance, so
+    several survey datamodels can be built, or loaded, from any thread.
+
+    Parameters
+    ----------
+        models : dict
+            The datamodel models, by name, used to deserialize objects
+
     '''
 
+    def __init__(self, models=None, **kwargs):
+        super(ObjectField, self).__init__(**kwargs)
+        self.models = models or {}
+
     def _serialize(self, value, attr, obj, **kwargs):
         if value is None:
             return ''
@@ -181,7 +194,7 @@ def parse_kind(value: str) -> tuple:
     return kind, subkind
 
 
-def get_field(value: str, key: str = None) -> Field:
+def get_field(value: str, key: str = None, models: dict = None) -> Field:
     ''' Get a Marshmallow Fields type
 
     Using the model schema attribute "kind" parameter, determines the
@@ -194,6 +207,8 @@ def get_field(value: str, key: str = None) -> Field:
             The kind of field to retrieve, e.g. string
         key : str
             The name of the attribute for the field
+        models : dict
+            The datamodel models used to deserialize an ObjectField
 
     Returns
     -------
@@ -203,13 +218,13 @@ def get_field(value: str, key: str = None) -> Field:
         field = fields.__getattribute__(value)
         return field
     elif value == 'Objects':
-        return ObjectField(data_key=key)
+        return ObjectField(data_key=key, models=models)
     else:
         raise ValueError(f'Marshmallow Fields does not have {value}')
 
 
 def create_field(data: dict, key: str = None, required: bool = None,
-                 nodefault: bool = None) -> Field:
+                 nodefault: bool = None, models: dict = None) -> Field:
     ''' creates a marshmallow.fields object
 
     Parameters
@@ -222,6 +237,8 @@ def create_field(data: dict, key: str = None, required: bool = None,
             If True, sets the field as a required one. Default is False.
         nodefault : bool
             If True, turns off any defaults specified for fields.  Default is False.
+        models : dict
+            The datamodel models used to deserialize any object sub-fields
 
     Returns
     -------
@@ -248,7 +265,7 @@ def create_field(data: dict, key: str = None, required: bool = None,
     args = []
     if subkind:
         skinds = subkind.split(',')
-        subfields = [get_field(i.title(), key=key) for i in skinds]
+        subfields = [get_field(i.title(), key=key, models=models) for i in skinds]
         # differentiate args for lists and tuples
         if kind == 'List':
             assert len(subfields) == 1, 'List can only accept one subfield type.'
@@ -304,6 +321,7 @@ def create_schema(data: dict, mixin: object = None) -> Schema:
     return objSchema
 
 
+@timed('generate_models')
 def generate_models(data: dict, make_fuzzy: bool = True, mixin: object = None) -> list:
     ''' Generate a list of datamodel types
 
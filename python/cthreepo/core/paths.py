@@ -0,0 +1,358 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Filename: paths.py
+# Project: core
+# Author: Brian Cherinka
+# Created: Monday, 19th October 2026 4:48:19 pm
+# License: BSD 3-clause "New" or "Revised" License
+# Copyright (c) 2026 Brian Cherinka
+# Last Modified: Monday, 19th October 2026 4:48:19 pm
+# Modified By: Brian Cherinka
+
+
+from __future__ import print_function, division, absolute_import
+import os
+import re
+import string
+import threading
+from collections import namedtuple
+
+import orjson
+
+from cthreepo import log
+from cthreepo.io.manifest import is_file
+
+ResolvedPath = namedtuple('ResolvedPath', ['name', 'release', 'kwargs', 'path', 'exists'])
+FileDescriptor = namedtuple('FileDescriptor', ['path', 'version', 'kwargs', 'exists'])
+PathMatch = namedtuple('PathMatch', ['survey', 'product', 'version', 'kwargs'])
+
+_special_fxn = re.compile(r'\@\w+[|]')
+_tag_pattern = re.compile(r'tags/(v?[0-9._]+)')
+_comp_pattern = re.compile(r'(\.gz|\.bz2|\.zip|\.fz)$')
+
+
+class _ReleaseTemplates(object):
+    ''' The compiled path templates of a single release
+
+    Environment variables are expanded once, when the release is planted, so
+    resolving a path is a plain string format that does not depend on the
+    currently planted tree.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.release = path.release
+        self.templates = {}
+        self.keys = {}
+        self.special = set()
+        for name, template in path.templates.items():
+            if _special_fxn.search(template):
+                # special functions are resolved by sdss_access itself
+                self.special.add(name)
+            self.templates[name] = os.path.expandvars(template)
+            self.keys[name] = frozenset(field.split(':')[0] for __, field, __, __ in
+                                        string.Formatter().parse(template) if field)
+
+
+class PathResolver(object):
+    ''' A streaming batch resolver of sdss_access file paths
+
+    Resolves (name, release, kwargs) requests into full file paths and existence
+    flags, without constructing any file objects.  Each release is planted once,
+    and its templates are compiled with their environment variables expanded, so
+    subsequent lookups are plain string formats.  Templates using sdss_access special
+    functions fall back to sdss_access itself.
+
+    Requests may name an sdss_access path directly, or a datamodel product as
+    "survey:product", in which case the product ``path_name`` is used and its
+    ``path_kwargs`` provide default keyword values.
+
+    Parameters
+    ----------
+        check_exists : bool
+            If True, checks whether each resolved file exists.  Default is True.
+    '''
+
+    def __init__(self, check_exists=True):
+        self.check_exists = check_exists
+        self._releases = {}
+        self._products = {}
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f'<PathResolver(releases={list(self._releases)})>'
+
+    def get_release(self, release):
+        ''' get the compiled templates of a release, planting it once '''
+        release = str(release).lower().replace('-', '')
+        if release not in self._releases:
+            with self._lock:
+                if release not in self._releases:
+                    from sdss_access.path import Path
+                    self._releases[release] = _ReleaseTemplates(Path(release=release))
+        return self._releases[release]
+
+    def get_product(self, name):
+        ''' get the path name and default kwargs of a "survey:product" datamodel product '''
+        if name not in self._products:
+            from cthreepo.datamodel import dm
+            survey, product = name.split(':', 1)
+            product = dm[survey].products[product]
+            self._products[name] = (product.path_name,
+                                    dict(getattr(product, 'path_kwargs', None) or {}))
+        return self._products[name]
+
+    def resolve(self, name, release, **kwargs):
+        ''' Resolve a single file path
+
+        Parameters
+        ----------
+            name : str
+                The sdss_access path name, or a "survey:product" datamodel product
+            release : str
+                The data release
+            kwargs : dict
+                The path template keywords
+
+        Returns
+        -------
+            A tuple of the full path and whether the file exists
+        '''
+        if ':' in name:
+            name, defaults = self.get_product(name)
+            kwargs = dict(defaults, **kwargs)
+
+        compiled = self.get_release(release)
+        if name not in compiled.templates:
+            raise KeyError(f'No path template {name} found for release {release}')
+
+        missing = compiled.keys[name] - set(kwargs)
+        if missing:
+            raise KeyError(f'Missing required keyword arguments: {sorted(missing)}')
+
+        if name in compiled.special:
+            with self._lock:
+                compiled.path.replant_tree(compiled.release)
+                fullpath = compiled.path.full(name, **kwargs)
+        else:
+            fullpath = compiled.templates[name].format(**kwargs)
+            fullpath = os.path.normpath(_tag_pattern.sub(r'\1', fullpath, count=1))
+
+        exists = None
+        if self.check_exists:
+            exists = is_file(fullpath)
+            # check for an uncompressed version of the file
+            if not exists and _comp_pattern.search(fullpath):
+                base = _comp_pattern.sub('', fullpath)
+                if is_file(base):
+                    fullpath, exists = base, True
+        return fullpath, exists
+
+    def resolve_many(self, requests):
+        ''' Resolve a stream of file path requests
+
+        Requests that cannot be resolved are logged and yield a path of None, so
+        a single bad request does not stop the stream.
+
+        Parameters
+        ----------
+            requests : iterable
+                An iterable of (name, release, kwargs) tuples, or of lines parsed
+                with `parse_request`
+
+        Yields
+        ------
+            a `ResolvedPath` for each request
+        '''
+        for request in requests:
+            if isinstance(request, str):
+                request = parse_request(request)
+                if request is None:
+                    continue
+            name, release, kwargs = request
+            try:
+                path, exists = self.resolve(name, release, **kwargs)
+            except (KeyError, ValueError, IndexError, AttributeError) as exc:
+                log.warning(f'Cannot resolve {name} for release {release}: {exc}')
+                path, exists = None, False
+            yield ResolvedPath(name, release, kwargs, path, exists)
+
+
+def _convert(value):
+    ''' convert a keyword value string into an int, if possible '''
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def parse_request(line):
+    ''' Parse a path request from a line of text
+
+    Lines are either a JSON object with "name", "release" and "kwargs" keys, or
+    whitespace-separated "name release key=value ..." fields.  Blank lines and
+    lines starting with "#" are ignored.
+
+    Parameters
+    ----------
+        line : str
+            A line of text
+
+    Returns
+    -------
+        A (name, release, kwargs) tuple, or None for an ignored line
+    '''
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+
+    if line.startswith('{'):
+        data = orjson.loads(line)
+        return data['name'], data['release'], data.get('kwargs', {})
+
+    name, release, *fields = line.split()
+    kwargs = dict(field.split('=', 1) for field in fields)
+    return name, release, {k: _convert(v) for k, v in kwargs.items()}
+
+
+def resolve_paths(requests, check_exists=True):
+    ''' Resolve a stream of file path requests
+
+    Parameters
+    ----------
+        requests : iterable
+            An iterable of (name, release, kwargs) tuples or request lines, e.g. a file or stdin
+        check_exists : bool
+            If True, checks whether each resolved file exists.  Default is True.
+
+    Yields
+    ------
+        a `ResolvedPath` for each request
+    '''
+    return PathResolver(check_exists=check_exists).resolve_many(requests)
+
+
+class ReverseIndex(object):
+    ''' A reverse index mapping file paths back to datamodel products
+
+    Compiles the path template of every product version, across all surveys, into a
+    single combined regex, so a path is matched against all templates in one pass.
+    Each template is wrapped in a marker group, whose name identifies the matching
+    template, and its keywords are parsed from the prefixed named groups.  Products
+    without a ``path_name`` are indexed by their example file for each version.
+
+    When several product versions share the same template, e.g. unreleased versions
+    that default to the same tree, a path matches all of them.
+
+    Parameters
+    ----------
+        datamodel : `SDSSDataModelList`
+            The datamodel to index.  Defaults to the full SDSS datamodel.
+    '''
+
+    def __init__(self, datamodel=None):
+        if datamodel is None:
+            from cthreepo.datamodel import dm as datamodel
+        from cthreepo.io.inventory import template_pattern
+
+        self.entries = {}
+        for item in datamodel:
+            for product in item.products:
+                for version in product.versions:
+                    template = self._get_template(product, str(version))
+                    if template:
+                        self.entries.setdefault(template, []).append(
+                            (item.survey, product.name, str(version)))
+
+        self._templates = list(self.entries)
+        patterns = [f'(?P<_{i}>{template_pattern(t, prefix=f"_{i}_", compressed=True)})'
+                    for i, t in enumerate(self._templates)]
+        self._regex = re.compile('|'.join(patterns))
+
+    def __repr__(self):
+        return f'<ReverseIndex(n_templates={len(self._templates)})>'
+
+    @staticmethod
+    def _get_template(product, version):
+        ''' get the path template, or example file path, of a product version '''
+        path_name = getattr(product, 'path_name', None)
+        if path_name:
+            try:
+                return resolver.get_release(version).templates.get(path_name, None)
+            except (KeyError, ValueError) as exc:
+                log.debug(f'No templates found for release {version}: {exc}')
+                return None
+
+        example = getattr(product, 'example', None)
+        if not example:
+            return None
+        from cthreepo.core.fits import FileObject
+        from cthreepo.core.products import _find_in_example, _replace_version
+        try:
+            example_ver = _find_in_example(example, product.versions)
+        except ValueError:
+            return None
+        example = _replace_version(example, str(example_ver), version)
+        # escape any braces so the example is a template without keywords
+        path = str(FileObject._get_example(example, replace=version))
+        return path.replace('{', '{{').replace('}', '}}')
+
+    def lookup(self, path):
+        ''' Find all product versions matching a file path
+
+        Parameters
+        ----------
+            path : str
+                A full file path
+
+        Returns
+        -------
+            A list of `PathMatch` of survey, product, version and kwargs
+        '''
+        match = self._regex.fullmatch(os.path.normpath(str(path)))
+        if not match:
+            return []
+
+        index = int(match.lastgroup[1:])
+        prefix = f'_{index}_'
+        kwargs = {k[len(prefix):]: _convert(v) for k, v in match.groupdict().items()
+                  if v is not None and k.startswith(prefix)}
+        return [PathMatch(survey, product, version, kwargs)
+                for survey, product, version in self.entries[self._templates[index]]]
+
+    def resolve(self, path):
+        ''' Resolve a file path to its product version
+
+        Parameters
+        ----------
+            path : str
+                A full file path
+
+        Returns
+        -------
+            The first `PathMatch`, or None if no product matches
+        '''
+        matches = self.lookup(path)
+        return matches[0] if matches else None
+
+    def resolve_many(self, paths):
+        ''' Resolve a stream of file paths
+
+        Parameters
+        ----------
+            paths : iterable
+                An iterable of file paths, or lines of a file
+
+        Yields
+        ------
+            a tuple of the path and its first `PathMatch`, or None
+        '''
+        for path in paths:
+            path = path.strip()
+            if path:
+                yield path, self.resolve(path)
+
+
+# the shared path resolver
+resolver = PathResolver(check_exists=False)
@@ -15,13 +15,19 @@ from __future__ import print_function, division, absolute_import
 import re
 import six
 import copy
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 
 from marshmallow import Schema, fields, validate
-from cthreepo.core.fits import Fits, BaseObject, Catalog
+from cthreepo.core.fits import Fits, BaseObject, Catalog, get_path_kwargs
+from cthreepo.core.paths import FileDescriptor, resolver
+from cthreepo.core.stats import timed
 from cthreepo.io.general import compute_changelog
+from cthreepo.io.manifest import is_file
+from cthreepo.io.matrix import compute_matrix, compute_diff_matrix
 from cthreepo.io.yaml import read_yaml, expand_yaml
 from cthreepo.io.datamodel import find_datamodels
-from cthreepo.core.models import BaseSchema, create_field, _get_attr, ObjectField
+from cthreepo.core.models import BaseSchema, create_field, _get_attr
 from cthreepo import log
 from fuzzy_types.fuzzy import FuzzyList
 
@@ -45,7 +51,10 @@ class ProductList(FuzzyList):
 class BaseProduct(object):
     _changes = None
     _expanded = None
+    _matrix = None
+    _diffmatrix = None
 
+    @timed('expand_product')
     def expand_product(self):
 
         if self._expanded is not None:
@@ -60,33 +69,151 @@ class BaseProduct(object):
             files.append(inst)
         return ObjectList(files)
 
-    def compute_changelog(self, versions=None, refresh=None):
+    @staticmethod
+    def _get_grid_kwargs(path_name, versions, defaults):
+        ''' Yield each version with its default path keywords '''
+        for version in versions:
+            keys = resolver.get_release(str(version)).keys.get(path_name, ())
+            yield version, get_path_kwargs(keys, defaults, version)
+
+    def expand_grid(self, versions=None, grid=None, kwargs=None, exists=None, jobs=None,
+                    chunksize=1000):
+        ''' Lazily expand the product over a grid of path keywords
+
+        Resolves the product ``path_name`` for every combination of path keywords,
+        yielding lightweight file descriptors without constructing any file objects.
+        Keywords not set in the grid default to the product ``path_kwargs``, with any
+        remaining template keywords filled in from the version, as in `expand_product`.
+
+        Parameters
+        ----------
+            versions : list
+                The versions to expand.  Default is all product versions.
+            grid : dict
+                A dictionary of keyword names and lists of values, expanded over
+                their cartesian product, e.g. {'plate': [8485, 7443], 'ifu': [1901, 3702]}
+            kwargs : list
+                An explicit list of keyword dictionaries.  Used instead of the grid.
+            exists : bool
+                If True, checks whether each file exists.  Default is False.
+            jobs : int
+                The number of threads used to check file existence.  Default is serial.
+            chunksize : int
+                The number of files checked at a time when checking in parallel
+
+        Yields
+        ------
+            a `FileDescriptor` of path, version, kwargs and exists for each combination
+        '''
+        path_name = getattr(self, 'path_name', None)
+        if not path_name:
+            raise ValueError(f'Product {self.name} has no path_name.  Cannot expand a grid.')
+
+        versions = versions or self.versions
+        defaults = getattr(self, 'path_kwargs', None) or {}
+        if kwargs is None:
+            grid = grid or {}
+            keys = list(grid)
+            combos = (dict(zip(keys, values)) for values in itertools.product(*grid.values()))
+        else:
+            combos = kwargs
+
+        # materialize the combinations once when they are reused across versions
+        if len(versions) > 1:
+            combos = list(combos)
+
+        version_kwargs = self._get_grid_kwargs(path_name, versions, defaults)
+        files = (FileDescriptor(resolver.resolve(path_name, str(version),
+                                                 **dict(path_kwargs, **combo))[0],
+                                str(version), combo, None)
+                 for version, path_kwargs in version_kwargs for combo in combos)
+        if not exists:
+            yield from files
+        elif not jobs or jobs <= 1:
+            yield from (f._replace(exists=is_file(f.path)) for f in files)
+        else:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                while True:
+                    chunk = list(itertools.islice(files, chunksize))
+                    if not chunk:
+                        break
+                    flags = executor.map(is_file, [f.path for f in chunk])
+                    yield from (f._replace(exists=flag) for f, flag in zip(chunk, flags))
+
+    def _get_existing_files(self, versions=None):
+        ''' get the expanded product files that exist, optionally limited to some versions '''
+
+        # get expanded products
+        if not self._expanded:
+            self._expanded = self.expand_product()
+
+        # limit to only the specified versions
+        if versions:
+            assert all([i in self._expanded for i in versions]), 'All versions must be available in the product list'
+            verlist = [i for i in self._expanded if str(i.version) in versions]
+        else:
+            verlist = self._expanded
+
+        # only use files that exist
+        exists = [i for i in verlist if getattr(i, 'file_exists', False)]
+        if len(exists) != len(verlist):
+            log.warning('One or more product files do not exist. Results will be incomplete')
+        return exists
+
+    def compute_changelog(self, versions=None, refresh=None, stream=None, jobs=None, cache=None):
+
+        # stream the changelog without caching it
+        if stream:
+            exists = self._get_existing_files(versions=versions)
+            return compute_changelog(list(reversed(exists)), change=self.datatype, stream=True,
+                                     jobs=jobs, cache=cache)
 
         # force a refresh
         if refresh:
             self._changes = None
 
         if not self._changes:
-            # get expanded products
-            if not self._expanded:
-                self._expanded = self.expand_product()
-
-            # limit to only the specified versions
-            if versions:
-                assert all([i in self._expanded for i in versions]), 'All versions must be available in the product list'
-                verlist = [i for i in self._expanded if str(i.version) in versions]
-            else:
-                verlist = self._expanded
-
             # only get changes for files that exist
-            exists = [i for i in verlist if i.file_exists]
+            exists = self._get_existing_files(versions=versions)
             rev_list = list(reversed(exists))
-            if len(exists) != len(verlist):
-                log.warning('One or more product files do not exist. Changelog will be incomplete')
-
-            self._changes = compute_changelog(rev_list, change=self.datatype)
+            self._changes = compute_changelog(rev_list, change=self.datatype, jobs=jobs,
+                                              cache=cache)
         return self._changes
 
+    def compute_matrix(self, versions=None, refresh=None):
+        ''' compute the keyword, HDU and column presence matrix across all versions '''
+
+        # compute a matrix of some versions without replacing the cached one of all versions
+        if versions:
+            exists = self._get_existing_files(versions=versions)
+            return compute_matrix(exists, change=self.datatype)
+
+        # force a refresh
+        if refresh:
+            self._matrix = None
+
+        if not self._matrix:
+            exists = self._get_existing_files()
+            self._matrix = compute_matrix(exists, change=self.datatype)
+        return self._matrix
+
+    def compute_diff_matrix(self, versions=None, refresh=None):
+        ''' compute an all-pairs difference matrix between versions '''
+
+        # compute a matrix of some versions without replacing the cached one of all versions
+        if versions:
+            exists = self._get_existing_files(versions=versions)
+            return compute_diff_matrix(exists, change=self.datatype)
+
+        # force a refresh
+        if refresh:
+            self._diffmatrix = None
+
+        if not self._diffmatrix:
+            exists = self._get_existing_files()
+            self._diffmatrix = compute_diff_matrix(exists, change=self.datatype)
+        return self._diffmatrix
+
     def _create_datatype(self, version, example_ver=None):
         ''' create a datatype object '''
 
@@ -265,32 +392,31 @@ def create_product(data):
     return obj
 
 
-def get_product_attrs(data, required=None, nodefault=None):
+def get_product_attrs(data, required=None, nodefault=None, models=None):
     if 'schema' in data:
         attrs = {}
         for attr, values in data['schema'].items():
-            attrs[attr] = create_field(values, key=attr, required=required, nodefault=nodefault)
+            attrs[attr] = create_field(values, key=attr, required=required, nodefault=nodefault,
+                                       models=models)
     else:
         attrs = {}
     return attrs
 
 
+@timed('create_schema')
 def create_product_schema(data, required=None, models=None):
     ''' create a product schema class '''
 
-    # get the attributes
-    attrs = get_product_attrs(data, required=required)
+    # get the attributes, with the datamodel models bound to any object fields
+    attrs = get_product_attrs(data, required=required, models=models)
 
     # create the product class
     class_obj = create_product(data)
     attrs['_class'] = class_obj
 
-    # add the datamodel models
-    ObjectField.models = models
-
     # create the changelog schema and modify the changelog attribute
     if 'changelog' in attrs:
-        clattrs = get_product_attrs(data, required=False, nodefault=True)
+        clattrs = get_product_attrs(data, required=False, nodefault=True, models=models)
         __ = clattrs.pop('changelog')
         cl = type('ChangeLogSchema', (Schema,), clattrs)
         versions = get_versions(models, data['schema'])
@@ -330,6 +456,7 @@ def validate_products(data, schema):
     return data
 
 
+@timed('generate_products')
 def generate_products(ymlfile, name=None, make_fuzzy=True, models=None):
     ''' generate a list of datamodel types '''
 
@@ -0,0 +1,199 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Filename: stats.py
+# Project: core
+# Author: Brian Cherinka
+# Created: Monday, 19th October 2026 7:42:16 pm
+# License: BSD 3-clause "New" or "Revised" License
+# Copyright (c) 2026 Brian Cherinka
+# Last Modified: Monday, 19th October 2026 7:42:16 pm
+# Modified By: Brian Cherinka
+
+
+from __future__ import print_function, division, absolute_import
+import re
+import sys
+import time
+import subprocess
+import threading
+import functools
+import contextlib
+from collections import namedtuple
+
+from cthreepo import config, log
+
+StageStats = namedtuple('StageStats', ['stage', 'count', 'total', 'max'])
+ImportTime = namedtuple('ImportTime', ['module', 'self', 'cumulative', 'depth'])
+ImportProfile = namedtuple('ImportProfile', ['module', 'time', 'n_modules', 'imports'])
+
+_import_line = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+class TimingStats(object):
+    ''' Per-stage timing counters of the datamodel build
+
+    Records the number of calls and the cumulative and maximum durations of each
+    instrumented stage, e.g. reading yaml, generating models or products, expanding
+    products, reading files and computing diffs.  Timing is disabled by default, in which
+    case instrumented functions are called directly without being timed.
+
+    Parameters
+    ----------
+        enabled : bool
+            If True, records stage timings.  Defaults to the ``stats.enabled`` config value.
+        log_stages : bool
+            If True, also logs each timed call at debug level.  Defaults to the
+            ``stats.log`` config value.
+    '''
+
+    def __init__(self, enabled=None, log_stages=None):
+        options = config.get('stats', {})
+        self.enabled = options.get('enabled', False) if enabled is None else enabled
+        self.log_stages = options.get('log', False) if log_stages is None else log_stages
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'<TimingStats(enabled={self.enabled}, stages={list(self._stages)})>'
+
+    def __contains__(self, stage):
+        return stage in self._stages
+
+    def __getitem__(self, stage):
+        count, total, longest = self._stages[stage]
+        return StageStats(stage, count, total, longest)
+
+    def __iter__(self):
+        return (self[stage] for stage in list(self._stages))
+
+    def enable(self, log_stages=None):
+        ''' Enable timing, optionally logging each timed call '''
+        self.enabled = True
+        if log_stages is not None:
+            self.log_stages = log_stages
+
+    def disable(self):
+        ''' Disable timing '''
+        self.enabled = False
+
+    def reset(self):
+        ''' Clear all recorded timings '''
+        with self._lock:
+            self._stages.clear()
+
+    def record(self, stage, elapsed):
+        ''' Record a single call of a stage
+
+        Parameters
+        ----------
+            stage : str
+                The stage name
+            elapsed : float
+                The duration of the call in seconds
+        '''
+        with self._lock:
+            count, total, longest = self._stages.get(stage, (0, 0.0, 0.0))
+            self._stages[stage] = (count + 1, total + elapsed, max(longest, elapsed))
+        if self.log_stages:
+            log.debug(f'{stage} took {elapsed * 1e3:.2f} ms')
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        ''' Time a block of code as a stage, when timing is enabled '''
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def to_dict(self):
+        ''' Convert the recorded timings into a dictionary '''
+        return {s.stage: {'count': s.count, 'total': s.total, 'max': s.max} for s in self}
+
+    def report(self):
+        ''' Format the recorded timings as a text table, slowest stages first '''
+        lines = [f'{"stage":<20} {"count":>8} {"total (ms)":>12} {"mean (ms)":>12} '
+                 f'{"max (ms)":>12}']
+        for s in sorted(self, key=lambda s: s.total, reverse=True):
+            lines.append(f'{s.stage:<20} {s.count:>8} {s.total * 1e3:>12.2f} '
+                         f'{s.total / s.count * 1e3:>12.3f} {s.max * 1e3:>12.2f}')
+        return '\n'.join(lines)
+
+
+# the shared timing stats
+stats = TimingStats()
+
+
+def timed(stage):
+    ''' Decorator that times each call of a function as a stage of the shared stats
+
+    When timing is disabled, the function is called directly.
+
+    Parameters
+    ----------
+        stage : str
+            The stage name
+    '''
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not stats.enabled:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.record(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def profile_imports(module='cthreepo'):
+    ''' Profile the cold import of a module in a fresh interpreter
+
+    Runs ``python -X importtime`` in a subprocess, so the import is not affected by
+    any modules already imported in the current process.
+
+    Parameters
+    ----------
+        module : str
+            The module to import
+
+    Returns
+    -------
+        An `ImportProfile` of the module, the import time in seconds, the total number of
+        modules loaded, and an `ImportTime` of self and cumulative seconds for each module
+        imported by it
+    '''
+    code = ('import sys, time; before = set(sys.modules); start = time.perf_counter(); '
+            f'import {module}; elapsed = time.perf_counter() - start; '
+            'print(elapsed, len(sys.modules), *(set(sys.modules) - before))')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True)
+    elapsed, n_modules, *modules = result.stdout.splitlines()[-1].split()
+    modules = set(modules)
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = _import_line.match(line)
+        if match and match.group(4) in modules:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append(ImportTime(name, int(self_us) / 1e6, int(cumulative_us) / 1e6,
+                                      (len(indent) - 1) // 2))
+    return ImportProfile(module, float(elapsed), int(n_modules), imports)
+
+
+def format_import_profile(profile, n=20):
+    ''' Format an import profile as text, with the n slowest imports by self time '''
+    lines = [f'import {profile.module}: {profile.time * 1e3:.1f} ms, '
+             f'{profile.n_modules} modules loaded',
+             f'{"module":<50} {"self (ms)":>10} {"cumulative (ms)":>16}']
+    for item in sorted(profile.imports, key=lambda i: i.self, reverse=True)[:n]:
+        lines.append(f'{item.module:<50} {item.self * 1e3:>10.2f} {item.cumulative * 1e3:>16.2f}')
+    return '\n'.join(lines)
@@ -11,13 +11,18 @@
 from __future__ import print_function, division, absolute_import
 import os
 import re
+import time
 import pathlib
 import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from itertools import groupby
 from fuzzy_types.fuzzy import FuzzyDict, FuzzyList
 from cthreepo.core.models import generate_models
+from cthreepo.core.stats import timed
 from cthreepo.core.products import generate_products
-from cthreepo.io.yaml import get_yaml_files, read_yaml
+from cthreepo import config, log
+from cthreepo.io.yaml import get_yaml_files, read_yaml_files
 
 
 class DataModel(object):
@@ -31,6 +36,7 @@ class DataModel(object):
         cls._model_files = get_yaml_files(datamodel_dir, get='models')
         return super(DataModel, cls).__new__(cls, *args, **kwargs)
 
+    @timed('datamodel')
     def __init__(self):
         self._classes = []
         self.models = self._generate_models()
@@ -58,19 +64,42 @@ class DataModel(object):
         fd = {}
         assert isinstance(self._mixed_models, dict), 'mix_models must be a dict'
         keys = '|'.join(self._mixed_models.keys()) if self._mixed_models else None
-        for file in self._model_files:
+
+        # sort the files for a deterministic model order, and parse them in parallel
+        # when there are enough of them to outweigh the cost of starting the processes.
+        # Datamodels are built on first access of dm, never while cthreepo.datamodel is
+        # imported, and the spawned workers only import cthreepo.io.yaml.
+        files = sorted(self._model_files, key=str)
+        options = config.get('datamodel', {})
+        jobs = options.get('jobs', None) or os.cpu_count()
+        if len(files) < options.get('parallel_threshold', 16):
+            jobs = None
+
+        for file, data in zip(files, read_yaml_files(files, jobs=jobs)):
             mixin = None
             # check for mixin model
             if keys:
                 mixmatch = re.search(keys, str(file))
                 if mixmatch:
                     mixin = self._mixed_models[mixmatch.group()]
-            data = read_yaml(file)
             models = generate_models(data, mixin=mixin)
             self._classes.append(models[0].__class__)
             fd[file.stem] = models
         return FuzzyDict(fd)
 
+    def memory_report(self):
+        ''' Measure the memory footprint of the datamodel
+
+        Reports the deep size of the models, the products, and the expanded file objects,
+        open FITS HDULists, changelogs and matrices cached on each product.
+
+        Returns
+        -------
+            A `MemoryReport`, with category totals and the largest contributors
+        '''
+        from cthreepo.core.memory import measure_datamodel
+        return measure_datamodel(self)
+
     def _get_all_versions(self):
         ''' get all versions in this datamodel '''
         if 'versions' in self.models:
@@ -92,10 +121,10 @@ class DataModel(object):
                 continue
             prods = []
             for prod in self.products:
-                # reset changelog and expanded products
-                if prod._changes is not None or prod._expanded is not None:
-                    prod._changes = None
-                    prod._expanded = None
+                # reset changelog, matrices and expanded products
+                for attr in ('_changes', '_expanded', '_matrix', '_diffmatrix'):
+                    if getattr(prod, attr) is not None:
+                        setattr(prod, attr, None)
                 # replicate the product
                 if k in prod.versions:
                     newprod = copy.deepcopy(prod)
@@ -126,10 +155,95 @@ class VDataModelList(FuzzyList):
         return [str(item.release) for item in self]
 
 
+# the built survey datamodels, by class
+_datamodels = {}
+_locks = {}
+_lock = threading.Lock()
+
+
+def get_datamodel(cls):
+    ''' Get the datamodel of a survey DataModel class, building it once
+
+    Parameters
+    ----------
+        cls : class
+            A `DataModel` subclass
+
+    Returns
+    -------
+        The shared instance of the survey datamodel
+    '''
+    with _lock:
+        lock = _locks.setdefault(cls, threading.Lock())
+    with lock:
+        if cls not in _datamodels:
+            _datamodels[cls] = cls()
+    return _datamodels[cls]
+
+
+def _build_datamodel(cls):
+    ''' build a survey datamodel, returning it or its error, and its build time '''
+    start = time.perf_counter()
+    try:
+        datamodel, error = get_datamodel(cls), None
+    except Exception as exc:
+        datamodel, error = None, exc
+    return datamodel, error, time.perf_counter() - start
+
+
 class SDSSDataModelList(FuzzyList):
+    build_times = None
+    failures = None
+
     def mapper(self, item):
         return str(item.survey.lower())
 
+    @classmethod
+    def build(cls, classes, jobs=None):
+        ''' Build a list of survey datamodels concurrently
+
+        Independent surveys are built in a bounded pool of threads.  A survey that fails to
+        build is logged and left out of the list, without affecting the other surveys.
+        The build time of each survey, and the error of each failed survey, are recorded
+        on the list.  The pool is only started by an explicit call, never while
+        ``cthreepo.datamodel`` is being imported, since the module ``dm`` is built on
+        first access.
+
+        Parameters
+        ----------
+            classes : list
+                The `DataModel` subclasses of each survey
+            jobs : int
+                The maximum number of surveys built at once.  Defaults to the
+                ``datamodel.survey_jobs`` config value.
+
+        Returns
+        -------
+            An `SDSSDataModelList` of the built survey datamodels, in the order of the classes
+        '''
+        jobs = jobs or config.get('datamodel', {}).get('survey_jobs', None) or 4
+        jobs = max(1, min(jobs, len(classes)))
+        if jobs == 1:
+            results = [_build_datamodel(klass) for klass in classes]
+        else:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                results = list(executor.map(_build_datamodel, classes))
+
+        datamodels, build_times, failures = [], {}, {}
+        for klass, (datamodel, error, elapsed) in zip(classes, results):
+            build_times[klass.survey] = elapsed
+            if error is not None:
+                log.warning(f'Failed to build the {klass.survey} datamodel: {error}')
+                failures[klass.survey] = error
+                continue
+            log.debug(f'Built the {klass.survey} datamodel in {elapsed:.3f} s')
+            datamodels.append(datamodel)
+
+        items = cls(datamodels)
+        items.build_times = build_times
+        items.failures = failures
+        return items
+
     def organize_by_release(self, public=None):
         ''' organize the datamodel by release '''
         # TODO - fix the return object
@@ -143,6 +257,17 @@ class SDSSDataModelList(FuzzyList):
         return releases
 
 
-from .manga import dm as mdm
-from .simple import dm as sdm
-dm = SDSSDataModelList([mdm, sdm])
+from .manga import MaNGADataModel
+from .simple import SimpleDataModel
+
+_dm_lock = threading.Lock()
+
+
+def __getattr__(name):
+    ''' get the list of all survey datamodels, building it on first access '''
+    if name == 'dm':
+        with _dm_lock:
+            if 'dm' not in globals():
+                globals()['dm'] = SDSSDataModelList.build([MaNGADataModel, SimpleDataModel])
+        return globals()['dm']
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -16,10 +16,14 @@ from docutils import nodes
 from docutils.parsers import rst
 from docutils.parsers.rst import directives
 from docutils import statemachine
+import os
+import pathlib
 import traceback
 import importlib
-import six
 import abc
+from cthreepo import __version__
+from cthreepo.io.artifacts import (describe_datamodel, describe_file, describe_versions,
+                                   get_artifact_path, read_artifact)
 
 
 def _indent(text, level=1):
@@ -72,93 +76,82 @@ def make_list(items, links=False):
     yield ''
 
 
-def _format_table_info(inst):
+def _format_table_info(desc):
     ''' Format the Table info '''
 
     yield '.. code::'
     yield ''
-    info = inst._info.split('\n')
+    info = (desc['info'] or '').split('\n')
     for line in info:
         yield _indent(line)
 
 
-def _format_fits_info(inst):
+def _format_fits_info(desc):
     ''' Format the FITS info '''
 
     yield '.. code::'
     yield ''
-    info = inst._info.split('\n')
+    info = (desc['info'] or '').split('\n')
     for line in info:
         yield _indent(line)
 
 
-def _format_fits_header(inst):
+def _format_fits_header(desc):
     ''' Format the primary FITS header '''
 
     yield '.. code::'
     yield ''
-    h = inst.hdulist['PRIMARY'].header.tostring(sep='\\n')
-    for line in h.split('\\n'):
+    for line in desc['header'] or []:
         yield _indent(line)
 
 
-def _format_fits_tables(inst):
+def _format_fits_tables(desc):
     ''' Format any FITS tables '''
 
     yield '.. code::'
     yield ''
-    for ext in inst.hdulist:
-        if not ext.is_image:
-            for line in _format_table(ext):
-                yield line
+    for table in desc['tables']:
+        for line in _format_table(table):
+            yield line
 
 
-def _format_table(ext):
+def _format_table(table):
     ''' Format a single FITS table extension '''
 
-    yield f'.. list-table:: {ext.name}'
+    yield f'.. list-table:: {table["name"]}'
     yield _indent(':widths: auto')
     yield _indent(':header-rows: 1')
     yield ''
     yield _indent('* - Name')
     yield _indent('  - Format')
-    columns = ext.columns
-    for col in columns:
-        yield _indent(f'* - {col.name}')
-        yield _indent(f'  - {col.format}')
+    for name, fmt in table['columns']:
+        yield _indent(f'* - {name}')
+        yield _indent(f'  - {fmt}')
 
 
-def _format_version(obj):
+def _format_version(versions):
     ''' Format the versions of the FITS '''
 
-    if not hasattr(obj, 'versions'):
+    if versions is None:
         yield ''
         return
     yield ''
     yield 'Available Versions'
     yield ''
-    if isinstance(obj.versions, list):
-        for val in obj.versions:
-            if isinstance(val, six.string_types):
-                yield f'* {val}'
-            else:
-                info = tuple(i for k, i in val.__dict__.items()
-                               if not k.startswith('_') and i != str(val))
-                info = ', '.join(map(str, info))
-                yield f'* {val}: {info}'
-
-
-def _format_changelog(log):
+    for val, info in versions:
+        yield f'* {val}: {info}' if info is not None else f'* {val}'
+
+
+def _format_changelog(report):
     ''' Format a changlog for a FITS '''
 
-    report = log.generate_report(split=True)
     for line in report:
         yield f'**{line}**' if 'Version' in line else line
         yield ''
 
 
-def _format_products(obj):
-    ''' Format a FuzzyList of Products '''
+def _format_products(products):
+    ''' Format a list of Products '''
 
     yield f'.. list-table::'
     yield _indent(':widths: auto')
@@ -170,18 +163,17 @@ def _format_products(obj):
     yield _indent('  - Public')
     yield _indent('  - SDSS Access Path Name')
 
-    for product in obj:
-        name = f":ref:`{product.name} <{product.name.lower()}>`"
+    for product in products:
+        name = f":ref:`{product['name']} <{product['name'].lower()}>`"
         yield _indent(f'* - {name}')
-        yield _indent(f'  - {product.short}')
-        yield _indent(f'  - {product.datatype}')
-        yield _indent(f'  - {product.public}')
-        path_name = getattr(product, 'path_name', None)
-        yield _indent(f'  - {path_name}')
+        yield _indent(f'  - {product["short"]}')
+        yield _indent(f'  - {product["datatype"]}')
+        yield _indent(f'  - {product["public"]}')
+        yield _indent(f'  - {product["path_name"]}')
 
 
 def _format_models(obj):
-    ''' Format a FuzzyList of Models '''
+    ''' Format a dictionary of Models '''
 
     for name, models in obj.items():
         if name == 'versions':
@@ -202,8 +194,113 @@ def _format_model(models):
     yield _indent('  - Description')
 
     for model in models:
-        yield _indent(f'* - {model.name}')
-        yield _indent(f'  - {model.description}')
+        yield _indent(f'* - {model["name"]}')
+        yield _indent(f'  - {model["description"]}')
+
+
+class _BuildCache(dict):
+    ''' A process-local cache that is never pickled with the build environment '''
+
+    def __reduce__(self):
+        return (self.__class__, ())
+
+
+def _get_cache(env):
+    ''' Get the build cache of expanded products and changelogs
+
+    The cache lives on the Sphinx build environment for the duration of the read phase,
+    so each product is expanded at most once per build, across all documents.  With
+    parallel reads, each worker process keeps its own cache.
+
+    '''
+    if not getattr(env, 'cthreepo_cache', None):
+        env.cthreepo_cache = _BuildCache(products={}, changelogs={})
+    return env.cthreepo_cache
+
+
+def _get_rendered(env):
+    ''' Get the persistent cache of rendered directive content
+
+    Maps each directive argument to its input file paths, their identity, and
+    the rendered lines of each section.  Unlike the build cache, it is pickled with
+    the build environment and merged across parallel workers.
+
+    '''
+    if not hasattr(env, 'cthreepo_rendered'):
+        env.cthreepo_rendered = {}
+        env.cthreepo_docs = {}
+    return env.cthreepo_rendered
+
+
+def _clear_cache(app, env):
+    ''' Clear the build cache and prune unused rendered content '''
+    if hasattr(env, 'cthreepo_cache'):
+        del env.cthreepo_cache
+
+    rendered = _get_rendered(env)
+    used = set().union(*env.cthreepo_docs.values())
+    for key in set(rendered) - used:
+        del rendered[key]
+
+
+def _purge_doc(app, env, docname):
+    ''' Remove a document from the rendered content tracking '''
+    _get_rendered(env)
+    env.cthreepo_docs.pop(docname, None)
+
+
+def _merge_info(app, env, docnames, other):
+    ''' Merge the rendered content from a parallel worker environment '''
+    rendered = _get_rendered(env)
+    rendered.update(getattr(other, 'cthreepo_rendered', {}))
+    other_docs = getattr(other, 'cthreepo_docs', {})
+    for docname in docnames:
+        if docname in other_docs:
+            env.cthreepo_docs[docname] = other_docs[docname]
+
+
+def _file_identity(files):
+    ''' Identify a list of files or expanded file objects by path, size and modification time '''
+
+    identity = []
+    for item in files:
+        path = item if isinstance(item, (str, pathlib.Path)) else getattr(item, 'fullpath', None)
+        if path is None:
+            identity.append(None)
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            identity.append((str(path), None, None))
+        else:
+            identity.append((str(path), stat.st_size, stat.st_mtime_ns))
+    return tuple(identity)
+
+
+def _get_yaml_dependencies(module_path):
+    ''' Get the YAML datamodel definition files used by a datamodel module '''
+
+    module_name = str(module_path).split(':', 1)[0]
+    dm = getattr(importlib.import_module(module_name), 'dm', None)
+    products_file = getattr(dm, '_products_file', None)
+    if not products_file:
+        return []
+
+    files = [products_file] + list(getattr(dm, '_model_files', []))
+    # add any inherited datamodel.yaml files
+    root = pathlib.Path(os.environ['CTHREEPO_DIR']) / 'datamodel'
+    for parent in products_file.parents:
+        if (parent / 'datamodel.yaml').is_file():
+            files.append(parent / 'datamodel.yaml')
+        if parent == root:
+            break
+    return [str(f) for f in files]
+
+
+def _parse_fileclass(fileclass):
+    ''' Parse a "module:object" directive argument into a survey and object name '''
+    module_name, attr_name = str(fileclass).split(':', 1)
+    return module_name.rsplit('.', 1)[-1], attr_name
 
 
 def load_module(module_path, error=None, products=None):
@@ -261,12 +358,24 @@ class BaseDirective(abc.ABC, rst.Directive):
 
         # get the directive argument
         fileclass = self.arguments[0]
-        # load the module or object
-        obj = load_module(fileclass, products=self.product)
+        # load the module or object, or its exported artifact
+        self.artifact_dir = self._get_artifact_dir()
+        if self.artifact_dir:
+            obj = self.load_artifact(fileclass)
+        else:
+            obj = load_module(fileclass, products=self.product)
         # define the basic TOC tree
         base_name = self.options['name'].lower().strip().replace(' ', '_')
+        self._base_name = base_name
         toc = self.get_toc(base_name)
 
+        # track the input files this document depends on
+        self._rendered = self._get_rendered_entry(obj)
+        for path in self._rendered['paths']:
+            if os.path.isfile(path):
+                self.env.note_dependency(path)
+        self.env.cthreepo_docs.setdefault(self.env.docname, set()).add(fileclass)
+
         # add a change log
         if 'change' in self.options:
             toc.append(('ChangeLog', base_name + '_changelog'))
@@ -296,6 +405,48 @@ class BaseDirective(abc.ABC, rst.Directive):
         self.state.nested_parse(result, 0, node)
         return node
 
+    def _get_rendered_entry(self, obj):
+        ''' get the rendered content entry for this directive, if its inputs are unchanged '''
+        rendered = _get_rendered(self.env)
+        key = self.arguments[0]
+        entry = rendered.get(key)
+        if entry and _file_identity(entry['paths']) == entry['identity']:
+            return entry
+
+        paths = [str(p) for p in self.get_dependencies(obj)]
+        entry = {'paths': paths, 'identity': _file_identity(paths), 'sections': {}}
+        rendered[key] = entry
+        return entry
+
+    def _get_artifact_dir(self):
+        ''' get the directory of exported datamodel artifacts, if any '''
+        artifact_dir = getattr(self.env.config, 'cthreepo_artifact_dir', None)
+        if not artifact_dir:
+            return None
+        return pathlib.Path(self.env.srcdir) / os.path.expandvars(artifact_dir)
+
+    def get_dependencies(self, obj):
+        ''' get the list of input files used to render the directive '''
+        if self.artifact_dir:
+            return self.get_artifact_dependencies(obj)
+        return _get_yaml_dependencies(self.arguments[0])
+
+    @abc.abstractmethod
+    def load_artifact(self, fileclass):
+        pass
+
+    @abc.abstractmethod
+    def get_artifact_dependencies(self, obj):
+        pass
+
+    def get_docstring(self, obj):
+        ''' get the docstring to add to the main section '''
+        return obj.__doc__
+
+    def get_versions(self, obj):
+        ''' get the versions to add to the main section '''
+        return None
+
     @abc.abstractmethod
     def get_toc(self, base_name):
         pass
@@ -313,7 +464,7 @@ class BaseDirective(abc.ABC, rst.Directive):
 
         # add docstring
         if self.add_docstring:
-            docs = [nodes.paragraph(text=i) for i in obj.__doc__.split('\n')]
+            docs = [nodes.paragraph(text=i) for i in self.get_docstring(obj).split('\n')]
             section += nodes.line_block('', *docs)
 
         # add the main toc
@@ -325,7 +476,7 @@ class BaseDirective(abc.ABC, rst.Directive):
 
         # add any version information
         if self.add_version:
-            lines = _format_version(obj)
+            lines = _format_version(self.get_versions(obj))
             result = statemachine.ViewList()
             for line in lines:
                 result.append(line, tag)
@@ -344,8 +495,13 @@ class BaseDirective(abc.ABC, rst.Directive):
         else:
             node = section
 
-        # generate section content
-        lines = self.get_section_content(obj, refid)
+        # generate section content, reusing any previously rendered content
+        sections = self._rendered['sections']
+        name = refid[len(self._base_name) + 1:]
+        if name not in sections:
+            lines = self.get_section_content(obj, refid)
+            sections[name] = list(lines) if lines else None
+        lines = sections[name]
 
         if lines:
             node = self._parse_format(lines, refid, node)
@@ -370,13 +526,91 @@ class ProductDirective(BaseDirective):
     def get_section_content(self, obj, refid):
         pass
 
+    def load_artifact(self, fileclass):
+        ''' load the exported product artifact '''
+        survey, name = _parse_fileclass(fileclass)
+        return read_artifact(self.artifact_dir, survey, name)
+
+    def _get_version_artifact(self, version):
+        ''' load the exported artifact for a single product version '''
+        survey, name = _parse_fileclass(self.arguments[0])
+        return read_artifact(self.artifact_dir, survey, name, version=version)
+
+    def get_artifact_dependencies(self, obj):
+        ''' get the product and version artifact files '''
+        survey, name = _parse_fileclass(self.arguments[0])
+        paths = [get_artifact_path(self.artifact_dir, survey, name)]
+        paths.extend(get_artifact_path(self.artifact_dir, survey, name, version=version)
+                     for version, __ in obj['versions'])
+        return paths
+
+    def get_dependencies(self, obj):
+        ''' get the YAML definitions and data files used to render the product '''
+        paths = super(ProductDirective, self).get_dependencies(obj)
+        if self.artifact_dir:
+            return paths
+        products = self.get_expanded_product(obj)
+        return paths + [str(item.fullpath) for item in products if hasattr(item, 'fullpath')]
+
+    def get_docstring(self, obj):
+        ''' get the product docstring '''
+        return obj['doc'] if self.artifact_dir else obj.__doc__
+
+    def get_versions(self, obj):
+        ''' get the described product versions '''
+        return obj['versions'] if self.artifact_dir else describe_versions(obj.versions)
+
+    def get_expanded_product(self, obj):
+        ''' expand the product, once per build '''
+        cache = _get_cache(self.env)['products']
+        key = self.arguments[0]
+        if key in cache:
+            products, identity = cache[key]
+            if _file_identity(products) == identity:
+                return products
+
+        products = obj.expand_product()
+        cache[key] = (products, _file_identity(products))
+        return products
+
     def get_recent_product(self, obj):
         # expand the fits product
-        products = obj.expand_product()
+        products = self.get_expanded_product(obj)
         # get most recent
         inst = products[-1]
         return inst
 
+    def get_recent_file(self, obj):
+        ''' get the description of the most recent product file '''
+        if self.artifact_dir:
+            version = obj['versions'][-1][0]
+            return self._get_version_artifact(version)
+        return describe_file(self.get_recent_product(obj))
+
+    def get_changelog(self, obj):
+        ''' compute the product changelog, once per build '''
+        products = self.get_expanded_product(obj)
+        cache = _get_cache(self.env)['changelogs']
+        key = (self.arguments[0], _file_identity(products))
+        if key not in cache:
+            # reuse the cached expanded products
+            obj._expanded = products
+            cache[key] = obj.compute_changelog(refresh=True)
+        return cache[key]
+
+    def get_changelog_report(self, obj):
+        ''' get the product changelog report lines '''
+        if not self.artifact_dir:
+            return self.get_changelog(obj).generate_report(split=True)
+
+        report = []
+        for version, __ in reversed(obj['versions']):
+            changelog = self._get_version_artifact(version)['changelog']
+            if changelog:
+                report.append('---------------------')
+                report.extend(changelog['report'])
+        return report
+
 
 class FitsDirective(ProductDirective):
 
@@ -389,19 +623,16 @@ class FitsDirective(ProductDirective):
     def get_section_content(self, obj, refid):
         ''' generate section content for a fits file '''
 
-        # get product instance
-        inst = self.get_recent_product(obj)
         # create section content
         lines = None
         if 'info' in refid:
-            lines = _format_fits_info(inst)
+            lines = _format_fits_info(self.get_recent_file(obj))
         elif 'header' in refid:
-            lines = _format_fits_header(inst)
+            lines = _format_fits_header(self.get_recent_file(obj))
         elif 'extensions' in refid:
-            lines = _format_fits_tables(inst)
+            lines = _format_fits_tables(self.get_recent_file(obj))
         elif 'changelog' in refid:
-            log = obj.compute_changelog()
-            lines = _format_changelog(log)
+            lines = _format_changelog(self.get_changelog_report(obj))
 
         return lines
 
@@ -416,15 +647,12 @@ class CatalogDirective(ProductDirective):
     def get_section_content(self, obj, refid):
         ''' generate section content for a catalog file '''
 
-        # get product instance
-        inst = self.get_recent_product(obj)
         # create section content
         lines = None
         if 'info' in refid:
-            lines = _format_table_info(inst)
+            lines = _format_table_info(self.get_recent_file(obj))
         elif 'changelog' in refid:
-            log = obj.compute_changelog()
-            lines = _format_changelog(log)
+            lines = _format_changelog(self.get_changelog_report(obj))
 
         return lines
 
@@ -434,6 +662,16 @@ class DataModelDirective(BaseDirective):
         'name': directives.unchanged_required
     }
 
+    def load_artifact(self, fileclass):
+        ''' load the exported datamodel artifact '''
+        survey, __ = _parse_fileclass(fileclass)
+        return read_artifact(self.artifact_dir, survey)
+
+    def get_artifact_dependencies(self, obj):
+        ''' get the datamodel artifact file '''
+        survey, __ = _parse_fileclass(self.arguments[0])
+        return [get_artifact_path(self.artifact_dir, survey)]
+
     def get_toc(self, base_name):
         ''' get a TOC '''
         toc = [('Products', base_name + '_products'), ('Models', base_name + '_models')]
@@ -442,14 +680,15 @@ class DataModelDirective(BaseDirective):
     def get_section_content(self, obj, refid):
         ''' generate section content for a datamodel '''
 
+        # describe the datamodel
+        desc = obj if self.artifact_dir else describe_datamodel(obj)
+
         # create section content
         lines = None
         if 'product' in refid:
-            item = getattr(obj, 'products')
-            lines = _format_products(item)
+            lines = _format_products(desc['products'])
         elif 'models' in refid:
-            item = getattr(obj, 'models')
-            lines = _format_models(item)
+            lines = _format_models(desc['models'])
 
         return lines
 
@@ -458,3 +697,10 @@ def setup(app):
     app.add_directive('fits', FitsDirective)
     app.add_directive('catalog', CatalogDirective)
     app.add_directive('datamodel', DataModelDirective)
+    app.add_config_value('cthreepo_artifact_dir', None, 'env')
+    app.connect('env-updated', _clear_cache)
+    app.connect('env-purge-doc', _purge_doc)
+    app.connect('env-merge-info', _merge_info)
+
+    return {'version': __version__, 'env_version': 1,
+            'parallel_read_safe': True, 'parallel_write_safe': True}
@@ -9,7 +9,7 @@
 # @Last Modified time: 2018-06-12 01:11:29
 
 from __future__ import print_function, division, absolute_import
-from cthreepo.datamodel import DataModel
+from cthreepo.datamodel import DataModel, get_datamodel
 from cthreepo.datamodel.manga.mixins import Channel
 
 
@@ -18,7 +18,10 @@ class MaNGADataModel(DataModel):
     _mixed_models = {'channels': Channel}
 
 
-# create the manga datamodel
-dm = MaNGADataModel()
+def __getattr__(name):
+    ''' get the manga datamodel, building it on first access '''
+    if name == 'dm':
+        return get_datamodel(MaNGADataModel)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
@@ -12,13 +12,16 @@
 
 
 from __future__ import print_function, division, absolute_import
-from cthreepo.datamodel import DataModel
+from cthreepo.datamodel import DataModel, get_datamodel
 
 
 class SimpleDataModel(DataModel):
     survey = 'simple'
 
 
-# create the manga datamodel
-dm = SimpleDataModel()
+def __getattr__(name):
+    ''' get the simple datamodel, building it on first access '''
+    if name == 'dm':
+        return get_datamodel(SimpleDataModel)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
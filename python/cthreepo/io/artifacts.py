@@ -0,0 +1,246 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Filename: artifacts.py
+# Project: io
+# Author: Brian Cherinka
+# Created: Monday, 19th October 2026 1:32:05 pm
+# License: BSD 3-clause "New" or "Revised" License
+# Copyright (c) 2026 Brian Cherinka
+# Last Modified: Monday, 19th October 2026 1:32:05 pm
+# Modified By: Brian Cherinka
+
+
+from __future__ import print_function, division, absolute_import
+import pathlib
+import six
+import orjson
+from concurrent.futures import ProcessPoolExecutor
+from cthreepo import log
+from cthreepo.io.cache import DiskCache
+from cthreepo.io.manifest import init_worker
+
+
+def describe_versions(versions):
+    ''' Describe a list of product versions
+
+    Parameters
+    ----------
+        versions : list
+            A list of version strings or version model objects
+
+    Returns
+    -------
+        A list of [name, info] pairs, where info is a string of any extra version information
+    '''
+    described = []
+    for val in versions:
+        if isinstance(val, six.string_types):
+            described.append([val, None])
+        else:
+            info = tuple(i for k, i in val.__dict__.items()
+                         if not k.startswith('_') and i != str(val))
+            described.append([str(val), ', '.join(map(str, info))])
+    return described
+
+
+def describe_product(product):
+    ''' Describe a product, with its documentation and versions '''
+    return {'name': product.name, 'short': product.short, 'datatype': product.datatype,
+            'public': getattr(product, 'public', None),
+            'path_name': getattr(product, 'path_name', None),
+            'doc': product.__doc__,
+            'versions': describe_versions(product.versions)}
+
+
+def describe_path(inst):
+    ''' Describe the location of an expanded product file '''
+    fullpath = getattr(inst, 'fullpath', None)
+    return {'version': str(inst.version), 'path': str(fullpath) if fullpath else None,
+            'exists': bool(getattr(inst, 'file_exists', False))}
+
+
+def describe_file(inst):
+    ''' Describe an expanded product file
+
+    Collects the info, primary header cards and table columns of a FITS file,
+    or the info of a catalog file.
+
+    Parameters
+    ----------
+        inst : object
+            An expanded product file object
+
+    Returns
+    -------
+        A dictionary description of the file
+    '''
+    # read any file deferred by a manifest
+    if getattr(inst, 'file_exists', False) and hasattr(inst, 'load'):
+        inst.load()
+
+    data = {'version': str(inst.version), 'filename': getattr(inst, 'filename', None),
+            'exists': getattr(inst, 'file_exists', False), 'info': getattr(inst, '_info', None),
+            'header': None, 'tables': []}
+
+    if data['exists'] and hasattr(inst, 'lease'):
+        with inst.lease() as hdulist:
+            data['header'] = hdulist['PRIMARY'].header.tostring(sep='\\n').split('\\n')
+            data['tables'] = [{'name': ext.name, 'columns': [[col.name, col.format]
+                                                             for col in ext.columns]}
+                              for ext in hdulist if not ext.is_image]
+    return data
+
+
+def describe_datamodel(dm):
+    ''' Describe a survey datamodel, with its products and models '''
+    products = [{k: v for k, v in describe_product(p).items() if k not in ('doc', 'versions')}
+                for p in dm.products]
+    models = {name: [{'name': str(m), 'description': getattr(m, 'description', None)}
+                     for m in items]
+              for name, items in dm.models.items()}
+    return {'survey': dm.survey, 'products': products, 'models': models}
+
+
+def _write_json(path, data):
+    ''' write a compact JSON file '''
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(data))
+    return path
+
+
+def get_artifact_path(outdir, survey, product=None, version=None):
+    ''' Get the path to an exported datamodel artifact
+
+    Parameters
+    ----------
+        outdir : str
+            The root artifact directory
+        survey : str
+            The name of the survey
+        product : str
+            The name of the product.  If not set, returns the survey datamodel artifact.
+        version : str
+            The product version.  If not set, returns the product artifact.
+
+    Returns
+    -------
+        The artifact filepath
+    '''
+    path = pathlib.Path(outdir) / survey.lower()
+    if not product:
+        return path / 'datamodel.json'
+    path = path / product.lower()
+    return path / (f'{version}.json' if version else 'product.json')
+
+
+def read_artifact(outdir, survey, product=None, version=None):
+    ''' Read an exported datamodel artifact '''
+    path = get_artifact_path(outdir, survey, product=product, version=version)
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def export_product(product, outdir, survey, cache=None):
+    ''' Export a product into JSON artifacts
+
+    Writes one artifact for the product, and one artifact per product version,
+    containing the file info, primary header cards, table columns and changelog.
+
+    Parameters
+    ----------
+        product : object
+            The datamodel product
+        outdir : str
+            The root artifact directory
+        survey : str
+            The name of the survey
+        cache : `DiskCache`
+            A persistent cache of previously computed differences
+
+    Returns
+    -------
+        A list of written artifact files
+    '''
+    files = product.expand_product()
+    product._expanded = files
+    survey = str(survey)
+    changes = {}
+    if product.datatype in ('fits', 'catalog'):
+        changelog = product.compute_changelog(refresh=True, cache=cache)
+        changes = {diff.versions[0]: diff for diff in changelog}
+
+    written = [_write_json(get_artifact_path(outdir, survey, product.name),
+                           describe_product(product))]
+    for inst in files:
+        data = describe_file(inst)
+        diff = changes.get(data['version'], None)
+        data['changelog'] = {'diff': diff.to_dict(), 'report': diff.report(split=True)} \
+            if diff else None
+        path = get_artifact_path(outdir, survey, product.name, version=data['version'])
+        written.append(_write_json(path, data))
+    return written
+
+
+def _export_product_task(survey, name, outdir, cache_dir=None):
+    ''' export a single product in a worker process '''
+    from cthreepo.datamodel import dm
+    cache = DiskCache(cache_dir) if cache_dir else None
+    return export_product(dm[survey].products[name], outdir, survey=survey, cache=cache)
+
+
+def export_datamodel(outdir, surveys=None, jobs=None, cache_dir=None, manifest=None):
+    ''' Export the datamodel into JSON artifacts
+
+    Exports a datamodel artifact per survey, and artifacts for all of its products
+    and versions.  Products are exported in parallel across worker processes.
+
+    Parameters
+    ----------
+        outdir : str
+            The root artifact directory
+        surveys : list
+            A list of survey names to export.  Default is all surveys.
+        jobs : int
+            The number of worker processes.  Default is to export serially.
+        cache_dir : str
+            A directory for a persistent cache of file differences
+        manifest : str
+            A file manifest used by the worker processes instead of the filesystem
+
+    Returns
+    -------
+        A list of written artifact files
+    '''
+    from cthreepo.datamodel import dm as sdss_dm
+
+    surveys = [sdss_dm[s] for s in surveys] if surveys else list(sdss_dm)
+    written = []
+    tasks = []
+    for dm in surveys:
+        written.append(_write_json(get_artifact_path(outdir, dm.survey), describe_datamodel(dm)))
+        tasks.extend((dm.survey, product.name.lower()) for product in dm.products)
+
+    if jobs and jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                 initargs=(manifest,)) as executor:
+            futures = [executor.submit(_export_product_task, survey, name, outdir, cache_dir)
+                       for survey, name in tasks]
+            results = [(task, future.exception() or future.result())
+                       for task, future in zip(tasks, futures)]
+    else:
+        results = []
+        for task in tasks:
+            try:
+                results.append((task, _export_product_task(*task, outdir, cache_dir)))
+            except Exception as exc:
+                results.append((task, exc))
+
+    # isolate any product failures
+    for (survey, name), result in results:
+        if isinstance(result, Exception):
+            log.warning(f'Failed to export product {survey}:{name}: {result}')
+        else:
+            written.extend(result)
+    return written
@@ -0,0 +1,98 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Filename: cache.py
+# Project: io
+# Author: Brian Cherinka
+# Created: Monday, 19th October 2026 3:10:44 pm
+# License: BSD 3-clause "New" or "Revised" License
+# Copyright (c) 2026 Brian Cherinka
+# Last Modified: Monday, 19th October 2026 3:10:44 pm
+# Modified By: Brian Cherinka
+
+
+from __future__ import print_function, division, absolute_import
+import os
+import hashlib
+import pathlib
+import pickle
+import tempfile
+
+from cthreepo.io.manifest import get_entry
+
+
+def file_identity(path):
+    ''' Identify a file by its path, size and modification time
+
+    Parameters
+    ----------
+        path : str
+            A filepath
+
+    Returns
+    -------
+        A tuple of the path, size and modification time in ns, or None for both if
+        the file does not exist
+    '''
+    # use the active file manifest before the filesystem
+    entry = get_entry(path)
+    if entry is not None:
+        return (str(path), entry.size, entry.mtime)
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (str(path), None, None)
+    return (str(path), stat.st_size, stat.st_mtime_ns)
+
+
+class DiskCache(object):
+    ''' A persistent on-disk cache of pickled objects
+
+    Objects are stored as individual pickle files in the cache directory, named by
+    the hash of their key.  Keys built with `file_key` include the size and modification
+    time of the input files, so entries are invalidated when the files change.
+
+    Parameters
+    ----------
+        cache_dir : str
+            The cache directory.  Created if it does not exist.
+    '''
+
+    def __init__(self, cache_dir):
+        self.cache_dir = pathlib.Path(os.path.expandvars(str(cache_dir))).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self):
+        return f"<DiskCache(cache_dir='{self.cache_dir}')>"
+
+    def __contains__(self, key):
+        return self._get_path(key).exists()
+
+    @staticmethod
+    def file_key(*paths, **kwargs):
+        ''' Build a cache key from the identity of files and any extra parameters '''
+        identity = tuple(file_identity(path) for path in paths)
+        return repr((identity, sorted(kwargs.items())))
+
+    def _get_path(self, key):
+        digest = hashlib.sha1(str(key).encode('utf-8')).hexdigest()
+        return self.cache_dir / digest[:2] / f'{digest}.pkl'
+
+    def get(self, key, default=None):
+        ''' Get a cached object, or the default if not found '''
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+
+    def set(self, key, value):
+        ''' Store an object in the cache '''
+        path = self._get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write atomically so concurrent processes never read partial entries
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+            pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, path)
@@ -13,27 +13,78 @@
 
 from __future__ import print_function, division, absolute_import
 import os
+import copy
+import fnmatch
 import pathlib
+import threading
+from cthreepo.core.stats import timed
 from cthreepo.io.yaml import read_yaml, expand_yaml
 
 
+def _freeze(item):
+    ''' convert a list item into a hashable key, tagged by type '''
+    if isinstance(item, dict):
+        return (dict, frozenset((k, _freeze(v)) for k, v in item.items()))
+    if isinstance(item, (list, tuple)):
+        return (type(item), tuple(_freeze(v) for v in item))
+    hash(item)
+    return item
+
+
+def _merge_lists(user, default):
+    ''' append the default items not already in the user list '''
+    merged = copy.deepcopy(user)
+    seen = set()
+    for item in user:
+        try:
+            seen.add(_freeze(item))
+        except TypeError:
+            pass
+
+    for item in default:
+        try:
+            key = _freeze(item)
+        except TypeError:
+            # fall back to an equality check for unhashable items
+            if item not in merged:
+                merged.append(copy.deepcopy(item))
+            continue
+
+        if key not in seen:
+            seen.add(key)
+            merged.append(copy.deepcopy(item))
+    return merged
+
+
 def merge_datamodels(user, default):
-    """Merges datamodel files
-    alternative - try hiyapyco package or yamlload for merging purposes
-    """
+    ''' Merge a datamodel into a default datamodel
+
+    Dictionaries are merged recursively, with the user values taking precedence, and
+    default keys missing from the user datamodel added at the end.  Default list items
+    missing from the user list are appended.  Neither input is modified.
+
+    Parameters
+    ----------
+        user : dict
+            The overriding datamodel
+        default : dict
+            The default, or parent, datamodel
+
+    Returns
+    -------
+        A new merged datamodel
+    '''
 
     if isinstance(user, dict) and isinstance(default, dict):
-        for kk, vv in default.items():
-            if kk not in user:
-                user[kk] = vv
-            else:
-                user[kk] = merge_datamodels(user[kk], vv)
+        merged = {key: merge_datamodels(value, default[key]) if key in default
+                  else copy.deepcopy(value) for key, value in user.items()}
+        merged.update({key: copy.deepcopy(value) for key, value in default.items()
+                       if key not in user})
+        return merged
     elif isinstance(user, list) and isinstance(default, list):
-        for item in default:
-            if item not in user:
-                user.append(item)
+        return _merge_lists(user, default)
 
-    return user
+    return copy.deepcopy(user)
 
 
 def validate_datamodel(data):
@@ -48,22 +99,159 @@ def validate_datamodel(data):
                                                    f'contain the following keys: {",".join(keys)}')
 
 
-def find_datamodels(path):
-    ''' find all datamodel.yaml files up to a given path and merge them '''
+class DataModelTree(object):
+    ''' A cached index of the datamodel yaml files in a directory tree
+
+    Walks the tree once, recording the yaml files in each directory, and merges the
+    inherited ``datamodel.yaml`` files of each directory on first request, memoizing the
+    merged datamodel of each directory level so sibling directories reuse the merged
+    datamodel of their parent.  The index
+    is refreshed when the modification time of any indexed directory changes, i.e. when
+    files are added, removed or renamed, and a merged datamodel is re-read when any of
+    its ``datamodel.yaml`` files is modified.
+
+    Parameters
+    ----------
+        root : str
+            The root datamodel directory
+    '''
+
+    def __init__(self, root):
+        self.root = pathlib.Path(root).resolve()
+        self._dirs = None
+        self._mtimes = {}
+        self._merged = {}
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f"<DataModelTree(root='{self.root}', n_dirs={len(self._mtimes)})>"
+
+    def _scan(self):
+        ''' walk the tree once, indexing the yaml files of each directory '''
+        dirs, mtimes = {}, {}
+        for dirpath, __, files in os.walk(self.root):
+            mtimes[dirpath] = os.stat(dirpath).st_mtime_ns
+            dirs[pathlib.Path(dirpath)] = [f for f in files if f.endswith('.yaml')]
+        self._dirs, self._mtimes = dirs, mtimes
+        self._merged = {}
+
+    def _is_stale(self):
+        ''' check if any indexed directory has changed since the last scan '''
+        for dirpath, mtime in self._mtimes.items():
+            try:
+                if os.stat(dirpath).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def refresh(self, force=None):
+        ''' Re-scan the tree if it is not yet indexed or has changed
+
+        Parameters
+        ----------
+            force : bool
+                If True, always re-scans the tree
+        '''
+        with self._lock:
+            if force or self._dirs is None or self._is_stale():
+                self._scan()
+
+    def covers(self, path):
+        ''' Check if a path is in the tree '''
+        path = pathlib.Path(path).resolve()
+        return path == self.root or self.root in path.parents
 
-    path = path.resolve()
-    path = path.parent if path.is_file() else path
+    def get_files(self, path, pattern='*.yaml'):
+        ''' Get all yaml files under a directory matching a filename pattern
 
-    datamodel_dir = os.environ['CTHREEPO_DIR'] / pathlib.Path('datamodel')
-    datamodel = {}
-    for dirs, subdirs, files in os.walk(datamodel_dir):
-        if 'datamodel.yaml' in files and dirs in path.as_posix():
-            ymlfile = (pathlib.Path(dirs) / 'datamodel.yaml')
-            ymldata = read_yaml(ymlfile)
-            datamodel = merge_datamodels(ymldata, datamodel)
-        if dirs == path.as_posix():
-            break
+        Parameters
+        ----------
+            path : str
+                A directory in the tree
+            pattern : str
+                A filename pattern
+
+        Returns
+        -------
+            A list of file paths
+        '''
+        self.refresh()
+        path = pathlib.Path(path).resolve()
+        return [dirpath / name for dirpath, files in self._dirs.items()
+                if dirpath == path or path in dirpath.parents
+                for name in files if fnmatch.fnmatch(name, pattern)]
+
+    def get_datamodel(self, path):
+        ''' Get the merged datamodel of a directory
+
+        Merges the ``datamodel.yaml`` files of the directory and its parents within the
+        tree, with each child overriding its parents.
+
+        Parameters
+        ----------
+            path : str
+                A directory or file in the tree
+
+        Returns
+        -------
+            A copy of the merged datamodel dictionary
+        '''
+        self.refresh()
+        path = pathlib.Path(path).resolve()
+        path = path.parent if path.is_file() else path
+        if not self.covers(path):
+            return {}
+
+        with self._lock:
+            __, datamodel = self._merge_level(path)
+        return copy.deepcopy(datamodel)
+
+    def _merge_level(self, path):
+        ''' get the memoized merged datamodel of a directory level, merging its parents first
+
+        Each level is keyed by the modification times of its inherited ``datamodel.yaml``
+        files, so sibling directories share the merged datamodel of their parent.
+        '''
+        parent = self._merge_level(path.parent) if path != self.root else ((), {})
+        ymlfile = path / 'datamodel.yaml'
+        has_file = 'datamodel.yaml' in self._dirs.get(path, [])
+        mtimes = parent[0] + ((os.stat(ymlfile).st_mtime_ns,) if has_file else ())
+
+        cached = self._merged.get(path)
+        if not cached or cached[0] != mtimes:
+            datamodel = merge_datamodels(read_yaml(ymlfile), parent[1]) if has_file else parent[1]
+            cached = self._merged[path] = (mtimes, datamodel)
+        return cached
+
+
+# the cached datamodel trees, by root directory
+_trees = {}
+
+
+def get_tree(root=None):
+    ''' Get the cached index of a datamodel directory tree
+
+    Parameters
+    ----------
+        root : str
+            The root datamodel directory.  Defaults to $CTHREEPO_DIR/datamodel.
+
+    Returns
+    -------
+        The `DataModelTree` of the root directory
+    '''
+    root = pathlib.Path(root or os.environ['CTHREEPO_DIR'] / pathlib.Path('datamodel')).resolve()
+    if root not in _trees:
+        _trees[root] = DataModelTree(root)
+    return _trees[root]
+
+
+@timed('find_datamodels')
+def find_datamodels(path):
+    ''' find all datamodel.yaml files up to a given path and merge them '''
 
+    datamodel = get_tree().get_datamodel(path)
     validate_datamodel(datamodel)
     return datamodel
 
@@ -14,20 +14,20 @@
 from __future__ import print_function, division, absolute_import
 import six
 import abc
+import orjson
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 from io import StringIO
-from astropy.io import fits, ascii as astropy_ascii
-from astropy.table import Table
 from fuzzy_types.fuzzy import FuzzyList
 from cthreepo import log
-import matplotlib
-try:
-    from astropy.utils.diff import report_diff_values
-except ImportError:
-    report_diff_values = None
+from cthreepo.core.stats import timed
+from cthreepo.io.pool import pool
 
 
 def settex():
     ''' Configure matplotlib settings to use full latex syntax '''
+    import matplotlib
+
     usetex = matplotlib.rcParams['text.usetex']
     if not usetex:
         matplotlib.rc('text', usetex=True)
@@ -54,7 +54,7 @@ class ChangeLog(FuzzyList):
 
     def generate_report(self, split=None, insert=True):
         ''' generate a string report '''
-        full_report = [] if split else ''
+        full_report = []
         for item in self:
             lines = item.report(split=split)
             if split:
@@ -63,74 +63,208 @@ class ChangeLog(FuzzyList):
                 full_report.extend(lines)
             else:
                 if insert:
-                    full_report += '\n---------------------\n'
-                full_report += lines
-        return full_report
+                    full_report.append('\n---------------------\n')
+                full_report.append(lines)
+        return full_report if split else ''.join(full_report)
+
+    def to_dict(self):
+        ''' convert the changelog into a list of dictionaries '''
+        return [item.to_dict() for item in self]
+
+    def to_json(self, filename=None, indent=None):
+        ''' export the changelog to JSON
+
+        Parameters
+        ----------
+            filename : str
+                If set, writes the JSON to this file
+            indent : bool
+                If True, indents the JSON output
+
+        Returns
+        -------
+            the JSON bytes string
+        '''
+        option = orjson.OPT_INDENT_2 if indent else 0
+        data = orjson.dumps(self.to_dict(), option=option)
+        if filename:
+            with open(filename, 'wb') as f:
+                f.write(data)
+        return data
 
 
 class FileDiff(abc.ABC, object):
-    ''' Class that holds the difference between two files '''
+    ''' Class that holds the difference between two files
+
+    File differences are small immutable records that only hold the computed deltas,
+    and no open file handles or data, making them cheap to pickle and cache.  The
+    underlying file data can be explicitly loaded for deeper inspection with `load`.
+
+    '''
+    __slots__ = ('diff_type', 'versions', 'file1', 'file2', '_frozen')
 
     def __init__(self, file1, file2, versions=None, diff_type=None):
         self.diff_type = diff_type
-        self.versions = versions or ['A', 'B']
+        self.versions = tuple(versions or ['A', 'B'])
         self.file1 = str(file1)
         self.file2 = str(file2)
 
     def __repr__(self):
         return f"<FileDiff (versions='{','.join(self.versions)}', diff_type='{self.diff_type}')>"
 
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError(f'{self.__class__.__name__} objects are immutable')
+        super(FileDiff, self).__setattr__(name, value)
+
+    def __getstate__(self):
+        return {attr: getattr(self, attr) for cls in type(self).__mro__
+                for attr in getattr(cls, '__slots__', ()) if hasattr(self, attr)}
+
+    def __setstate__(self, state):
+        for attr, value in state.items():
+            object.__setattr__(self, attr, value)
+
+    def _freeze(self):
+        ''' make the difference object immutable '''
+        object.__setattr__(self, '_frozen', True)
+
     @abc.abstractclassmethod
     def report(self):
         ''' Print a report '''
 
+    @abc.abstractmethod
+    def load(self):
+        ''' Load the underlying file data '''
+
+    def to_dict(self):
+        ''' Convert the difference into a dictionary '''
+        return {'versions': list(self.versions), 'diff_type': self.diff_type,
+                'files': [self.file1, self.file2]}
+
 
 class FitsDiff(FileDiff):
-    ''' Difference in two FITS files '''
+    ''' Difference in two FITS files
+
+    Parameters
+    ----------
+        file1 : str
+            The first FITS file
+        file2 : str
+            The second FITS file
+        full : bool
+            If True, also computes the full astropy difference report
+        versions : list
+            The versions of the two files
+        hdus : list
+            A list of (index1, index2) pairs of HDUs to compare in the full report.
+            Defaults to comparing the entire files.
+    '''
+    __slots__ = ('delta_nhdu', 'n_hdu_diffs', 'added_hdus', 'removed_hdus', 'diff_keycount',
+                 'added_kwargs', 'removed_kwargs', 'added_cols', 'removed_cols', 'hdus',
+                 'astropy_diff')
 
-    def __init__(self, file1, file2, full=None, versions=None):
+    def __init__(self, file1, file2, full=None, versions=None, hdus=None):
         super(FitsDiff, self).__init__(file1, file2, diff_type='fits', versions=versions)
+        self.hdus = tuple(tuple(pair) for pair in hdus) if hdus is not None else None
+
+        # check the FITS files
+        self._check_fits(self.file1)
+        self._check_fits(self.file2)
+        with pool.lease(self.file1) as hdulist, pool.lease(self.file2) as hdulist2:
+            self._compare(hdulist, hdulist2)
+
+            # get the full report
+            self.astropy_diff = self._diff_hdulists(hdulist, hdulist2, self.hdus) if full else None
+        self._freeze()
 
-        # get the HDU lists
-        self.hdulist = self._check_fits(self.file1)
-        self.hdulist2 = self._check_fits(self.file2)
+    def _compare(self, hdulist, hdulist2):
+        ''' compute the HDU, primary header and column differences between two HDULists '''
 
         # HDU differences
-        n_hdus = len(self.hdulist)
-        n_hdu2s = len(self.hdulist2)
+        n_hdus = len(hdulist)
+        n_hdu2s = len(hdulist2)
         self.delta_nhdu = abs(n_hdus - n_hdu2s)
 
         self.n_hdu_diffs = (n_hdus, n_hdu2s)
-        hdu_names = [n.name for n in self.hdulist]
-        hdu2_names = [n.name for n in self.hdulist2]
+        hdu_names = [n.name for n in hdulist]
+        hdu2_names = [n.name for n in hdulist2]
 
-        self.added_hdus = list(set(hdu_names) - set(hdu2_names))
-        self.removed_hdus = list(set(hdu2_names) - set(hdu_names))
+        hdu_set, hdu2_set = set(hdu_names), set(hdu2_names)
+        self.added_hdus = tuple(n for n in hdu_names if n not in hdu2_set)
+        self.removed_hdus = tuple(n for n in hdu2_names if n not in hdu_set)
 
         # PRIMARY header differences
-        hd = fits.HDUDiff(self.hdulist['PRIMARY'], self.hdulist2['PRIMARY'],
+        from astropy.io import fits
+        hd = fits.HDUDiff(hdulist['PRIMARY'], hdulist2['PRIMARY'],
                           ignore_comments=['*'], rtol=10.0)
         self.diff_keycount = hd.diff_headers.diff_keyword_count
-        self.added_kwargs = hd.diff_headers.diff_keywords[0] if self.diff_keycount else []
-        self.removed_kwargs = hd.diff_headers.diff_keywords[1] if self.diff_keycount else []
+        self.added_kwargs = tuple(hd.diff_headers.diff_keywords[0]) if self.diff_keycount else ()
+        self.removed_kwargs = tuple(hd.diff_headers.diff_keywords[1]) if self.diff_keycount else ()
 
-        # get the full report
-        self.astropy_diff = self.get_astropy_diff() if full else None
+        # table column differences
+        col_names = self._get_columns(hdulist)
+        col2_names = self._get_columns(hdulist2)
+        col_set, col2_set = set(col_names), set(col2_names)
+        self.added_cols = tuple(c for c in col_names if c not in col2_set)
+        self.removed_cols = tuple(c for c in col2_names if c not in col_set)
 
     @staticmethod
     def _check_fits(data):
-        ''' Check the input for proper FITS file name or object '''
-        if not isinstance(data, fits.hdu.hdulist.HDUList):
-            assert isinstance(
-                data, six.string_types), 'input must be string filename or a FITS HDUList '
-            assert '.fits' in data, 'No .fits suffix found.  Is this a proper FITS file?'
-            data = fits.open(data)
+        ''' Check the input for proper FITS file name '''
+        assert isinstance(data, six.string_types), 'input must be string filename'
+        assert '.fits' in data, 'No .fits suffix found.  Is this a proper FITS file?'
         return data
 
+    @staticmethod
+    def _get_columns(hdulist):
+        ''' Get the list of HDU.COLUMN names of all table extensions '''
+        return [f'{ext.name}.{col.name}' for ext in hdulist if not ext.is_image
+                for col in ext.columns]
+
+    def load(self):
+        ''' Open the two FITS files
+
+        The HDULists are opened outside of the shared file handle pool, so they are
+        owned, and must be closed, by the caller.
+        '''
+        from astropy.io import fits
+
+        return fits.open(self.file1), fits.open(self.file2)
+
+    @staticmethod
+    def _diff_hdulists(hdulist, hdulist2, hdus=None):
+        ''' Compute the astropy difference report between two HDULists, or some of their HDUs '''
+        from astropy.io import fits
+
+        if hdus is None:
+            return fits.FITSDiff(hdulist, hdulist2).report()
+
+        report = ''
+        for index, index2 in hdus:
+            diff = fits.HDUDiff(hdulist[index], hdulist2[index2])
+            if not diff.identical:
+                report += f'\nHDU {index} ({hdulist[index].name}) vs HDU {index2} '
+                report += f'({hdulist2[index2].name}):\n{diff.report()}'
+        return report
+
     def get_astropy_diff(self):
-        return fits.FITSDiff(self.hdulist, self.hdulist2)
+        ''' Compute the full astropy FITS difference report '''
+        with pool.lease(self.file1) as hdulist, pool.lease(self.file2) as hdulist2:
+            return self._diff_hdulists(hdulist, hdulist2, getattr(self, 'hdus', None))
+
+    def to_dict(self):
+        ''' Convert the FITS difference into a dictionary '''
+        data = super(FitsDiff, self).to_dict()
+        data.update({'n_hdus': list(self.n_hdu_diffs), 'added_hdus': list(self.added_hdus),
+                     'removed_hdus': list(self.removed_hdus),
+                     'added_keywords': list(self.added_kwargs),
+                     'removed_keywords': list(self.removed_kwargs),
+                     'added_columns': list(self.added_cols),
+                     'removed_columns': list(self.removed_cols)})
+        return data
 
-    def report(self, split=None):
+    def report(self, split=None, full=None):
         ''' Print the FITS Difference report '''
 
         diffreport = 'Version: {0} to {1}\n'.format(*self.versions)
@@ -148,8 +282,8 @@ class FitsDiff(FileDiff):
             diffreport += 'Removed Keywords: {0}\n'.format(', '.join(self.removed_kwargs))
 
         # print the Astropy FITS difference report
-        if self.astropy_diff:
-            fullreport = self.astropy_diff.report()
+        if self.astropy_diff or full:
+            fullreport = self.astropy_diff or self.get_astropy_diff()
             diffreport += '\nFull Report:\n'
             diffreport += fullreport
 
@@ -162,33 +296,39 @@ class FitsDiff(FileDiff):
 
 class CatalogDiff(FileDiff):
     ''' Difference between two catalog files '''
+    __slots__ = ('delta_rows', 'n_row_diffs', 'delta_cols', 'added_cols', 'removed_cols',
+                 'astropy_diff')
 
     def __init__(self, file1, file2, full=None, versions=None):
         super(CatalogDiff, self).__init__(file1, file2, diff_type='catalog', versions=versions)
 
         # get the catalog tables
-        self.table = self._check_catalog(self.file1)
-        self.table2 = self._check_catalog(self.file2)
+        table, table2 = self.load()
 
         # Table row differences
-        n_rows = len(self.table)
-        n_row2s = len(self.table2)
+        n_rows = len(table)
+        n_row2s = len(table2)
         self.delta_rows = abs(n_rows - n_row2s)
         self.n_row_diffs = (n_rows, n_row2s)
 
         # Table column differences
-        col_names = self.table.colnames
-        col2_names = self.table2.colnames
-        self.delta_cols = len(set(col_names) ^ set(col2_names))
-        self.added_cols = list(set(col_names) - set(col2_names))
-        self.removed_cols = list(set(col2_names) - set(col_names))
+        col_names = table.colnames
+        col2_names = table2.colnames
+        col_set, col2_set = set(col_names), set(col2_names)
+        self.delta_cols = len(col_set ^ col2_set)
+        self.added_cols = tuple(c for c in col_names if c not in col2_set)
+        self.removed_cols = tuple(c for c in col2_names if c not in col_set)
 
         # get the full report
-        self.astropy_diff = self.get_astropy_diff() if full else None
+        self.astropy_diff = self._diff_tables(table, table2) if full else None
+        self._freeze()
 
     @staticmethod
     def _check_catalog(data):
         ''' Check the input for proper Catalog file name or object '''
+        from astropy.io import ascii as astropy_ascii
+        from astropy.table import Table
+
         if not isinstance(data, Table):
             assert isinstance(
                 data, six.string_types), 'input must be string filename or a Table '
@@ -196,17 +336,39 @@ class CatalogDiff(FileDiff):
             data = astropy_ascii.read(data)
         return data
 
-    def get_astropy_diff(self):
+    def load(self):
+        ''' Load the two catalog tables '''
+        return self._check_catalog(self.file1), self._check_catalog(self.file2)
+
+    @staticmethod
+    def _diff_tables(table, table2):
+        ''' Compute the astropy difference report between two tables '''
+        try:
+            from astropy.utils.diff import report_diff_values
+        except ImportError:
+            report_diff_values = None
+
         report = None
         if report_diff_values:
             s = StringIO()
-            same = report_diff_values(self.table, self.table2, s)
+            same = report_diff_values(table, table2, s)
             if not same:
                 s.seek(0)
                 report = ''.join(s.readlines())
                 s.close()
         return report
 
+    def get_astropy_diff(self):
+        ''' Compute the full astropy Table difference report '''
+        return self._diff_tables(*self.load())
+
+    def to_dict(self):
+        ''' Convert the catalog difference into a dictionary '''
+        data = super(CatalogDiff, self).to_dict()
+        data.update({'n_rows': list(self.n_row_diffs), 'added_columns': list(self.added_cols),
+                     'removed_columns': list(self.removed_cols)})
+        return data
+
     def report(self, split=None, full=None):
         ''' Print the Catalog Different report '''
 
@@ -221,7 +383,7 @@ class CatalogDiff(FileDiff):
 
         # print the Astropy Table difference report
         if self.astropy_diff or full:
-            fullreport = self.astropy_diff or self.get_astropy_diff()
+            fullreport = self.astropy_diff or self.get_astropy_diff() or ''
             diffreport += '\nFull Report:\n'
             diffreport += fullreport
 
@@ -232,8 +394,13 @@ class CatalogDiff(FileDiff):
         return diffreport
 
 
-def compute_diff(oldfile, otherfile, change='fits', versions=None):
-    ''' new changelog - produce a single changelog between two files '''
+@timed('compute_diff')
+def compute_diff(oldfile, otherfile, change='fits', versions=None, full=None, hdus=None):
+    ''' new changelog - produce a single changelog between two files
+
+    For FITS files, ``hdus`` optionally restricts the full report to a list of
+    (index1, index2) pairs of HDUs.
+    '''
 
     import pathlib
 
@@ -252,24 +419,87 @@ def compute_diff(oldfile, otherfile, change='fits', versions=None):
         diffobj = CatalogDiff
 
     # compute file difference
-    fd = diffobj(name, other_name, versions=versions)
+    kwargs = {'hdus': hdus} if change == 'fits' else {}
+    fd = diffobj(name, other_name, versions=versions, full=full, **kwargs)
 
     return fd
 
 
-def compute_changelog(items, change=None):
-    zipped = list(zip(items[:-1], items[1:]))
-    fds = []
-    for item in zipped:
-        v1 = str(item[0].version)
-        v2 = str(item[1].version)
-        exist1 = item[0].file_exists
-        exist2 = item[1].file_exists
+def _compute_pair(pair):
+    ''' compute the difference for a (file1, file2, versions, change) pair '''
+    file1, file2, versions, change = pair
+    return compute_diff(file1, file2, versions=versions, change=change)
+
+
+def iter_changelog(items, change=None, jobs=None, cache=None):
+    ''' Generate the changelog between consecutive files, one difference at a time
+
+    Yields each file difference as soon as it is computed, so a consumer can
+    display or write the changelog incrementally.
+
+    Parameters
+    ----------
+        items : list
+            A list of expanded product file objects
+        change : str
+            The type of file, either "fits" or "catalog"
+        jobs : int
+            The number of worker processes used to compute differences.  Default is serial.
+        cache : `DiskCache`
+            A persistent cache of previously computed differences
+
+    Yields
+    ------
+        a `FileDiff` for each consecutive pair of existing files
+    '''
+    pairs = []
+    for first, second in zip(items[:-1], items[1:]):
+        v1 = str(first.version)
+        v2 = str(second.version)
+        exist1 = first.file_exists
+        exist2 = second.file_exists
         if exist1 and exist2:
-            fds.append(compute_diff(str(item[0].fullpath), str(
-                item[1].fullpath), versions=[v1, v2], change=change))
+            pairs.append((str(first.fullpath), str(second.fullpath), [v1, v2], change))
         else:
             log.warning('One or more files does not exist.  Cannot compute changelog '
                         f'for this changeset. Version {v1}: exists={exist1}; '
                         f'Version {v2}: exists={exist2}')
-    return ChangeLog(fds)
+
+    # look up any cached differences
+    keys = [cache.file_key(f1, f2, versions=v, change=c) if cache else None
+            for f1, f2, v, c in pairs]
+    cached = [cache.get(key) if cache else None for key in keys]
+    todo = [pair for pair, diff in zip(pairs, cached) if diff is None]
+
+    with ProcessPoolExecutor(max_workers=jobs) if jobs and jobs > 1 else nullcontext() as executor:
+        results = executor.map(_compute_pair, todo) if executor else map(_compute_pair, todo)
+        for key, diff in zip(keys, cached):
+            if diff is None:
+                diff = next(results)
+                if cache:
+                    cache.set(key, diff)
+            yield diff
+
+
+def compute_changelog(items, change=None, stream=None, jobs=None, cache=None):
+    ''' Compute the changelog between consecutive files
+
+    Parameters
+    ----------
+        items : list
+            A list of expanded product file objects
+        change : str
+            The type of file, either "fits" or "catalog"
+        stream : bool
+            If True, returns a generator of file differences instead of a `ChangeLog`
+        jobs : int
+            The number of worker processes used to compute differences.  Default is serial.
+        cache : `DiskCache`
+            A persistent cache of previously computed differences
+
+    Returns
+    -------
+        a `ChangeLog`, or a generator of `FileDiff`
+    '''
+    diffs = iter_changelog(items, change=change, jobs=jobs, cache=cache)
+    return diffs if stream else ChangeLog(list(diffs))
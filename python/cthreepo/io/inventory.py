@@ -0,0 +1,267 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Filename: inventory.py
+# Project: io
+# Author: Brian Cherinka
+# Created: Monday, 19th October 2026 5:31:52 pm
+# License: BSD 3-clause "New" or "Revised" License
+# Copyright (c) 2026 Brian Cherinka
+# Last Modified: Monday, 19th October 2026 5:31:52 pm
+# Modified By: Brian Cherinka
+
+
+from __future__ import print_function, division, absolute_import
+import os
+import re
+import pathlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+
+from cthreepo import log
+
+InventoryFile = namedtuple('InventoryFile', ['path', 'kwargs', 'size', 'mtime'])
+
+_field = re.compile(r'\{(\w+)(?::([^}]*))?\}')
+_special_fxn = re.compile(r'\@\w+[|]')
+_compressions = r'(?:\.gz|\.bz2|\.zip|\.fz)'
+
+
+def _literal(text):
+    ''' escape a literal template segment, matching any special function as a wildcard '''
+    parts = _special_fxn.split(text)
+    return r'[^/]+?'.join(re.escape(p) for p in parts)
+
+
+def template_pattern(template, prefix='', compressed=False):
+    ''' Convert a path template into a regex pattern string
+
+    Each template keyword becomes a named group, and repeated keywords must match
+    the same value.
+
+    Parameters
+    ----------
+        template : str
+            A path template, or a component of one
+        prefix : str
+            A prefix added to each group name, to combine several patterns into one regex
+        compressed : bool
+            If True, matches with or without a compression suffix
+
+    Returns
+    -------
+        A regex pattern string
+    '''
+    if compressed:
+        template = re.sub(_compressions + '$', '', template)
+
+    pattern = ''
+    seen = set()
+    pos = 0
+    for match in _field.finditer(template):
+        pattern += _literal(template[pos:match.start()])
+        key, spec = match.groups()
+        if key in seen:
+            pattern += f'(?P={prefix}{key})'
+        else:
+            seen.add(key)
+            value = r'\d+' if spec and spec.endswith('d') else r'[^/]+?'
+            pattern += f'(?P<{prefix}{key}>{value})'
+        pos = match.end()
+    pattern += _literal(template[pos:])
+    if compressed:
+        pattern += _compressions + '?'
+    return pattern
+
+
+def compile_component(component, last=False):
+    ''' Compile a path template component into a regex
+
+    The final filename component matches with or without a compression suffix.
+
+    Parameters
+    ----------
+        component : str
+            A single directory or filename component of a path template
+        last : bool
+            If True, the component is the filename
+
+    Returns
+    -------
+        A compiled regex, or None if the component is a plain literal
+    '''
+    if not last and '{' not in component and not _special_fxn.search(component):
+        return None
+    return re.compile(template_pattern(component, compressed=last))
+
+
+def _convert(value):
+    ''' convert a parsed keyword value into an int, if possible '''
+    return int(value) if value.isdigit() else value
+
+
+class InventoryScanner(object):
+    ''' Scan the filesystem for all existing files of an sdss_access path template
+
+    The release template is split into directory components, each compiled into a
+    regex.  Only directories matching each component are walked, with the directories
+    at each level listed in parallel with `os.scandir`.  The keyword values are parsed
+    back out of each matching path.
+
+    With a manifest file, the listing and the file sizes and modification times of each
+    directory are persisted.  Directories whose modification time is unchanged are not
+    listed again on a re-scan, making repeated scans incremental.  Files modified in place,
+    without changing their directory, are only picked up by a refresh.
+
+    Parameters
+    ----------
+        name : str
+            The sdss_access path name, or a "survey:product" datamodel product
+        release : str
+            The data release
+        manifest : str
+            The filepath of an optional JSON scan manifest
+        jobs : int
+            The number of threads used to list directories.  Default is 8.
+        template : str
+            An explicit path template, used instead of the release template
+    '''
+
+    def __init__(self, name, release, manifest=None, jobs=None, template=None):
+        from cthreepo.core.paths import resolver
+
+        self.name = resolver.get_product(name)[0] if ':' in name else name
+        self.release = str(release)
+        self.template = template or resolver.get_release(release).templates[self.name]
+        self.manifest = pathlib.Path(manifest) if manifest else None
+        self.jobs = jobs or 8
+        self.root, self.components = self._split_template(self.template)
+        self._entries = {}
+        self._scanned = {}
+
+    def __repr__(self):
+        return f"<InventoryScanner(name='{self.name}', release='{self.release}')>"
+
+    @staticmethod
+    def _split_template(template):
+        ''' split a template into its literal root directory and compiled components '''
+        parts = pathlib.PurePosixPath(os.path.normpath(template)).parts
+        compiled = [compile_component(p, last=i == len(parts) - 1) for i, p in enumerate(parts)]
+        start = next((i for i, c in enumerate(compiled) if c is not None), len(parts))
+        root = os.path.join(*parts[:start]) if start else os.sep
+        components = [(part, regex) for part, regex in zip(parts[start:], compiled[start:])]
+        return root, components
+
+    def _load_manifest(self):
+        ''' load the directory listings of a previous scan '''
+        self._entries = {}
+        if self.manifest and self.manifest.exists():
+            with open(self.manifest, 'rb') as f:
+                data = orjson.loads(f.read())
+            if data.get('template') == self.template:
+                self._entries = data.get('dirs', {})
+
+    def _write_manifest(self):
+        ''' persist the directory listings of this scan '''
+        self.manifest.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest, 'wb') as f:
+            f.write(orjson.dumps({'name': self.name, 'release': self.release,
+                                  'template': self.template, 'dirs': self._scanned}))
+
+    def _list_dir(self, dirpath, regex, last):
+        ''' list the matching subdirectories or files of a directory '''
+        try:
+            mtime = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            return []
+
+        entry = self._entries.get(dirpath)
+        if not entry or entry['mtime'] != mtime:
+            dirs, files = [], {}
+            with os.scandir(dirpath) as it:
+                for item in it:
+                    if last and item.is_file() and regex.fullmatch(item.name):
+                        stat = item.stat()
+                        files[item.name] = [stat.st_size, stat.st_mtime_ns]
+                    elif not last and item.is_dir() and regex.fullmatch(item.name):
+                        dirs.append(item.name)
+            entry = {'mtime': mtime, 'dirs': dirs, 'files': files}
+        self._scanned[dirpath] = entry
+        return sorted(entry['files'].items()) if last else sorted(entry['dirs'])
+
+    def _match_dir(self, item, regex, last):
+        ''' match the contents of a directory against a template component '''
+        dirpath, kwargs = item
+        matched = []
+        for name in self._list_dir(dirpath, regex, last):
+            value = name[0] if last else name
+            parsed = {k: _convert(v) for k, v in regex.fullmatch(value).groupdict().items()}
+            # keywords repeated across components must agree
+            if any(kwargs.get(k, v) != v for k, v in parsed.items()):
+                continue
+            matched.append((os.path.join(dirpath, value), dict(kwargs, **parsed),
+                            name[1] if last else None))
+        return matched
+
+    def scan(self, refresh=None):
+        ''' Scan for all existing files
+
+        Parameters
+        ----------
+            refresh : bool
+                If True, ignores any manifest and lists all directories again
+
+        Yields
+        ------
+            an `InventoryFile` of path, kwargs, size and mtime for each existing file
+        '''
+        if not refresh:
+            self._load_manifest()
+        self._scanned = {}
+
+        level = [(self.root, {})] if os.path.isdir(self.root) else []
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            for i, (part, regex) in enumerate(self.components):
+                last = i == len(self.components) - 1
+                if regex is None:
+                    level = [(os.path.join(d, part), kw) for d, kw in level
+                             if os.path.isdir(os.path.join(d, part))]
+                    continue
+
+                results = executor.map(lambda item: self._match_dir(item, regex, last), level)
+                if not last:
+                    level = [(path, kw) for matched in results for path, kw, __ in matched]
+                    continue
+
+                for matched in results:
+                    for path, kwargs, (size, mtime) in matched:
+                        yield InventoryFile(path, kwargs, size, mtime)
+
+        if self.manifest:
+            self._write_manifest()
+        log.debug(f'Scanned {len(self._scanned)} directories for {self.name} in {self.release}')
+
+
+def scan_inventory(name, release, manifest=None, jobs=None, refresh=None):
+    ''' Scan the filesystem for all existing files of a product and release
+
+    Parameters
+    ----------
+        name : str
+            The sdss_access path name, or a "survey:product" datamodel product
+        release : str
+            The data release
+        manifest : str
+            The filepath of an optional JSON scan manifest, for incremental re-scans
+        jobs : int
+            The number of threads used to list directories
+        refresh : bool
+            If True, ignores any manifest and lists all directories again
+
+    Yields
+    ------
+        an `InventoryFile` for each existing file
+    '''
+    return InventoryScanner(name, release, manifest=manifest, jobs=jobs).scan(refresh=refresh)
@@ -0,0 +1,200 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Filename: manifest.py
+# Project: io
+# Author: Brian Cherinka
+# Created: Monday, 19th October 2026 6:20:33 pm
+# License: BSD 3-clause "New" or "Revised" License
+# Copyright (c) 2026 Brian Cherinka
+# Last Modified: Monday, 19th October 2026 6:20:33 pm
+# Modified By: Brian Cherinka
+
+
+from __future__ import print_function, division, absolute_import
+import os
+import csv
+import pathlib
+import sqlite3
+import threading
+from collections import namedtuple
+
+from cthreepo import log
+
+ManifestEntry = namedtuple('ManifestEntry', ['path', 'size', 'mtime', 'checksum'])
+
+
+def _to_number(value):
+    ''' convert a manifest column value into a number, if set '''
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+class FileManifest(object):
+    ''' A published manifest of the files on the SAS
+
+    Reads a manifest of file path, size, modification time and checksum, either from
+    a CSV file with those column names, or from a SQLite database with a table of those
+    columns.  Relative paths are taken relative to the manifest root.  A CSV manifest is
+    loaded into memory, while a SQLite manifest is queried for each lookup.
+
+    The manifest is authoritative for every path under its root: a file not listed in
+    the manifest is considered not to exist.
+
+    Parameters
+    ----------
+        filename : str
+            The manifest file, either a .csv file or a SQLite database
+        root : str
+            The root directory of the manifest paths.  Defaults to $SAS_BASE_DIR.
+        table : str
+            The SQLite table name.  Default is "files".
+    '''
+
+    def __init__(self, filename, root=None, table='files'):
+        self.filename = pathlib.Path(filename)
+        root = root or os.getenv('SAS_BASE_DIR', os.sep)
+        self.root = os.path.normpath(os.path.expandvars(str(root)))
+        self.table = table
+        self._entries = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+        if self.filename.suffix.lower() == '.csv':
+            self._entries = self._read_csv()
+        else:
+            self._conn = sqlite3.connect(str(self.filename), check_same_thread=False)
+
+    def __repr__(self):
+        return f"<FileManifest(filename='{self.filename}', root='{self.root}')>"
+
+    def __contains__(self, path):
+        return self.get(path) is not None
+
+    def __len__(self):
+        if self._entries is not None:
+            return len(self._entries)
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+    def _relative(self, path):
+        ''' get a path relative to the manifest root '''
+        return os.path.relpath(os.path.normpath(str(path)), self.root)
+
+    def _read_csv(self):
+        ''' read all entries of a CSV manifest, keyed by relative path '''
+        entries = {}
+        with open(self.filename, newline='') as f:
+            for row in csv.DictReader(f):
+                path = row['path']
+                if os.path.isabs(path):
+                    path = self._relative(path)
+                entries[os.path.normpath(path)] = ManifestEntry(
+                    path, _to_number(row.get('size')), _to_number(row.get('mtime')),
+                    row.get('checksum') or None)
+        log.debug(f'Loaded {len(entries)} entries from manifest {self.filename}')
+        return entries
+
+    def covers(self, path):
+        ''' Check if a path is under the manifest root '''
+        relpath = self._relative(path)
+        return relpath != os.pardir and not relpath.startswith(os.pardir + os.sep)
+
+    def get(self, path):
+        ''' Get the manifest entry of a file
+
+        Parameters
+        ----------
+            path : str
+                The full path to the file
+
+        Returns
+        -------
+            A `ManifestEntry` of path, size, mtime and checksum, or None if not listed
+        '''
+        relpath = self._relative(path)
+        if self._entries is not None:
+            return self._entries.get(relpath, None)
+
+        with self._lock:
+            row = self._conn.execute(f'SELECT path, size, mtime, checksum FROM {self.table} '
+                                     'WHERE path IN (?, ?)',
+                                     (relpath, os.path.join(self.root, relpath))).fetchone()
+        return ManifestEntry(*row) if row else None
+
+    def close(self):
+        ''' Close any SQLite connection '''
+        if self._conn is not None:
+            self._conn.close()
+
+
+# the active file manifest
+manifest = None
+
+
+def set_manifest(filename=None, root=None, table='files'):
+    ''' Set the active file manifest used for existence checks and fingerprints
+
+    Parameters
+    ----------
+        filename : str
+            The manifest file, either a .csv file or a SQLite database.  If None,
+            removes the active manifest and checks the filesystem directly.
+        root : str
+            The root directory of the manifest paths.  Defaults to $SAS_BASE_DIR.
+        table : str
+            The SQLite table name.  Default is "files".
+
+    Returns
+    -------
+        The active `FileManifest`, or None
+    '''
+    global manifest
+    if manifest is not None:
+        manifest.close()
+    manifest = FileManifest(filename, root=root, table=table) if filename else None
+    return manifest
+
+
+def init_worker(filename=None):
+    ''' Set the active file manifest in a worker process
+
+    Used as a process pool initializer, so workers started with the spawn or forkserver
+    methods use the same manifest as the parent process.
+
+    Parameters
+    ----------
+        filename : str
+            The manifest file.  If None, keeps any manifest inherited by the worker.
+    '''
+    if filename:
+        set_manifest(filename)
+
+
+def get_entry(path):
+    ''' Get the active manifest entry of a file, or None if no manifest covers it '''
+    if manifest is None or not manifest.covers(path):
+        return None
+    return manifest.get(path)
+
+
+def file_exists(path):
+    ''' Check if a file exists, using the active manifest when it covers the path
+
+    Returns
+    -------
+        True or False when the active manifest covers the path, otherwise None
+    '''
+    if manifest is None or not manifest.covers(path):
+        return None
+    return manifest.get(path) is not None
+
+
+def is_file(path):
+    ''' Check if a file exists, using the active manifest before the filesystem '''
+    exists = file_exists(path)
+    return os.path.isfile(path) if exists is None else exists
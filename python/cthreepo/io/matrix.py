@@ -0,0 +1,508 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Filename: matrix.py
+# Project: io
+# Author: Brian Cherinka
+# Created: Monday, 19th October 2026 9:12:40 am
+# License: BSD 3-clause "New" or "Revised" License
+# Copyright (c) 2026 Brian Cherinka
+# Last Modified: Monday, 19th October 2026 9:12:40 am
+# Modified By: Brian Cherinka
+
+
+from __future__ import print_function, division, absolute_import
+import re
+import zlib
+import itertools
+from collections import Counter, namedtuple
+import numpy as np
+from cthreepo import log
+from cthreepo.io.general import compute_diff
+from cthreepo.io.manifest import get_entry
+
+
+# header keywords that can repeat and are not useful to track
+IGNORED_KEYWORDS = ('', 'COMMENT', 'HISTORY')
+
+# header keywords that change whenever the file is rewritten
+CHECKSUM_KEYWORDS = ('CHECKSUM', 'DATASUM')
+
+# the TFORM of a variable-length array column, e.g. PJ(5) or 1QD
+_vla_format = re.compile(r'^\d*[PQ]')
+
+
+def _hash_value(value) -> int:
+    ''' Hash a value into a stable integer
+
+    Uses a CRC32 checksum of the value representation, so the hash
+    is stable across processes, unlike the builtin ``hash``.
+
+    Parameters
+    ----------
+        value : object
+            Any value with a meaningful repr
+
+    Returns
+    -------
+        an integer hash
+    '''
+    return zlib.crc32(repr(value).encode('utf-8'))
+
+
+class PresenceMatrix(object):
+    ''' A name x version presence matrix
+
+    Holds a boolean matrix indicating whether a named item, e.g. a header keyword,
+    HDU or table column, is present in a given version, along with an integer matrix
+    of value hashes, which can be used to find items whose value changed between versions.
+
+    Parameters
+    ----------
+        names : list
+            The list of item names, i.e. the matrix rows
+        versions : list
+            The list of versions, i.e. the matrix columns
+        present : np.ndarray
+            A boolean array of shape (n_names, n_versions)
+        values : np.ndarray
+            An integer array of value hashes of shape (n_names, n_versions)
+    '''
+
+    def __init__(self, names, versions, present, values=None):
+        self.names = np.array(names, dtype=object)
+        self.versions = np.array(versions, dtype=object)
+        self.present = np.asarray(present, dtype=bool)
+        self.values = np.zeros(self.present.shape, dtype=np.int64) if values is None else values
+        self._name_idx = {name: i for i, name in enumerate(names)}
+        self._ver_idx = {str(ver): i for i, ver in enumerate(versions)}
+
+    def __repr__(self):
+        return f'<PresenceMatrix(n_names={len(self.names)}, n_versions={len(self.versions)})>'
+
+    def __contains__(self, name):
+        return name in self._name_idx
+
+    @classmethod
+    def from_records(cls, records, versions):
+        ''' Create a matrix from a list of name:hash dictionaries, one per version '''
+        names = list(dict.fromkeys(name for record in records for name in record))
+        idx = {name: i for i, name in enumerate(names)}
+        present = np.zeros((len(names), len(versions)), dtype=bool)
+        values = np.zeros((len(names), len(versions)), dtype=np.int64)
+        for col, record in enumerate(records):
+            rows = [idx[name] for name in record]
+            present[rows, col] = True
+            values[rows, col] = list(record.values())
+        return cls(names, versions, present, values=values)
+
+    def _row(self, name):
+        if name not in self._name_idx:
+            raise KeyError(f'{name} not found in matrix')
+        return self._name_idx[name]
+
+    def _col(self, version):
+        version = str(version)
+        if version not in self._ver_idx:
+            raise KeyError(f'version {version} not found in matrix')
+        return self._ver_idx[version]
+
+    def versions_with(self, name):
+        ''' Return the list of versions containing the named item '''
+        return self.versions[self.present[self._row(name)]].tolist()
+
+    def names_in(self, version):
+        ''' Return the list of names present in a given version '''
+        return self.names[self.present[:, self._col(version)]].tolist()
+
+    def first_seen(self, name):
+        ''' Return the first version containing the named item '''
+        versions = self.versions_with(name)
+        return versions[0] if versions else None
+
+    def last_seen(self, name):
+        ''' Return the last version containing the named item '''
+        versions = self.versions_with(name)
+        return versions[-1] if versions else None
+
+    def common(self):
+        ''' Return the names present in all versions '''
+        return self.names[self.present.all(axis=1)].tolist()
+
+    def added(self, version1, version2):
+        ''' Return the names present in version2 but not in version1 '''
+        c1, c2 = self._col(version1), self._col(version2)
+        return self.names[~self.present[:, c1] & self.present[:, c2]].tolist()
+
+    def removed(self, version1, version2):
+        ''' Return the names present in version1 but not in version2 '''
+        return self.added(version2, version1)
+
+    def changed(self, version1, version2):
+        ''' Return the names present in both versions but with different values '''
+        c1, c2 = self._col(version1), self._col(version2)
+        both = self.present[:, c1] & self.present[:, c2]
+        return self.names[both & (self.values[:, c1] != self.values[:, c2])].tolist()
+
+
+class VersionMatrix(object):
+    ''' N-way presence matrices for all versions of a product
+
+    Contains a `PresenceMatrix` for the primary header keywords, the HDUs
+    and the table columns of a product, across all of its versions.
+
+    Parameters
+    ----------
+        versions : list
+            The list of versions
+        keywords : PresenceMatrix
+            The primary header keyword matrix
+        hdus : PresenceMatrix
+            The HDU matrix
+        columns : PresenceMatrix
+            The table column matrix
+    '''
+
+    def __init__(self, versions, keywords=None, hdus=None, columns=None):
+        self.versions = [str(v) for v in versions]
+        self.keywords = keywords
+        self.hdus = hdus
+        self.columns = columns
+
+    def __repr__(self):
+        return f"<VersionMatrix(versions='{','.join(self.versions)}')>"
+
+    @property
+    def matrices(self):
+        return {name: getattr(self, name) for name in ('keywords', 'hdus', 'columns')
+                if getattr(self, name) is not None}
+
+    def find(self, name):
+        ''' Find the versions containing a keyword, HDU or column name
+
+        Parameters
+        ----------
+            name : str
+                The name of a keyword, HDU or table column
+
+        Returns
+        -------
+            A dictionary of matrix name to list of versions containing the name
+        '''
+        name = name.upper()
+        return {key: matrix.versions_with(name) for key, matrix in self.matrices.items()
+                if name in matrix}
+
+
+def _hdu_labels(names):
+    ''' Label each HDU by its name, adding its index when the name is empty or repeated
+
+    Parameters
+    ----------
+        names : list
+            The HDU names of a file, in order
+
+    Returns
+    -------
+        A list of unique HDU labels, e.g. "FLUX" or "HDU[2]"
+    '''
+    counts = Counter(names)
+    return [name if name and counts[name] == 1 else f'{name or "HDU"}[{index}]'
+            for index, name in enumerate(names)]
+
+
+def _read_fits_layout(filename):
+    ''' Read the header keywords, HDUs and columns of a FITS file in one pass '''
+    from astropy.io import fits
+
+    keywords, hdus, columns = {}, {}, {}
+    with fits.open(filename) as hdulist:
+        labels = _hdu_labels([ext.name for ext in hdulist])
+        for label, ext in zip(labels, hdulist):
+            header = ext.header
+            if ext is hdulist[0]:
+                keywords = {key: _hash_value(header[key]) for key in header
+                            if key not in IGNORED_KEYWORDS}
+
+            # structure of the HDU
+            naxes = tuple(header.get(f'NAXIS{i + 1}', 0) for i in range(header.get('NAXIS', 0)))
+            hdus[label] = _hash_value((ext.__class__.__name__, header.get('BITPIX'), naxes))
+
+            # table columns
+            if not ext.is_image:
+                for col in ext.columns:
+                    columns[f'{label}.{col.name}'.upper()] = _hash_value((col.format, col.unit))
+    return keywords, hdus, columns
+
+
+def _read_catalog_layout(filename):
+    ''' Read the columns of a catalog file '''
+    from astropy.io import ascii as astropy_ascii
+
+    table = astropy_ascii.read(filename)
+    columns = {name.upper(): _hash_value(str(table[name].dtype)) for name in table.colnames}
+    return {}, {}, columns
+
+
+def compute_matrix(items, change=None):
+    ''' Compute an N-way version matrix for a list of files
+
+    Reads each file exactly once, and builds presence matrices for header
+    keywords, HDUs and table columns across all files.
+
+    Parameters
+    ----------
+        items : list
+            A list of expanded product file objects
+        change : str
+            The type of file, either "fits" or "catalog"
+
+    Returns
+    -------
+        A `VersionMatrix`
+    '''
+
+    reader = _read_catalog_layout if change == 'catalog' else _read_fits_layout
+
+    versions = []
+    records = ([], [], [])
+    for item in items:
+        if not item.file_exists:
+            log.warning(f'File for version {item.version} does not exist. '
+                        'Excluding it from the version matrix.')
+            continue
+        versions.append(str(item.version))
+        for record, layout in zip(records, reader(str(item.fullpath))):
+            record.append(layout)
+
+    keywords, hdus, columns = (PresenceMatrix.from_records(r, versions) for r in records)
+    if change == 'catalog':
+        return VersionMatrix(versions, columns=columns)
+    return VersionMatrix(versions, keywords=keywords, hdus=hdus, columns=columns)
+
+
+HDUFingerprint = namedtuple('HDUFingerprint', ['header', 'structure', 'data'])
+
+
+def _hash_array(data, crc: int = 0) -> int:
+    ''' Compute a CRC32 checksum of an array buffer
+
+    Object arrays, such as the variable-length array columns of a FITS table,
+    are checksummed element by element.
+    '''
+    if data is None:
+        return crc
+    data = np.asarray(data)
+    if data.dtype == object:
+        for item in data.flat:
+            crc = _hash_array(item, crc)
+        return crc
+    return zlib.crc32(memoryview(np.ascontiguousarray(data)).cast('B'), crc)
+
+
+def _hash_hdu_data(ext) -> int:
+    ''' Compute a CRC32 checksum of the data of an HDU
+
+    The rows of a table with variable-length array (P or Q format) columns only hold
+    descriptors into the heap, so such tables are checksummed column by column.
+    '''
+    data = ext.data
+    if data is None or ext.is_image:
+        return _hash_array(data)
+    if not any(_vla_format.match(str(c.format)) for c in ext.columns):
+        return _hash_array(data)
+    crc = 0
+    for name in ext.columns.names:
+        crc = _hash_array(data.field(name), crc)
+    return crc
+
+
+def _fingerprint_fits(filename):
+    ''' Compute the fingerprint of each HDU in a FITS file, keyed by (index, name) '''
+    from astropy.io import fits
+
+    hdus = {}
+    with fits.open(filename) as hdulist:
+        for index, ext in enumerate(hdulist):
+            header = ext.header
+            cards = [str(card) for card in header.cards if card.keyword not in CHECKSUM_KEYWORDS]
+            naxes = tuple(header.get(f'NAXIS{i + 1}', 0) for i in range(header.get('NAXIS', 0)))
+            columns = tuple((c.name, c.format) for c in ext.columns) if not ext.is_image else ()
+            structure = (ext.__class__.__name__, header.get('BITPIX'), naxes, columns)
+            # use the recorded data checksum when available
+            datasum = header.get('DATASUM', None)
+            data = _hash_value(datasum) if datasum else _hash_hdu_data(ext)
+            hdus[(index, ext.name)] = HDUFingerprint(_hash_value(cards), _hash_value(structure),
+                                                     data)
+    return hdus
+
+
+def _fingerprint_catalog(filename):
+    ''' Compute the fingerprint of a catalog file, as a single TABLE HDU '''
+    from astropy.io import ascii as astropy_ascii
+
+    table = astropy_ascii.read(filename)
+    structure = [(name, str(table[name].dtype)) for name in table.colnames]
+    return {(0, 'TABLE'): HDUFingerprint(_hash_value(table.colnames), _hash_value(structure),
+                                         _hash_array(table.as_array()))}
+
+
+def _label_hdus(fingerprint):
+    ''' map the unique label of each HDU of a fingerprint to its (index, name) key '''
+    return dict(zip(_hdu_labels([name for __, name in fingerprint]), fingerprint))
+
+
+class DiffMatrix(object):
+    ''' An all-pairs difference matrix between versions of a product
+
+    Computes a fingerprint for each version's file exactly once, containing a header hash,
+    a structure hash and a data checksum for every HDU.  Any pairwise summary is derived
+    from the fingerprints alone.  The full file difference is only computed on request,
+    and only for pairs whose fingerprints differ.
+
+    Parameters
+    ----------
+        items : list
+            A list of expanded product file objects
+        change : str
+            The type of file, either "fits" or "catalog"
+    '''
+
+    def __init__(self, items, change='fits'):
+        self.change = change
+        self._files = {}
+        for item in items:
+            if not item.file_exists:
+                log.warning(f'File for version {item.version} does not exist. '
+                            'Excluding it from the difference matrix.')
+                continue
+            self._files[str(item.version)] = str(item.fullpath)
+        self.versions = list(self._files.keys())
+        self._fingerprints = {}
+        self._diffs = {}
+
+    def __repr__(self):
+        return f"<DiffMatrix(versions='{','.join(self.versions)}', change='{self.change}')>"
+
+    def _check_version(self, version):
+        version = str(version)
+        if version not in self._files:
+            raise KeyError(f'version {version} not found in the difference matrix')
+        return version
+
+    def fingerprint(self, version):
+        ''' Return the memoized fingerprint for a given version '''
+        version = self._check_version(version)
+        if version not in self._fingerprints:
+            reader = _fingerprint_catalog if self.change == 'catalog' else _fingerprint_fits
+            self._fingerprints[version] = reader(self._files[version])
+        return self._fingerprints[version]
+
+    def summary(self, version1, version2):
+        ''' Summarize the differences between two versions from their fingerprints
+
+        Parameters
+        ----------
+            version1 : str
+                The first version
+            version2 : str
+                The second version
+
+        Returns
+        -------
+            A dictionary of the added, removed, and changed HDUs between the versions
+        '''
+        fp1, fp2 = self.fingerprint(version1), self.fingerprint(version2)
+        hdus1, hdus2 = _label_hdus(fp1), _label_hdus(fp2)
+        common = [name for name in hdus1 if name in hdus2]
+        pairs = {name: (fp1[hdus1[name]], fp2[hdus2[name]]) for name in common}
+        changed = [name for name in common if pairs[name][0] != pairs[name][1]]
+        return {'versions': [str(version1), str(version2)],
+                'identical': fp1 == fp2,
+                'added_hdus': [name for name in hdus1 if name not in hdus2],
+                'removed_hdus': [name for name in hdus2 if name not in hdus1],
+                'identical_hdus': [name for name in common if name not in changed],
+                'changed_headers': [n for n in changed
+                                    if pairs[n][0].header != pairs[n][1].header],
+                'changed_structure': [n for n in changed
+                                      if pairs[n][0].structure != pairs[n][1].structure],
+                'changed_data': [n for n in changed if pairs[n][0].data != pairs[n][1].data]}
+
+    def changed_hdus(self, version1, version2):
+        ''' Return the (index1, index2) pairs of the HDUs that differ between two versions '''
+        fp1, fp2 = self.fingerprint(version1), self.fingerprint(version2)
+        hdus1, hdus2 = _label_hdus(fp1), _label_hdus(fp2)
+        return [(hdus1[name][0], hdus2[name][0]) for name in hdus1
+                if name in hdus2 and fp1[hdus1[name]] != fp2[hdus2[name]]]
+
+    def is_identical(self, version1, version2):
+        ''' Check if the files for two versions are identical
+
+        Files are identical when all their HDU fingerprints match, ignoring the
+        CHECKSUM and DATASUM keywords.  Equal whole-file checksums from the active file
+        manifest imply identical fingerprints, so they are used to skip opening either
+        file, while differing checksums fall back to comparing the fingerprints.
+        '''
+        entry1 = get_entry(self._files[self._check_version(version1)])
+        entry2 = get_entry(self._files[self._check_version(version2)])
+        if entry1 and entry2 and entry1.checksum and entry1.checksum == entry2.checksum:
+            return True
+        return self.fingerprint(version1) == self.fingerprint(version2)
+
+    def matrix(self):
+        ''' Return a boolean matrix of version pairs with identical files '''
+        n_versions = len(self.versions)
+        same = np.eye(n_versions, dtype=bool)
+        for i, j in itertools.combinations(range(n_versions), 2):
+            same[i, j] = same[j, i] = self.is_identical(self.versions[i], self.versions[j])
+        return same
+
+    def diff(self, version1, version2, full=None):
+        ''' Compute the full difference between two versions
+
+        The difference is computed lazily and cached.  No difference is computed
+        for versions whose fingerprints are identical, and the full astropy report
+        only compares the HDUs whose fingerprints differ.
+
+        Parameters
+        ----------
+            version1 : str
+                The first version
+            version2 : str
+                The second version
+            full : bool
+                If True, also computes the full astropy difference report
+
+        Returns
+        -------
+            A `FileDiff`, or None if the files are identical
+        '''
+        version1, version2 = self._check_version(version1), self._check_version(version2)
+        if self.is_identical(version1, version2):
+            return None
+
+        key = (version1, version2, bool(full))
+        if key not in self._diffs:
+            fits = full and self.change == 'fits'
+            hdus = self.changed_hdus(version1, version2) if fits else None
+            self._diffs[key] = compute_diff(self._files[version1], self._files[version2],
+                                            change=self.change, versions=[version1, version2],
+                                            full=full, hdus=hdus)
+        return self._diffs[key]
+
+
+def compute_diff_matrix(items, change=None):
+    ''' Compute an all-pairs difference matrix for a list of files
+
+    Parameters
+    ----------
+        items : list
+            A list of expanded product file objects
+        change : str
+            The type of file, either "fits" or "catalog"
+
+    Returns
+    -------
+        A `DiffMatrix`
+    '''
+    return DiffMatrix(items, change=change or 'fits')
@@ -0,0 +1,209 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Filename: pool.py
+# Project: io
+# Author: Brian Cherinka
+# Created: Monday, 19th October 2026 10:05:12 am
+# License: BSD 3-clause "New" or "Revised" License
+# Copyright (c) 2026 Brian Cherinka
+# Last Modified: Monday, 19th October 2026 10:05:12 am
+# Modified By: Brian Cherinka
+
+
+from __future__ import print_function, division, absolute_import
+import threading
+import contextlib
+from collections import OrderedDict
+from cthreepo import config, log
+
+
+class HandlePool(object):
+    ''' A bounded pool of open FITS file handles
+
+    Keeps at most ``max_open`` FITS files open at any time.  When the pool is full,
+    the least recently used HDUList is closed and evicted.  Requesting an evicted
+    file transparently reopens it.  Files are leased with `lease`, which keeps the
+    HDUList open until the lease is released; a leased file is never evicted, so the
+    pool can temporarily hold more than ``max_open`` files while they are in use.
+
+    An HDUList returned by `get` is not leased.  All headers are read when a file is
+    opened, so headers remain accessible from an evicted HDUList, but data must be
+    accessed within a lease.
+
+    Parameters
+    ----------
+        max_open : int
+            The maximum number of open files.  Defaults to the ``pool.max_open``
+            config value.
+    '''
+
+    def __init__(self, max_open=None):
+        self.max_open = max_open or config.get('pool', {}).get('max_open', 64)
+        self._handles = OrderedDict()
+        self._leases = {}
+        self._lock = threading.RLock()
+        self.opens = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return (f'<HandlePool(n_open={len(self)}, max_open={self.max_open}, opens={self.opens}, '
+                f'hits={self.hits}, evictions={self.evictions})>')
+
+    def __len__(self):
+        return len(self._handles)
+
+    def __contains__(self, filename):
+        return str(filename) in self._handles
+
+    def is_leased(self, filename):
+        ''' Check if a file is currently leased '''
+        return str(filename) in self._leases
+
+    @property
+    def stats(self):
+        ''' The pool counters '''
+        return {'n_open': len(self), 'max_open': self.max_open, 'opens': self.opens,
+                'hits': self.hits, 'evictions': self.evictions}
+
+    def get(self, filename):
+        ''' Get an open HDUList for a FITS file, opening it if needed
+
+        Parameters
+        ----------
+            filename : str
+                The full path to the FITS file
+
+        Returns
+        -------
+            An astropy HDUList
+        '''
+        filename = str(filename)
+        with self._lock:
+            hdulist = self._open(filename)
+            self._evict(keep=filename)
+            return hdulist
+
+    def _open(self, filename):
+        ''' get an HDUList from the pool, opening the file if needed, without evicting '''
+        if filename in self._handles:
+            self.hits += 1
+            self._handles.move_to_end(filename)
+            return self._handles[filename]
+
+        from astropy.io import fits
+        hdulist = fits.open(filename, lazy_load_hdus=False)
+        self.opens += 1
+        self._handles[filename] = hdulist
+        return hdulist
+
+    @contextlib.contextmanager
+    def lease(self, filename):
+        ''' Lease an open HDUList for a FITS file, opening it if needed
+
+        The HDUList is kept open, and is not evicted, until the lease is released.
+        Leases are reference counted, so a file can be leased by several callers or
+        threads at once.
+
+        Parameters
+        ----------
+            filename : str
+                The full path to the FITS file
+
+        Yields
+        ------
+            An astropy HDUList
+        '''
+        filename = str(filename)
+        with self._lock:
+            hdulist = self._open(filename)
+            self._leases[filename] = self._leases.get(filename, 0) + 1
+            self._evict()
+        try:
+            yield hdulist
+        finally:
+            with self._lock:
+                self._leases[filename] -= 1
+                if not self._leases[filename]:
+                    del self._leases[filename]
+                    self._evict()
+
+    def _evict(self, keep=None):
+        ''' close the least recently used unleased files until the pool is within its limit '''
+        unleased = [name for name in self._handles if name not in self._leases and name != keep]
+        for filename in unleased[:max(len(self._handles) - self.max_open, 0)]:
+            self._handles.pop(filename).close()
+            self.evictions += 1
+            log.debug(f'Evicted {filename} from the FITS handle pool')
+
+    def close(self, filename):
+        ''' Close and remove a file from the pool, unless it is leased '''
+        filename = str(filename)
+        with self._lock:
+            if filename not in self._leases and filename in self._handles:
+                self._handles.pop(filename).close()
+
+    def clear(self):
+        ''' Close all unleased files in the pool '''
+        with self._lock:
+            for filename in [name for name in self._handles if name not in self._leases]:
+                self._handles.pop(filename).close()
+
+    def resize(self, max_open):
+        ''' Change the maximum number of open files, evicting files if needed '''
+        with self._lock:
+            self.max_open = max_open
+            self._evict()
+
+    def reset_stats(self):
+        ''' Reset the pool counters '''
+        self.opens = self.hits = self.evictions = 0
+
+
+class HDUListProxy(object):
+    ''' A lightweight stand-in for the HDUList of a pooled FITS file
+
+    Fetches the HDUList from the handle pool on every access, so a proxy kept by a
+    caller transparently reopens its file after the pool has evicted it.  HDUs taken
+    from the proxy are not protected from eviction; use `HandlePool.lease` to keep a
+    file open while working on its HDUs.
+
+    Parameters
+    ----------
+        filename : str
+            The full path to the FITS file
+        pool : `HandlePool`
+            The handle pool serving the file
+    '''
+
+    def __init__(self, filename, pool):
+        self._filename = str(filename)
+        self._pool = pool
+
+    def __repr__(self):
+        return f'<HDUListProxy(filename={self._filename})>'
+
+    def _get(self):
+        return self._pool.get(self._filename)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._get(), name)
+
+    def __getitem__(self, key):
+        return self._get()[key]
+
+    def __len__(self):
+        return len(self._get())
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __contains__(self, key):
+        return key in self._get()
+
+
+# the shared FITS handle pool
+pool = HandlePool()
@@ -0,0 +1,330 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Filename: synthetic.py
+# Project: io
+# Author: Brian Cherinka
+# Created: Monday, 19th October 2026 7:05:41 pm
+# License: BSD 3-clause "New" or "Revised" License
+# Copyright (c) 2026 Brian Cherinka
+# Last Modified: Monday, 19th October 2026 7:05:41 pm
+# Modified By: Brian Cherinka
+
+
+from __future__ import print_function, division, absolute_import
+import os
+import math
+import time
+import pathlib
+import tempfile
+import contextlib
+import tracemalloc
+from collections import namedtuple
+
+import yaml
+import numpy as np
+
+ScalingResult = namedtuple('ScalingResult', ['stage', 'size', 'time', 'memory'])
+
+# the base sdss datamodel schema for products
+BASE_SCHEMA = {
+    'name': ('Name', 'string', True),
+    'short': ('Short Description', 'string', True),
+    'description': ('Description', 'string', True),
+    'datatype': ('Datatype', 'string', True),
+    'example': ('Example', 'string', False),
+    'versions': ('Versions', 'list(string)', True),
+    'path_name': ('SDSS Access Name', 'string', False),
+    'path_kwargs': ('SDSS Access Keyword Arguments', 'dict', False),
+    'public': ('Public', 'boolean', False),
+    'changelog': ('Changelog', 'dict', False),
+    'defaults': ('Defaults', 'dict', False),
+}
+
+
+def _write_yaml(path, data):
+    ''' write a yaml file '''
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        yaml.safe_dump(data, f, sort_keys=False)
+    return path
+
+
+def _write_fits(path, index):
+    ''' write a small FITS file whose header and columns grow with the version index '''
+    from astropy.io import fits
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    primary = fits.PrimaryHDU()
+    for i in range(index + 1):
+        primary.header[f'KEY{i}'] = i
+    cols = [fits.Column(name=f'COL{i}', format='E', array=np.arange(10, dtype=float))
+            for i in range(index + 1)]
+    fits.HDUList([primary, fits.BinTableHDU.from_columns(cols, name='TABLE')]).writeto(
+        path, overwrite=True)
+
+
+def _write_csv(path, index, n_rows=100):
+    ''' write a small CSV catalog whose columns grow with the version index '''
+    path.parent.mkdir(parents=True, exist_ok=True)
+    names = [f'col{i}' for i in range(index + 1)]
+    rows = [','.join(str(r * (i + 1)) for i in range(len(names))) for r in range(n_rows)]
+    path.write_text('\n'.join([','.join(names)] + rows) + '\n')
+
+
+def write_synthetic_survey(root, survey='synth', n_products=10, n_versions=5, n_changelog=3,
+                           n_models=10, files=True, n_rows=100):
+    ''' Write a synthetic survey datamodel, with optional matching data files
+
+    Writes a datamodel tree under ``root/datamodel``, containing the base sdss datamodel,
+    a survey datamodel, a products file and a wavelengths model file.  Products alternate
+    between FITS and catalog datatypes.  Each product changelog lists its first versions
+    explicitly, with each version adding a model object to the previous one, and uses the
+    product defaults for the remaining versions.  Data files are written under ``root/sas``.
+
+    Parameters
+    ----------
+        root : str
+            The root directory.  Use it as $CTHREEPO_DIR, and ``root/sas`` as $SAS_BASE_DIR.
+        survey : str
+            The name of the survey
+        n_products : int
+            The number of products
+        n_versions : int
+            The number of versions per product
+        n_changelog : int
+            The number of explicit changelog entries per product
+        n_models : int
+            The number of model objects
+        files : bool
+            If True, also writes a FITS or CSV file for every product version
+        n_rows : int
+            The number of rows in each CSV file
+
+    Returns
+    -------
+        The path to the survey products file
+    '''
+    root = pathlib.Path(root)
+    dmdir = root / 'datamodel'
+    survey = survey.lower()
+
+    base = {'name': 'sdss', 'description': 'synthetic base datamodel',
+            'required_keys': ['name', 'kind', 'required'],
+            'schema': {key: {'name': name, 'kind': kind, 'required': required,
+                             'group': 'Default'}
+                       for key, (name, kind, required) in BASE_SCHEMA.items()}}
+    _write_yaml(dmdir / 'datamodel.yaml', base)
+    _write_yaml(dmdir / survey / 'datamodel.yaml',
+                {'name': survey, 'description': f'synthetic {survey} datamodel',
+                 'schema': {'wavelengths': {'name': 'Wavelengths', 'kind': 'list(objects)',
+                                            'required': False, 'group': survey.title()}}})
+
+    models = {'schema': {'name': 'Wavelength', 'key': 'wavelength',
+                         'description': 'synthetic wavelength sampling',
+                         'attributes': {'name': {'name': 'Name', 'required': True,
+                                                 'kind': 'string'},
+                                        'description': {'name': 'Description', 'required': True,
+                                                        'kind': 'string'},
+                                        'nwave': {'name': 'NumWave', 'kind': 'integer'}}},
+              'objects': [{'name': f'W{i}', 'description': f'wavelength sampling {i}',
+                           'nwave': 1000 + i} for i in range(max(n_models, 1))]}
+    _write_yaml(dmdir / survey / 'wavelengths.yaml', models)
+
+    versions = [f'v{j:03d}' for j in range(1, n_versions + 1)]
+    products = {}
+    for i in range(n_products):
+        name = f'prod{i:04d}'
+        datatype = 'fits' if i % 2 == 0 else 'catalog'
+        ext = 'fits' if datatype == 'fits' else 'csv'
+        changelog = {}
+        for j, version in enumerate(versions[:n_changelog]):
+            changelog[version] = {'wavelengths': ['W0']} if j == 0 else \
+                {'wavelengths': f'{versions[j - 1]} += [W{j % max(n_models, 1)}]'}
+        products[name] = {'name': name.upper(), 'short': f'synthetic product {i}',
+                          'description': f'a synthetic {datatype} product',
+                          'datatype': datatype,
+                          'example': f'{survey}work/{name}/{name}-{versions[0]}.{ext}',
+                          'versions': versions,
+                          'defaults': {'wavelengths': ['W0']},
+                          'changelog': changelog}
+
+        if files:
+            for j, version in enumerate(versions):
+                path = root / 'sas' / f'{survey}work' / name / f'{name}-{version}.{ext}'
+                if datatype == 'fits':
+                    _write_fits(path, j)
+                else:
+                    _write_csv(path, j, n_rows=n_rows)
+
+    return _write_yaml(dmdir / survey / 'products.yaml', products)
+
+
+@contextlib.contextmanager
+def synthetic_environ(root):
+    ''' Temporarily point $CTHREEPO_DIR and $SAS_BASE_DIR at a synthetic tree '''
+    root = pathlib.Path(root)
+    keys = ('CTHREEPO_DIR', 'SAS_BASE_DIR')
+    old = {key: os.environ.get(key) for key in keys}
+    os.environ.update({'CTHREEPO_DIR': str(root), 'SAS_BASE_DIR': str(root / 'sas')})
+    try:
+        yield
+    finally:
+        for key, value in old.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def load_synthetic_survey(root, survey='synth'):
+    ''' Load a synthetic survey written with `write_synthetic_survey` into a DataModel '''
+    from cthreepo.datamodel import DataModel
+
+    cls = type(f'{survey.title()}DataModel', (DataModel,), {'survey': survey.lower()})
+    with synthetic_environ(root):
+        return cls()
+
+
+def _clear_caches():
+    ''' clear the datamodel tree index and the open FITS handles, for a cold run '''
+    from cthreepo.io.datamodel import _trees
+    from cthreepo.io.pool import pool
+    from cthreepo.io.yaml import _compile_versions
+
+    _trees.clear()
+    pool.clear()
+    _compile_versions.cache_clear()
+
+
+def _measure(func):
+    ''' measure the run time and the peak traced memory of a function
+
+    The time and the memory are measured in separate runs, so tracing does not slow the
+    timed run, with the caches cleared before each so both runs start equally cold.
+    '''
+    _clear_caches()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+
+    _clear_caches()
+    tracemalloc.start()
+    try:
+        func()
+        __, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def _get_stages(root, survey):
+    ''' get the timed stages of loading a synthetic survey '''
+    from cthreepo.core.models import generate_models
+    from cthreepo.core.products import generate_products
+    from cthreepo.io.datamodel import find_datamodels
+    from cthreepo.io.yaml import expand_yaml, read_yaml
+
+    dm = load_synthetic_survey(root, survey=survey)
+    products_file = dm._products_file
+    model_files = dm._model_files
+
+    def expand_products():
+        for product in dm.products:
+            product.expand_product()
+
+    def compute_changelogs():
+        for product in dm.products:
+            product.compute_changelog(refresh=True)
+
+    return [('find_datamodels', lambda: find_datamodels(products_file)),
+            ('expand_yaml', lambda: expand_yaml(read_yaml(products_file))),
+            ('generate_models', lambda: [generate_models(read_yaml(f)) for f in model_files]),
+            ('generate_products', lambda: generate_products(products_file, models=dm.models)),
+            ('organize_by_version', dm.organize_by_version),
+            ('expand_product', expand_products),
+            ('compute_changelog', compute_changelogs)]
+
+
+def scaling_report(sizes=(10, 20, 40), dimension='products', outdir=None, files=True,
+                   **kwargs):
+    ''' Measure how loading a synthetic survey scales with its size
+
+    For each size, writes a synthetic survey with the given dimension set to that size,
+    then measures the run time and peak memory of each loading stage.
+
+    Parameters
+    ----------
+        sizes : list
+            The sizes of the scaled dimension
+        dimension : str
+            The dimension to scale, one of "products", "versions", "changelog" or "models"
+        outdir : str
+            The directory to write the synthetic surveys.  Default is a temporary directory.
+        files : bool
+            If True, also writes data files and measures expansion and changelogs
+        kwargs : dict
+            Any other `write_synthetic_survey` counts, held fixed
+
+    Returns
+    -------
+        A list of `ScalingResult` of stage, size, time in seconds and peak memory in bytes
+    '''
+    assert dimension in ('products', 'versions', 'changelog', 'models'), \
+        'dimension must be one of products, versions, changelog or models'
+
+    results = []
+    with contextlib.ExitStack() as stack:
+        if outdir is None:
+            outdir = stack.enter_context(tempfile.TemporaryDirectory())
+
+        for size in sizes:
+            root = pathlib.Path(outdir) / f'{dimension}-{size}'
+            counts = dict(kwargs, **{f'n_{dimension}': size})
+            write_synthetic_survey(root, files=files, **counts)
+            stages = _get_stages(root, 'synth')
+            with synthetic_environ(root):
+                for stage, func in stages:
+                    if not files and stage in ('expand_product', 'compute_changelog'):
+                        continue
+                    elapsed, peak = _measure(func)
+                    results.append(ScalingResult(stage, size, elapsed, peak))
+    return results
+
+
+def scaling_exponents(results):
+    ''' Estimate the scaling exponent of each stage from its two largest sizes
+
+    An exponent near 1 is linear, while an exponent near 2 exposes quadratic behaviour.
+
+    Parameters
+    ----------
+        results : list
+            A list of `ScalingResult`
+
+    Returns
+    -------
+        A dictionary of stage names and their time scaling exponents
+    '''
+    exponents = {}
+    for stage in dict.fromkeys(r.stage for r in results):
+        rows = sorted((r.size, r.time) for r in results if r.stage == stage)
+        if len(rows) < 2:
+            continue
+        (s1, t1), (s2, t2) = rows[-2:]
+        if s1 > 0 and s2 != s1 and t1 > 0 and t2 > 0:
+            exponents[stage] = math.log(t2 / t1) / math.log(s2 / s1)
+    return exponents
+
+
+def format_scaling_report(results):
+    ''' Format scaling results as a text table, flagging superlinear stages '''
+    lines = [f'{"stage":<20} {"size":>8} {"time (ms)":>12} {"memory (KB)":>12}']
+    for r in results:
+        lines.append(f'{r.stage:<20} {r.size:>8} {r.time * 1e3:>12.2f} {r.memory / 1024:>12.1f}')
+    lines.append('')
+    lines.append(f'{"stage":<20} {"exponent":>8}')
+    for stage, exponent in scaling_exponents(results).items():
+        flag = '  <-- superlinear' if exponent > 1.5 else ''
+        lines.append(f'{stage:<20} {exponent:>8.2f}{flag}')
+    return '\n'.join(lines)
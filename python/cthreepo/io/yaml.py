@@ -15,8 +15,12 @@ from __future__ import print_function, division, absolute_import
 import pathlib
 import re
 import os
+import functools
+from collections import namedtuple
 import yaml
 
+from cthreepo.core.stats import timed
+
 
 def get_yaml_files(path: str, get: str = 'products') -> list:
     ''' Find valid yaml files
@@ -32,20 +36,29 @@ def get_yaml_files(path: str, get: str = 'products') -> list:
     -------
         A list of all available yaml files
     '''
+    from cthreepo.io.datamodel import get_tree
+
     assert get in ['datamodel', 'products', 'models']
     datamodel_dir = os.environ['CTHREEPO_DIR'] / pathlib.Path(path)
+
+    # use the cached index of the datamodel tree when possible
+    tree = get_tree()
+    rglob = tree.get_files if tree.covers(datamodel_dir) else \
+        lambda path, pattern: list(pathlib.Path(path).rglob(pattern))
+
     if get in ['products', 'datamodel']:
-        files = list(datamodel_dir.rglob(f'*{get}*.yaml'))
+        files = rglob(datamodel_dir, f'*{get}*.yaml')
         assert len(list(files)) == 1, f'there can only be one {get} file'
         return files[0]
     elif get == 'models':
         files = []
-        for file in datamodel_dir.rglob('*.yaml'):
+        for file in rglob(datamodel_dir, '*.yaml'):
             if file.stem not in ['datamodel', 'products']:
                 files.append(file)
         return files
 
 
+@timed('read_yaml')
 def read_yaml(ymlfile: str) -> dict:
     ''' Opens and reads a yaml datamodel file
 
@@ -72,58 +85,135 @@ def read_yaml(ymlfile: str) -> dict:
     return data
 
 
-def parse_value(key: str, value: list, data: dict, versions: list) -> dict:
-    ''' parse a value for versions '''
+def read_yaml_files(files: list, jobs: int = None) -> list:
+    ''' Read several yaml datamodel files, in parallel across processes
 
-    if not isinstance(value, str):
-        return value
+    Parameters
+    ----------
+        files : list
+            The yaml filepaths
+        jobs : int
+            The number of worker processes.  If None or 1, reads the files serially.
 
-    value = value.replace(' ', '')
+    Returns
+    -------
+        A list of the dictionary contents of each file, in the order of the files
+    '''
+    files = list(files)
+    if not jobs or jobs <= 1 or len(files) <= 1:
+        return [read_yaml(f) for f in files]
+
+    # spawn fresh workers, since the pool may be started from a survey build thread,
+    # and forking a process with several running threads can copy a held lock
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(jobs, len(files)), mp_context=context) as executor:
+        return list(executor.map(read_yaml, files))
+
+
+# the syntax of the operators following a version, e.g. "+= [A,B] -= C"
+_operator_syntax = re.compile(r'(?:[+-]=(?:\[[\w-]+(?:,[\w-]+)*\]|[\w-]+))+')
+_operator_split = re.compile(r'(\+=|\-=)')
+_list_value = re.compile(r'\[(.*?)\]')
+
+VersionExpression = namedtuple('VersionExpression', ['version', 'operators'])
+
+
+def compile_versions(versions: list):
+    ''' compile a regex matching any version at the start of a value, longest first '''
+    return _compile_versions(tuple(versions))
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_versions(versions: tuple):
+    ''' compile and cache the version regex of a tuple of versions '''
+    names = sorted(versions, key=len, reverse=True)
+    return re.compile('|'.join(re.escape(v) for v in names))
+
+
+def parse_expression(value: str, pattern: re.Pattern):
+    ''' Parse a "[ver] += X -= Y" changelog value into a version expression
+
+    Parameters
+    ----------
+        value : str
+            The changelog value, with spaces removed
+        pattern : re.Pattern
+            The compiled regex of the allowed versions, from `compile_versions`
 
-    # check if the value has a version in it
-    version_patt = r'^(?:{0})'.format('|'.join(versions))
-    has_vers = re.search(version_patt, value)
-    if not has_vers:
+    Returns
+    -------
+        A `VersionExpression` of the version and a tuple of (operator, items) pairs, or
+        None if the value does not start with a version
+    '''
+    match = pattern.match(value)
+    if not match:
         assert '+=' not in value, f'{value} cannot have a += operator'
         assert '-=' not in value, f'{value} cannot have a -= operator'
-        return value
+        return None
 
     # check format of string value
-    word_patt = r'([+-]=\[?\w+-?,?\w+\]?)+'
-    pattern = r'{0}{1}'.format(version_patt, word_patt)
-    match = re.search(pattern, value)
-    if not match:
+    version, rest = match.group(), value[match.end():]
+    if not _operator_syntax.fullmatch(rest):
         raise ValueError('Syntax does not match the correct syntax: [ver] += XXX -= XXX')
 
-    # split the value on +=, -=
-    content = re.split(r'(\+=|\-=)', value)
-    version, modifiers = content[0], content[1:]
-    assert version in versions, f'{version} not in allowed list of versions'
+    # split the value into pairs of operator and operand
+    content = _operator_split.split(rest)
+    operators = []
+    for operator, operand in zip(content[1::2], content[2::2]):
+        islist = _list_value.search(operand)
+        items = islist.group(1).split(',') if islist else [operand]
+        operators.append((operator, tuple(items)))
+    return VersionExpression(version, tuple(operators))
 
-    # get the data for this version
-    rel_data = data[version]
-    assert key in rel_data, f'{key} not found in this release data'
 
-    # get the original value content for the key
-    orig_data = rel_data[key].copy()
+def evaluate_expression(expression: VersionExpression, values: list) -> list:
+    ''' Apply the operators of a version expression to a list of values
+
+    Operators are applied in order.  "+=" appends any items not already present, and
+    "-=" removes items, preserving the order of the remaining values.
+
+    Parameters
+    ----------
+        expression : `VersionExpression`
+            A parsed version expression
+        values : list
+            The values of the referenced version
 
-    # loop over the modifiers by 2
-    for mod in modifiers[1::2]:
-        idx = modifiers.index(mod)
-        islist = re.search(r'\[(.*?)\]', mod)
-        # convert the string into a list
-        if islist:
-            modeval = islist.group(1).split(',')
+    Returns
+    -------
+        A new list of values
+    '''
+    values = list(values)
+    for operator, items in expression.operators:
+        if operator == '+=':
+            present = set(values)
+            values.extend(i for i in dict.fromkeys(items) if i not in present)
         else:
-            modeval = [mod]
+            removed = set(items)
+            values = [v for v in values if v not in removed]
+    return values
 
-        # modify the original list of values
-        if modifiers[idx - 1] == '+=':
-            orig_data = list(set(orig_data) | set(modeval))
-        elif modifiers[idx - 1] == '-=':
-            orig_data = list(set(orig_data) - set(modeval))
 
-    return orig_data
+def parse_value(key: str, value: list, data: dict, versions: list,
+                pattern: re.Pattern = None) -> dict:
+    ''' parse a value for versions '''
+
+    if not isinstance(value, str):
+        return value
+
+    value = value.replace(' ', '')
+    expression = parse_expression(value, pattern or compile_versions(versions))
+    if expression is None:
+        return value
+
+    # get the data for this version
+    rel_data = data[expression.version]
+    assert key in rel_data, f'{key} not found in this release data'
+
+    # modify the original list of values
+    return evaluate_expression(expression, rel_data[key])
 
 
 def expand_yaml(data: dict) -> dict:
@@ -135,12 +225,13 @@ def expand_yaml(data: dict) -> dict:
         versions = value.get('versions', None)
         assert versions is not None, f'Must have a "versions" key set for object: {key}'
         if changelog and isinstance(changelog, dict):
+            pattern = compile_versions(versions)
             for ver in versions:
                 if ver in changelog:
                     # perform any parameter substitution
                     verdata = changelog[ver]
                     for k, v in verdata.items():
-                        new = parse_value(k, v, changelog, versions)
+                        new = parse_value(k, v, changelog, versions, pattern=pattern)
                         changelog[ver][k] = new
                 else:
                     # handle a version not in the changelog explicitly; use the defaults
@@ -0,0 +1,416 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Filename: server.py
+# Project: cthreepo
+# Author: Brian Cherinka
+# Created: Monday, 19th October 2026 4:02:37 pm
+# License: BSD 3-clause "New" or "Revised" License
+# Copyright (c) 2026 Brian Cherinka
+# Last Modified: Monday, 19th October 2026 4:02:37 pm
+# Modified By: Brian Cherinka
+
+
+from __future__ import print_function, division, absolute_import
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import orjson
+
+from cthreepo import config, log
+from cthreepo.core.paths import _convert, resolver
+from cthreepo.exceptions import CthreepoAPIError
+from cthreepo.io.cache import file_identity
+from cthreepo.io.manifest import is_file
+
+
+class QueryError(Exception):
+    ''' an error answering a datamodel query, with an HTTP status code '''
+
+    def __init__(self, message, status=400):
+        self.status = status
+        super(QueryError, self).__init__(message)
+
+
+class DataModelIndex(object):
+    ''' A warm in-memory index over the SDSS datamodel
+
+    Loads the datamodel once and answers queries for surveys, products, versions,
+    models, resolved file paths and changelogs.  Encoded responses are kept in a
+    bounded least-recently-used cache, so repeated queries are served without
+    recomputing them.  Responses that depend on files, i.e. files, resolved paths
+    and changelogs, are keyed on the size and modification time of those files, and
+    are recomputed once any of them changes, appears or disappears.
+
+    Queries are answered concurrently.  Concurrent requests for the same query wait
+    for a single computation, while product expansion and path resolution, which
+    replant the shared sdss_access tree, are serialized.
+
+    Parameters
+    ----------
+        datamodel : `SDSSDataModelList`
+            The datamodel to index.  Defaults to the full SDSS datamodel.
+        cache_size : int
+            The maximum number of cached responses.  Defaults to the
+            ``server.cache_size`` config value.
+    '''
+
+    def __init__(self, datamodel=None, cache_size=None):
+        if datamodel is None:
+            from cthreepo.datamodel import dm as datamodel
+
+        self.cache_size = cache_size or config.get('server', {}).get('cache_size', 256)
+        self.surveys = {str(item.survey).lower(): item for item in datamodel}
+        self.products = {survey: {str(p.name).lower(): p for p in item.products}
+                         for survey, item in self.surveys.items()}
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._key_locks = {}
+        self._tree_lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __repr__(self):
+        return (f'<DataModelIndex(surveys={list(self.surveys)}, n_cached={len(self._cache)}, '
+                f'hits={self.hits}, misses={self.misses}, invalidations={self.invalidations})>')
+
+    @property
+    def stats(self):
+        ''' The response cache counters '''
+        return {'n_cached': len(self._cache), 'cache_size': self.cache_size,
+                'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations}
+
+    def get_survey(self, survey):
+        ''' get a survey datamodel by name '''
+        try:
+            return self.surveys[survey.lower()]
+        except KeyError:
+            raise QueryError(f'No survey {survey} found', status=404)
+
+    def get_product(self, survey, name):
+        ''' get a survey product by name '''
+        self.get_survey(survey)
+        try:
+            return self.products[survey.lower()][name.lower()]
+        except KeyError:
+            raise QueryError(f'No product {name} found in survey {survey}', status=404)
+
+    def query(self, path, params=None):
+        ''' Answer a query, returning the encoded JSON response
+
+        Parameters
+        ----------
+            path : str
+                The query path, e.g. "/surveys/manga/products/cube"
+            params : dict
+                Any query parameters
+
+        Returns
+        -------
+            The JSON response as bytes
+        '''
+        params = params or {}
+        key = (path.rstrip('/'), tuple(sorted(params.items())))
+        response, stale = self._lookup(key)
+        if response is not None:
+            return response
+
+        try:
+            with self._get_key_lock(key):
+                # another request may have answered the same query while waiting
+                response, expired = self._lookup(key, count=False)
+                if response is not None:
+                    return response
+
+                data, paths = self._answer(path, dict(params), refresh=stale or expired)
+                response = orjson.dumps(data)
+                identity = tuple(file_identity(p) for p in paths)
+
+                with self._cache_lock:
+                    self.misses += 1
+                    self._cache[key] = (response, paths, identity)
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        finally:
+            with self._cache_lock:
+                self._key_locks.pop(key, None)
+        return response
+
+    def _lookup(self, key, count=True):
+        ''' look up a cached response, returning it, or None and whether it was stale '''
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None, False
+            self._cache.move_to_end(key)
+
+        response, paths, identity = entry
+        if paths and tuple(file_identity(p) for p in paths) != identity:
+            with self._cache_lock:
+                if self._cache.get(key) is entry:
+                    del self._cache[key]
+                    self.invalidations += 1
+            return None, True
+
+        if count:
+            with self._cache_lock:
+                self.hits += 1
+        return response, False
+
+    def _get_key_lock(self, key):
+        ''' get the lock serializing the computation of a single query '''
+        with self._cache_lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def clear(self):
+        ''' Clear the response cache '''
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _answer(self, path, params, refresh=None):
+        ''' route a query path to its answer, and the list of files the answer depends on '''
+        from cthreepo.io import artifacts
+
+        parts = [urllib.parse.unquote(p) for p in path.strip('/').split('/') if p]
+        if parts == ['surveys']:
+            return list(self.surveys), []
+        if len(parts) < 2 or parts[0] != 'surveys':
+            raise QueryError(f'Unknown query {path}', status=404)
+
+        survey = parts[1]
+        if len(parts) == 2:
+            return artifacts.describe_datamodel(self.get_survey(survey)), []
+        if parts[2:] == ['models']:
+            return artifacts.describe_datamodel(self.get_survey(survey))['models'], []
+        if parts[2:] == ['products']:
+            return list(self.products[self.get_survey(survey).survey.lower()]), []
+        if parts[2] != 'products' or len(parts) > 5:
+            raise QueryError(f'Unknown query {path}', status=404)
+
+        product = self.get_product(survey, parts[3])
+        if len(parts) == 4:
+            return artifacts.describe_product(product), []
+        if parts[4] == 'versions':
+            return artifacts.describe_versions(product.versions), []
+        if parts[4] == 'files':
+            files = self._get_files(product, refresh=refresh)
+            return [artifacts.describe_path(inst) for inst in files], self._get_paths(files)
+        if parts[4] == 'resolve':
+            return self._resolve(product, params, refresh=refresh)
+        if parts[4] == 'changelog':
+            return self._changelog(product, params, refresh=refresh)
+        raise QueryError(f'Unknown query {path}', status=404)
+
+    def _get_files(self, product, refresh=None):
+        ''' get the expanded product files, expanding them once, or again when refreshed '''
+        with self._tree_lock:
+            if refresh:
+                # the files changed, so the expansion, changelog and matrices are all stale
+                product._expanded = product._changes = None
+                product._matrix = product._diffmatrix = None
+            if product._expanded is None:
+                product._expanded = product.expand_product()
+            return product._expanded
+
+    @staticmethod
+    def _get_paths(files):
+        ''' get the full paths of a list of expanded product files '''
+        return [str(inst.fullpath) for inst in files if getattr(inst, 'fullpath', None)]
+
+    def _resolve(self, product, params, refresh=None):
+        ''' resolve the file path of a product version with the shared path resolver '''
+        version = params.pop('version', None)
+        if not version:
+            raise QueryError('A version parameter is required to resolve a path')
+        if version not in [str(v) for v in product.versions]:
+            raise QueryError(f'No version {version} found for product {product.name}',
+                             status=404)
+
+        # without a path definition, use the expanded example file
+        path_name = getattr(product, 'path_name', None)
+        if not path_name:
+            from cthreepo.io.artifacts import describe_path
+            files = [i for i in self._get_files(product, refresh=refresh)
+                     if str(i.version) == version]
+            return describe_path(files[0]), self._get_paths(files[:1])
+
+        # query values are strings, so convert numbers for any numeric format specs
+        kwargs = dict(getattr(product, 'path_kwargs', None) or {})
+        kwargs.update({key: _convert(value) for key, value in params.items()})
+        try:
+            fullpath, __ = resolver.resolve(path_name, version, **kwargs)
+        except KeyError as exc:
+            raise QueryError(exc.args[0])
+        return {'version': version, 'path': fullpath, 'exists': is_file(fullpath)}, [fullpath]
+
+    def _changelog(self, product, params, refresh=None):
+        ''' compute the changelog of a product '''
+        if product.datatype not in ('fits', 'catalog'):
+            raise QueryError(f'No changelog available for {product.datatype} products')
+        files = self._get_files(product, refresh=refresh)
+        versions = params.get('versions', None)
+        versions = versions.split(',') if versions else None
+        if versions:
+            # do not replace the cached changelog of the full product
+            return ([diff.to_dict() for diff in
+                     product.compute_changelog(versions=versions, stream=True)],
+                    self._get_paths(i for i in files if str(i.version) in versions))
+        return product.compute_changelog(refresh=refresh).to_dict(), self._get_paths(files)
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    ''' Handle HTTP GET queries against a `DataModelIndex` '''
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        if url.path.rstrip('/') == '/stats':
+            status, body = 200, orjson.dumps(self.server.index.stats)
+        else:
+            try:
+                status, body = 200, self.server.index.query(url.path, params)
+            except QueryError as exc:
+                status, body = exc.status, orjson.dumps({'error': str(exc)})
+            except Exception as exc:
+                log.warning(f'Failed to answer query {self.path}: {exc}')
+                status, body = 500, orjson.dumps({'error': str(exc)})
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug(f'{self.address_string()} - {format % args}')
+
+
+class DataModelServer(ThreadingHTTPServer):
+    ''' A local threaded HTTP server answering JSON datamodel queries
+
+    Parameters
+    ----------
+        host : str
+            The host address.  Defaults to the ``server.host`` config value.
+        port : int
+            The port.  Defaults to the ``server.port`` config value.  Use 0 for any free port.
+        index : `DataModelIndex`
+            The datamodel index to query.  Defaults to a new index of the full datamodel.
+    '''
+    daemon_threads = True
+
+    def __init__(self, host=None, port=None, index=None):
+        options = config.get('server', {})
+        host = host or options.get('host', '127.0.0.1')
+        port = options.get('port', 8765) if port is None else port
+        self.index = index or DataModelIndex()
+        super(DataModelServer, self).__init__((host, port), QueryHandler)
+
+    @property
+    def url(self):
+        ''' The base url of the server '''
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def serve(host=None, port=None):
+    ''' Run a datamodel query server until interrupted '''
+    server = DataModelServer(host=host, port=port)
+    log.info(f'Serving the datamodel at {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class DataModelClient(object):
+    ''' A client for a local datamodel query server
+
+    Parameters
+    ----------
+        url : str
+            The base url of the server.  Defaults to the configured host and port.
+        timeout : float
+            The request timeout in seconds
+    '''
+
+    def __init__(self, url=None, timeout=None):
+        options = config.get('server', {})
+        self.url = url or f"http://{options.get('host', '127.0.0.1')}:{options.get('port', 8765)}"
+        self.timeout = timeout or 60
+
+    def __repr__(self):
+        return f"<DataModelClient(url='{self.url}')>"
+
+    def get(self, path, **params):
+        ''' Send a query to the server
+
+        Parameters
+        ----------
+            path : str
+                The query path
+            params : dict
+                Any query parameters
+
+        Returns
+        -------
+            The decoded JSON response
+        '''
+        url = self.url.rstrip('/') + '/' + path.lstrip('/')
+        if params:
+            url += '?' + urllib.parse.urlencode(params)
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                return orjson.loads(response.read())
+        except urllib.error.HTTPError as exc:
+            error = orjson.loads(exc.read()).get('error', exc.reason)
+            raise CthreepoAPIError(f'{exc.code}: {error}')
+
+    def surveys(self):
+        ''' list the surveys '''
+        return self.get('surveys')
+
+    def datamodel(self, survey):
+        ''' describe a survey datamodel '''
+        return self.get(f'surveys/{survey}')
+
+    def models(self, survey):
+        ''' describe the models of a survey '''
+        return self.get(f'surveys/{survey}/models')
+
+    def products(self, survey):
+        ''' list the products of a survey '''
+        return self.get(f'surveys/{survey}/products')
+
+    def product(self, survey, product):
+        ''' describe a product '''
+        return self.get(f'surveys/{survey}/products/{product}')
+
+    def versions(self, survey, product):
+        ''' list the versions of a product '''
+        return self.get(f'surveys/{survey}/products/{product}/versions')
+
+    def files(self, survey, product):
+        ''' list the expanded files of a product '''
+        return self.get(f'surveys/{survey}/products/{product}/files')
+
+    def resolve(self, survey, product, version, **kwargs):
+        ''' resolve the file path of a product version '''
+        return self.get(f'surveys/{survey}/products/{product}/resolve', version=version,
+                        **kwargs)
+
+    def changelog(self, survey, product, versions=None):
+        ''' get the changelog of a product '''
+        params = {'versions': ','.join(versions)} if versions else {}
+        return self.get(f'surveys/{survey}/products/{product}/changelog', **params)
+
+    def stats(self):
+        ''' get the server response cache counters '''
+        return self.get('stats')
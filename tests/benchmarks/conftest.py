@@ -0,0 +1,55 @@
+# encoding: utf-8
+#
+# conftest.py
+
+"""
+Fixtures for the benchmark suite.  The synthetic catalog and FITS files are
+generated locally, so the benchmarks do not depend on any real SAS data.
+"""
+
+import os
+
+import numpy as np
+import pytest
+from astropy.table import Table
+
+from ..conftest import make_fits
+
+
+def pytest_collection_modifyitems(config, items):
+    ''' skip the benchmarks, unless requested with --benchmark-only or CTHREEPO_BENCHMARKS '''
+    if config.getoption('benchmark_only', False) or os.environ.get('CTHREEPO_BENCHMARKS'):
+        return
+    skip = pytest.mark.skip(reason='set CTHREEPO_BENCHMARKS to run the benchmarks')
+    for item in items:
+        if item.get_closest_marker('benchmark'):
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='module')
+def dm():
+    ''' the SDSS datamodel, built on first use rather than when collecting the benchmarks '''
+    from cthreepo.datamodel import dm
+    return dm
+
+
+@pytest.fixture()
+def catalogs(tmp_path, monkeypatch):
+    ''' synthetic versions of the simple catalog, under a temporary SAS_BASE_DIR '''
+    catdir = tmp_path / 'simplework' / 'catalogs'
+    catdir.mkdir(parents=True)
+    for i, version in enumerate(['v1.0', 'v2.0', 'v3.0']):
+        table = Table({'ID': np.arange(1000), 'RA': np.linspace(0, 360, 1000)})
+        if i > 0:
+            table[f'COL{i}'] = np.ones(1000)
+        table.write(catdir / f'catalogA_{version}.csv', format='ascii.csv')
+    monkeypatch.setenv('SAS_BASE_DIR', str(tmp_path))
+    return catdir
+
+
+@pytest.fixture()
+def large_fitsfiles(tmp_path):
+    ''' a list of ten synthetic FITS file versions '''
+    from cthreepo.core.fits import Fits
+    return [Fits(str(make_fits(tmp_path / f'large-v{i}.fits', version=min(i, 3))),
+                 version=f'v{i}') for i in range(1, 11)]
@@ -0,0 +1,109 @@
+# encoding: utf-8
+#
+# test_benchmarks.py
+
+"""
+Benchmarks of the datamodel hot paths, using pytest-benchmark.
+
+The benchmarks are marked with ``benchmark`` and skipped by a plain test run.  Run
+only the benchmarks, saving the results for later comparison, with::
+
+    pytest tests/benchmarks --benchmark-only --benchmark-autosave
+
+or include them in a full test run by setting ``CTHREEPO_BENCHMARKS=1``.
+
+Results are stored in the ``.benchmarks`` directory.  Compare a new run against
+the last saved run with ``--benchmark-compare``, or fail on regressions with
+``--benchmark-compare-fail=mean:10%``.  To run the benchmarks only once, as plain tests,
+set ``CTHREEPO_BENCHMARKS=1`` and use ``--benchmark-disable``.
+"""
+
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from cthreepo.core.models import generate_models  # noqa: E402
+from cthreepo.io.general import compute_changelog  # noqa: E402
+from cthreepo.io.yaml import expand_yaml, read_yaml  # noqa: E402
+
+pytestmark = pytest.mark.benchmark
+
+
+class TestLoad(object):
+    """Benchmarks of loading the datamodel."""
+
+    def test_import_datamodel(self, benchmark):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+        cmd = [sys.executable, '-c', 'from cthreepo.datamodel import dm']
+        benchmark.pedantic(subprocess.run, args=(cmd,), kwargs={'check': True, 'env': env},
+                           rounds=3, iterations=1)
+
+    def test_manga_datamodel(self, benchmark):
+        from cthreepo.datamodel.manga import MaNGADataModel
+        benchmark(MaNGADataModel)
+
+    def test_simple_datamodel(self, benchmark):
+        from cthreepo.datamodel.simple import SimpleDataModel
+        benchmark(SimpleDataModel)
+
+    def test_generate_models(self, benchmark):
+        path = pathlib.Path(os.environ['CTHREEPO_DIR']) / 'datamodel' / 'manga' / 'channels.yaml'
+        data = read_yaml(path)
+        models = benchmark(generate_models, data)
+        assert len(models) > 0
+
+
+class TestLookup(object):
+    """Benchmarks of product expansion and lookups."""
+
+    def test_expand_product(self, benchmark, catalogs, dm):
+        product = dm['simple'].products['catalog']
+        files = benchmark(product.expand_product)
+        assert sum(f.file_exists for f in files) == 3
+
+    def test_fuzzy_lookup(self, benchmark, dm):
+        benchmark(lambda: dm['manga'].products['cube'])
+
+    def test_fuzzy_lookup_misspelled(self, benchmark, dm):
+        benchmark(lambda: dm['mnga'].products['cubes'])
+
+
+class TestChangelog(object):
+    """Benchmarks of computing changelogs."""
+
+    def test_changelog_fits(self, benchmark, large_fitsfiles):
+        changes = benchmark(compute_changelog, large_fitsfiles[::-1], change='fits')
+        assert len(changes) == 9
+
+    def test_changelog_catalog(self, benchmark, catalogs, dm):
+        product = dm['simple'].products['catalog']
+        product._expanded = None
+        files = [f for f in product.expand_product() if f.file_exists]
+        changes = benchmark(compute_changelog, files[::-1], change='catalog')
+        assert len(changes) == 2
+
+
+def make_changelog(n_products=20, n_versions=500):
+    ''' make products whose changelog entries each modify the previous version '''
+    versions = [f'v{i}' for i in range(n_versions)]
+    data = {}
+    for p in range(n_products):
+        changelog = {versions[0]: {'bintypes': ['A0']}}
+        for i in range(1, n_versions):
+            changelog[versions[i]] = {'bintypes': f'{versions[i - 1]} += [A{i},B{i}] -= B{i - 1}'}
+        data[f'prod{p}'] = {'versions': versions, 'changelog': changelog}
+    return data
+
+
+class TestExpandYaml(object):
+    """Benchmarks of expanding changelog version substitutions."""
+
+    def test_expand_large_changelog(self, benchmark):
+        data = benchmark.pedantic(expand_yaml, setup=lambda: ((make_changelog(),), {}),
+                                  rounds=3, iterations=1)
+        assert data['prod0']['changelog']['v499']['bintypes'][-2:] == ['A499', 'B499']
@@ -9,3 +9,41 @@ Those conftest.py will only be applies to the tests in that subdirectory and
 underlying directories. See https://docs.pytest.org/en/2.7.3/plugins.html for
 more information.
 """
+
+import os
+import pathlib
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+
+os.environ.setdefault('CTHREEPO_DIR', str(pathlib.Path(__file__).resolve().parents[1]))
+
+
+def make_fits(path, version=1):
+    ''' create a small synthetic FITS file whose layout changes with version '''
+    primary = fits.PrimaryHDU()
+    primary.header['VERSION'] = f'v{version}'
+    primary.header['TELESCOP'] = 'SDSS 2.5m'
+    if version > 1:
+        primary.header['NEWKEY'] = True
+    hdus = [primary, fits.ImageHDU(np.zeros((3, 3)), name='FLUX')]
+    cols = [fits.Column(name='ID', format='J', array=np.arange(3))]
+    if version > 2:
+        cols.append(fits.Column(name='EXTRA', format='E', array=np.ones(3)))
+        hdus.append(fits.ImageHDU(np.ones((3, 3)), name='IVAR'))
+    hdus.append(fits.BinTableHDU.from_columns(cols, name='TABLE'))
+    fits.HDUList(hdus).writeto(path, overwrite=True)
+    return path
+
+
+@pytest.fixture()
+def fitsfiles(tmp_path):
+    ''' a list of three synthetic FITS files for versions v1 to v3 '''
+    from cthreepo.core.fits import Fits
+    files = []
+    for version in range(1, 4):
+        path = make_fits(tmp_path / f'test-v{version}.fits', version=version)
+        files.append(Fits(str(path), version=f'v{version}'))
+    return files
@@ -0,0 +1,51 @@
+# encoding: utf-8
+#
+# test_artifacts.py
+
+from cthreepo.io import artifacts
+from cthreepo.io.artifacts import (describe_file, describe_versions, export_datamodel,
+                                   get_artifact_path, read_artifact)
+from cthreepo.io.synthetic import load_synthetic_survey, synthetic_environ, write_synthetic_survey
+
+
+class TestArtifacts(object):
+    """Tests for the datamodel JSON artifacts."""
+
+    def test_describe_file(self, fitsfiles):
+        desc = describe_file(fitsfiles[-1])
+        assert desc['version'] == 'v3'
+        assert desc['exists'] is True
+        assert any(card.startswith('NEWKEY') for card in desc['header'])
+        assert desc['tables'] == [{'name': 'TABLE', 'columns': [['ID', 'J'], ['EXTRA', 'E']]}]
+
+    def test_describe_versions(self):
+        assert describe_versions(['v1', 'v2']) == [['v1', None], ['v2', None]]
+
+    def test_artifact_path(self, tmp_path):
+        assert get_artifact_path(tmp_path, 'MaNGA') == tmp_path / 'manga' / 'datamodel.json'
+        path = get_artifact_path(tmp_path, 'manga', 'CUBE', version='DR15')
+        assert path == tmp_path / 'manga' / 'cube' / 'DR15.json'
+
+    def test_export_isolates_failures(self, tmp_path, monkeypatch):
+        import cthreepo.datamodel
+        from cthreepo.datamodel import SDSSDataModelList
+
+        write_synthetic_survey(tmp_path, n_products=3, n_versions=2, n_changelog=1, n_rows=5)
+        dm = load_synthetic_survey(tmp_path)
+        monkeypatch.setattr(cthreepo.datamodel, 'dm', SDSSDataModelList([dm]))
+
+        export_product = artifacts.export_product
+
+        def failing_export(product, *args, **kwargs):
+            if product.name == 'PROD0001':
+                raise ValueError('cannot export')
+            return export_product(product, *args, **kwargs)
+
+        monkeypatch.setattr(artifacts, 'export_product', failing_export)
+        with synthetic_environ(tmp_path):
+            written = export_datamodel(tmp_path / 'artifacts', surveys=['synth'])
+
+        assert len(written) == 1 + 2 * 3
+        assert not get_artifact_path(tmp_path / 'artifacts', 'synth', 'prod0001').exists()
+        product = read_artifact(tmp_path / 'artifacts', 'synth', 'prod0002')
+        assert product['versions'] == [['v001', None], ['v002', None]]
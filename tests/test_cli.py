@@ -0,0 +1,66 @@
+# encoding: utf-8
+#
+# test_cli.py
+
+import orjson
+import pytest
+
+from cthreepo.cli import get_parser, main
+
+
+class TestCli(object):
+    """Tests for the cthreepo command line tool."""
+
+    def test_parser(self):
+        args = get_parser().parse_args(['changelog', 'manga', 'cube', '-j', '4', '-f', 'json',
+                                        '--cache-dir', '/tmp/cache'])
+        assert args.command == 'changelog'
+        assert (args.survey, args.product) == ('manga', 'cube')
+        assert (args.jobs, args.format, args.cache_dir) == (4, 'json', '/tmp/cache')
+
+    def test_no_command(self):
+        with pytest.raises(SystemExit):
+            main([])
+
+    def test_list_json(self, capsys):
+        main(['list', '--format', 'json'])
+        records = [orjson.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert {'manga', 'simple'} <= {r['survey'] for r in records}
+
+    def test_cache_dir_options(self):
+        parser = get_parser()
+        args = parser.parse_args(['export', '/tmp/out', '--cache-dir', '/tmp/cache'])
+        assert args.cache_dir == '/tmp/cache'
+        with pytest.raises(SystemExit):
+            parser.parse_args(['expand', 'manga', '--cache-dir', '/tmp/cache'])
+
+    def test_expand_workers_manifest(self, tmp_path, monkeypatch, capsys):
+        import functools
+        import multiprocessing
+
+        from cthreepo import cli
+        from cthreepo.io.manifest import set_manifest
+        from cthreepo.io.synthetic import write_synthetic_survey
+
+        # a synthetic simple survey without data files, listed in a manifest instead
+        write_synthetic_survey(tmp_path, survey='simple', n_products=2, n_versions=2,
+                               n_changelog=1, files=False)
+        manifest = tmp_path / 'manifest.csv'
+        manifest.write_text('path,size,mtime,checksum\n'
+                            'simplework/prod0001/prod0001-v002.csv,10,1700000000,\n')
+        monkeypatch.setenv('CTHREEPO_DIR', str(tmp_path))
+        monkeypatch.setenv('SAS_BASE_DIR', str(tmp_path / 'sas'))
+
+        # workers started with spawn do not inherit the manifest of the parent process
+        spawn = multiprocessing.get_context('spawn')
+        monkeypatch.setattr(cli, 'ProcessPoolExecutor',
+                            functools.partial(cli.ProcessPoolExecutor, mp_context=spawn))
+        try:
+            main(['expand', 'simple', 'prod0000', 'prod0001', '-j', '2', '-f', 'json',
+                  '--file-manifest', str(manifest)])
+        finally:
+            set_manifest(None)
+        records = [orjson.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [(r['product'], r['version'], r['exists']) for r in records] == \
+            [('PROD0000', 'v001', False), ('PROD0000', 'v002', False),
+             ('PROD0001', 'v001', False), ('PROD0001', 'v002', True)]
@@ -0,0 +1,211 @@
+# encoding: utf-8
+#
+# test_datamodel.py
+
+import copy
+import os
+import sys
+import pathlib
+import threading
+import subprocess
+
+import pytest
+import yaml
+
+from cthreepo.io.datamodel import DataModelTree, merge_datamodels
+
+
+def write_yaml(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.safe_dump(data))
+    return path
+
+
+@pytest.fixture()
+def tree(tmp_path):
+    ''' a small datamodel tree with a base and a survey datamodel '''
+    write_yaml(tmp_path / 'datamodel.yaml', {'name': 'sdss', 'schema': {'a': 1, 'b': 1}})
+    write_yaml(tmp_path / 'survey' / 'datamodel.yaml', {'name': 'survey', 'schema': {'b': 2}})
+    write_yaml(tmp_path / 'survey' / 'products.yaml', {})
+    write_yaml(tmp_path / 'survey' / 'versions.yaml', {})
+    write_yaml(tmp_path / 'other' / 'products.yaml', {})
+    return DataModelTree(tmp_path)
+
+
+class TestMergeDataModels(object):
+    """Tests for merging datamodels."""
+
+    def test_merge(self):
+        user = {'name': 'user', 'schema': {'b': 2}, 'keys': ['b', {'x': 1}]}
+        default = {'name': 'default', 'schema': {'a': 1, 'b': 1}, 'keys': [{'x': 1}, 'a', 'a']}
+        merged = merge_datamodels(user, default)
+        assert merged == {'name': 'user', 'schema': {'b': 2, 'a': 1},
+                          'keys': ['b', {'x': 1}, 'a']}
+        assert list(merged['schema']) == ['b', 'a']
+
+    def test_no_mutation(self):
+        user = {'schema': {'b': [1]}}
+        default = {'schema': {'a': [2], 'b': [3]}}
+        inputs = copy.deepcopy((user, default))
+        merged = merge_datamodels(user, default)
+        assert (user, default) == inputs
+        merged['schema']['a'].append(4)
+        assert default['schema']['a'] == [2]
+
+    def test_unhashable(self):
+        merged = merge_datamodels([{1}, 'a'], [{1}, {2}, 'b'])
+        assert merged == [{1}, 'a', {2}, 'b']
+
+
+class TestDataModelTree(object):
+    """Tests for the cached datamodel directory index."""
+
+    def test_get_files(self, tree):
+        survey = tree.root / 'survey'
+        assert tree.get_files(survey, '*products*.yaml') == [survey / 'products.yaml']
+        assert len(tree.get_files(tree.root, '*products*.yaml')) == 2
+        assert {f.name for f in tree.get_files(survey)} == {'datamodel.yaml', 'products.yaml',
+                                                            'versions.yaml'}
+
+    def test_merged(self, tree):
+        merged = tree.get_datamodel(tree.root / 'survey' / 'products.yaml')
+        assert merged == {'name': 'survey', 'schema': {'b': 2, 'a': 1}}
+        assert tree.get_datamodel(tree.root / 'other')['schema'] == {'a': 1, 'b': 1}
+
+        # the cached datamodel is not shared with callers
+        merged['schema'].clear()
+        assert tree.get_datamodel(tree.root / 'survey')['schema'] == {'b': 2, 'a': 1}
+
+    def test_shared_parent(self, tree, monkeypatch):
+        from cthreepo.io import datamodel
+        reads = []
+        read_yaml = datamodel.read_yaml
+        monkeypatch.setattr(datamodel, 'read_yaml', lambda f: reads.append(f) or read_yaml(f))
+        tree.get_datamodel(tree.root / 'survey')
+        tree.get_datamodel(tree.root / 'other')
+        assert reads == [tree.root / 'datamodel.yaml', tree.root / 'survey' / 'datamodel.yaml']
+
+    def test_refresh(self, tree):
+        survey = tree.root / 'survey'
+        assert len(tree.get_files(survey)) == 3
+        write_yaml(survey / 'bintypes.yaml', {})
+        os.utime(survey, ns=(0, 0))
+        assert len(tree.get_files(survey)) == 4
+
+        ymlfile = write_yaml(survey / 'datamodel.yaml', {'name': 'survey', 'schema': {'c': 3}})
+        os.utime(ymlfile, ns=(1, 1))
+        assert tree.get_datamodel(survey)['schema'] == {'c': 3, 'a': 1, 'b': 1}
+
+
+class TestGenerateModels(object):
+    """Tests for loading the model files of a datamodel."""
+
+    def test_parallel(self, tmp_path, monkeypatch):
+        from cthreepo import config
+        from cthreepo.io.synthetic import load_synthetic_survey, write_synthetic_survey
+
+        write_synthetic_survey(tmp_path, n_products=2, n_models=3, files=False)
+        models = tmp_path / 'datamodel' / 'synth' / 'wavelengths.yaml'
+        for name in ('bintypes', 'templates', 'channels'):
+            (models.parent / f'{name}.yaml').write_text(models.read_text())
+
+        serial = load_synthetic_survey(tmp_path)
+        monkeypatch.setitem(config, 'datamodel', {'jobs': 2, 'parallel_threshold': 2})
+        parallel = load_synthetic_survey(tmp_path)
+        assert list(parallel.models) == ['bintypes', 'channels', 'templates', 'wavelengths']
+        assert list(parallel.models) == list(serial.models)
+        assert [str(m) for m in parallel.models['channels']] == ['W0', 'W1', 'W2']
+
+    def test_above_threshold(self, tmp_path, monkeypatch):
+        import concurrent.futures
+        from cthreepo import config
+        from cthreepo.io.synthetic import load_synthetic_survey, write_synthetic_survey
+
+        write_synthetic_survey(tmp_path, n_products=2, n_models=3, files=False)
+        models = tmp_path / 'datamodel' / 'synth' / 'wavelengths.yaml'
+        names = [f'model{i:02d}' for i in range(17)]
+        for name in names:
+            (models.parent / f'{name}.yaml').write_text(models.read_text())
+
+        # the default threshold of 16 files reads the models in a process pool
+        pools = []
+        executor = concurrent.futures.ProcessPoolExecutor
+
+        def process_pool(*args, **kwargs):
+            pools.append(kwargs)
+            return executor(*args, **kwargs)
+
+        monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', process_pool)
+        monkeypatch.setitem(config, 'datamodel', {'jobs': 2})
+        parallel = load_synthetic_survey(tmp_path)
+        assert [pool['max_workers'] for pool in pools] == [2]
+        assert pools[0]['mp_context'].get_start_method() == 'spawn'
+        assert list(parallel.models) == names + ['wavelengths']
+        assert [str(m) for m in parallel.models['model16']] == ['W0', 'W1', 'W2']
+
+
+class TestSDSSDataModelList(object):
+    """Tests for building the survey datamodels."""
+
+    def test_build(self):
+        from cthreepo.datamodel import DataModel, SDSSDataModelList
+        from cthreepo.datamodel.manga import MaNGADataModel
+        from cthreepo.datamodel.simple import SimpleDataModel
+
+        # the two surveys only finish building when they are built at the same time
+        barrier = threading.Barrier(2, timeout=10)
+
+        def waiting(base):
+            def __init__(self):
+                barrier.wait()
+                base.__init__(self)
+            return type(base.__name__, (base,), {'__init__': __init__})
+
+        broken = type('BrokenDataModel', (DataModel,), {'survey': 'nosurvey'})
+        classes = [waiting(SimpleDataModel), broken, waiting(MaNGADataModel)]
+        datamodels = SDSSDataModelList.build(classes, jobs=2)
+        assert [item.survey for item in datamodels] == ['simple', 'manga']
+        assert set(datamodels.build_times) == {'simple', 'nosurvey', 'manga'}
+        assert list(datamodels.failures) == ['nosurvey']
+
+    def test_lazy(self):
+        import cthreepo
+        code = 'import cthreepo.datamodel as d; print(\'dm\' in vars(d))'
+        env = dict(os.environ, PYTHONPATH=str(pathlib.Path(cthreepo.__file__).parents[1]))
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True,
+                                text=True, check=True)
+        assert result.stdout.split()[-1] == 'False'
+
+    def test_survey_module(self):
+        from cthreepo.datamodel import dm, simple
+        assert simple.dm is dm['simple']
+        with pytest.raises(AttributeError):
+            simple.missing
+
+
+class TestProductSchema(object):
+    """Tests for binding the datamodel models to the product schemas."""
+
+    def test_models_any_thread(self, tmp_path):
+        from concurrent.futures import ThreadPoolExecutor
+        from cthreepo.core.products import create_product_schema
+        from cthreepo.io.datamodel import find_datamodels
+        from cthreepo.io.synthetic import (load_synthetic_survey, synthetic_environ,
+                                           write_synthetic_survey)
+
+        write_synthetic_survey(tmp_path, n_products=2, n_changelog=2, n_models=3, files=False)
+        dm = load_synthetic_survey(tmp_path)
+        with synthetic_environ(tmp_path):
+            dmschema = find_datamodels(dm._products_file)
+
+        # the schema is created in one thread, and used in another
+        def get_models():
+            fields = schema().fields
+            changelog = fields['changelog'].value_field.schema.fields
+            return fields['wavelengths'].inner.models, changelog['wavelengths'].inner.models
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            schema = executor.submit(create_product_schema, dmschema, models=dm.models).result()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            models = executor.submit(get_models).result()
+        assert all(item is dm.models for item in models)
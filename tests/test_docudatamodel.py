@@ -0,0 +1,176 @@
+# encoding: utf-8
+#
+# test_docudatamodel.py
+
+import os
+import sys
+import time
+import shutil
+
+import pytest
+
+from cthreepo.io.synthetic import write_synthetic_survey
+
+sphinx = pytest.importorskip('sphinx')
+
+N_PRODUCTS = 6
+
+CONF = '''
+extensions = ['cthreepo.datamodel.docudatamodel']
+master_doc = 'index'
+exclude_patterns = ['_build']
+'''
+
+SYNTH = '''
+from cthreepo.io.synthetic import load_synthetic_survey
+dm = load_synthetic_survey({root!r})
+'''
+
+
+def product_doc(index):
+    ''' the rst source of a document with a single product directive '''
+    directive = 'fits' if index % 2 == 0 else 'catalog'
+    return (f'Product {index}\n=========\n\n.. {directive}:: synth:prod{index:04d}\n'
+            f'    :name: PROD{index:04d}\n    :change:\n')
+
+
+@pytest.fixture()
+def docs(tmp_path, monkeypatch):
+    ''' a Sphinx project documenting the products of a synthetic survey '''
+    root = tmp_path / 'root'
+    write_synthetic_survey(root, n_products=N_PRODUCTS, n_versions=3, n_changelog=2,
+                           n_models=3, n_rows=5)
+    monkeypatch.setenv('CTHREEPO_DIR', str(root))
+    monkeypatch.setenv('SAS_BASE_DIR', str(root / 'sas'))
+
+    srcdir = tmp_path / 'src'
+    srcdir.mkdir()
+    (srcdir / 'conf.py').write_text(CONF)
+    (srcdir / 'synth.py').write_text(SYNTH.format(root=str(root)))
+    names = [f'prod{i:04d}' for i in range(N_PRODUCTS)]
+    toctree = '\n'.join(f'    {name}' for name in names)
+    (srcdir / 'index.rst').write_text(f'Synth\n=====\n\n.. toctree::\n\n{toctree}\n')
+    for i, name in enumerate(names):
+        (srcdir / f'{name}.rst').write_text(product_doc(i))
+    (srcdir / 'datamodel.rst').write_text(
+        'Datamodel\n=========\n\n.. datamodel:: synth:dm\n    :name: Synth DataModel\n')
+
+    monkeypatch.syspath_prepend(str(srcdir))
+    yield srcdir
+    sys.modules.pop('synth', None)
+
+
+def build(srcdir, outdir, parallel=0, read=None, **overrides):
+    ''' build the html docs, recording the names of the documents read '''
+    from sphinx.application import Sphinx
+
+    app = Sphinx(str(srcdir), str(srcdir), str(outdir / 'html'), str(outdir / 'doctrees'),
+                 'html', confoverrides=overrides, status=None, warning=None,
+                 parallel=parallel)
+    if read is not None:
+        app.connect('env-before-read-docs', lambda app, env, docnames: read.extend(docnames))
+    app.build()
+    return app
+
+
+def html_body(outdir, docname):
+    ''' read the main body of an html document '''
+    text = (outdir / 'html' / f'{docname}.html').read_text()
+    return text[text.index('<div class="body"'):text.index('<div class="sphinxsidebar"')]
+
+
+class TestRenderCache(object):
+    """Tests for the build-level render cache of the datamodel directives."""
+
+    def test_render_twice(self, docs, tmp_path, monkeypatch):
+        from cthreepo.datamodel.docudatamodel import FitsDirective
+
+        (docs / 'again.rst').write_text(product_doc(0).replace('Product 0', 'Again'))
+        with open(docs / 'index.rst', 'a') as f:
+            f.write('    again\n')
+
+        calls = []
+        content = FitsDirective.get_section_content
+
+        def get_section_content(self, obj, refid):
+            calls.append((self.env.docname, refid))
+            return content(self, obj, refid)
+
+        monkeypatch.setattr(FitsDirective, 'get_section_content', get_section_content)
+        app = build(docs, tmp_path / 'out')
+
+        # the product sections are rendered once, and reused by the second document
+        rendered = [refid for docname, refid in calls if refid.startswith('prod0000')]
+        assert sorted(rendered) == ['prod0000_changelog', 'prod0000_extensions',
+                                    'prod0000_header', 'prod0000_info']
+        assert html_body(tmp_path / 'out', 'again').count('COL2') == \
+            html_body(tmp_path / 'out', 'prod0000').count('COL2') > 0
+        assert app.env.cthreepo_docs['again'] == {'synth:prod0000'}
+        assert set(app.env.cthreepo_rendered['synth:prod0000']['sections']) == \
+            {'info', 'header', 'extensions', 'changelog'}
+
+        # the build cache is cleared once the environment is updated
+        assert not getattr(app.env, 'cthreepo_cache', None)
+
+
+class TestIncremental(object):
+    """Tests for parallel and incremental builds of the datamodel directives."""
+
+    def test_parallel(self, docs, tmp_path):
+        serial = build(docs, tmp_path / 'serial')
+        parallel = build(docs, tmp_path / 'parallel', parallel=2)
+        assert parallel.parallel == 2
+        assert parallel.env.cthreepo_docs == serial.env.cthreepo_docs
+        assert set(parallel.env.cthreepo_rendered) == set(serial.env.cthreepo_rendered)
+        for name in ['datamodel'] + [f'prod{i:04d}' for i in range(N_PRODUCTS)]:
+            assert html_body(tmp_path / 'parallel', name) == html_body(tmp_path / 'serial', name)
+
+    def test_touch_yaml(self, docs, tmp_path):
+        root = os.environ['CTHREEPO_DIR']
+        build(docs, tmp_path / 'out')
+
+        # nothing is re-read when no input changed
+        read = []
+        build(docs, tmp_path / 'out', read=read)
+        assert read == []
+
+        # touching a data file only re-reads the document of its product
+        future = time.time() + 10
+        data = os.path.join(os.environ['SAS_BASE_DIR'], 'synthwork', 'prod0002',
+                            'prod0002-v003.fits')
+        os.utime(data, (future, future))
+        build(docs, tmp_path / 'out', read=read)
+        assert read == ['prod0002']
+
+        # touching the products yaml re-reads all documents of the survey products
+        read.clear()
+        future += 10
+        os.utime(os.path.join(root, 'datamodel', 'synth', 'products.yaml'), (future, future))
+        build(docs, tmp_path / 'out', read=read)
+        assert sorted(read) == ['datamodel'] + [f'prod{i:04d}' for i in range(N_PRODUCTS)]
+
+
+class TestArtifacts(object):
+    """Tests for rendering the datamodel directives from exported artifacts."""
+
+    def test_artifacts_match_live(self, docs, tmp_path, monkeypatch):
+        import cthreepo.datamodel
+        from cthreepo.datamodel import SDSSDataModelList
+        from cthreepo.io.artifacts import export_datamodel
+
+        live = build(docs, tmp_path / 'live')
+
+        # export the synthetic survey, then remove the datamodel module and data files
+        synth = sys.modules['synth']
+        monkeypatch.setattr(cthreepo.datamodel, 'dm', SDSSDataModelList([synth.dm]))
+        written = export_datamodel(tmp_path / 'artifacts', surveys=['synth'])
+        assert len(written) == 1 + N_PRODUCTS * 4
+        (docs / 'synth.py').unlink()
+        sys.modules.pop('synth')
+        shutil.rmtree(os.environ['SAS_BASE_DIR'])
+
+        app = build(docs, tmp_path / 'artifact', cthreepo_artifact_dir=str(tmp_path / 'artifacts'))
+        assert 'synth' not in sys.modules
+        assert set(app.env.cthreepo_rendered) == set(live.env.cthreepo_rendered)
+        for name in ['datamodel'] + [f'prod{i:04d}' for i in range(N_PRODUCTS)]:
+            assert html_body(tmp_path / 'artifact', name) == html_body(tmp_path / 'live', name)
@@ -0,0 +1,76 @@
+# encoding: utf-8
+#
+# test_general.py
+
+import pickle
+
+import orjson
+import pytest
+
+from cthreepo.io.cache import DiskCache
+from cthreepo.io.general import compute_changelog, compute_diff
+
+
+class TestChangeLog(object):
+    """Tests for the streaming changelog and its export."""
+
+    def test_stream(self, fitsfiles):
+        diffs = compute_changelog(fitsfiles[::-1], change='fits', stream=True)
+        first = next(diffs)
+        assert first.versions == ('v3', 'v2')
+        assert first.added_cols == ('TABLE.EXTRA',)
+        assert len(list(diffs)) == 1
+
+    def test_json(self, fitsfiles):
+        changelog = compute_changelog(fitsfiles[::-1], change='fits')
+        data = orjson.loads(changelog.to_json())
+        assert [d['versions'] for d in data] == [['v3', 'v2'], ['v2', 'v1']]
+        assert data[0]['added_hdus'] == ['IVAR']
+        assert data[1]['added_keywords'] == ['NEWKEY']
+        assert changelog.generate_report().count('---------------------') == 2
+
+    def test_parallel_cached(self, fitsfiles, tmp_path):
+        cache = DiskCache(tmp_path / 'cache')
+        serial = compute_changelog(fitsfiles[::-1], change='fits')
+        parallel = compute_changelog(fitsfiles[::-1], change='fits', jobs=2, cache=cache)
+        assert parallel.to_dict() == serial.to_dict()
+        cached = compute_changelog(fitsfiles[::-1], change='fits', cache=cache)
+        assert cached.to_dict() == serial.to_dict()
+
+
+class TestFitsDiff(object):
+    """Tests for the compact FITS difference records."""
+
+    def test_immutable_and_picklable(self, fitsfiles):
+        diff = compute_diff(str(fitsfiles[2].fullpath), str(fitsfiles[0].fullpath),
+                            versions=['v3', 'v1'])
+        with pytest.raises(AttributeError):
+            diff.added_hdus = ()
+        copy = pickle.loads(pickle.dumps(diff))
+        assert copy.added_hdus == diff.added_hdus
+        assert copy.report() == diff.report()
+        assert 'hdulist' not in copy.__getstate__()
+
+    def test_ordered(self, tmp_path):
+        import numpy as np
+        from astropy.io import fits
+
+        names = ['D', 'A', 'C', 'B', 'E']
+        hdus = [fits.PrimaryHDU()] + [fits.ImageHDU(np.zeros(2), name=n) for n in names]
+        fits.HDUList(hdus).writeto(tmp_path / 'new.fits')
+        fits.HDUList([fits.PrimaryHDU()]).writeto(tmp_path / 'old.fits')
+        diff = compute_diff(str(tmp_path / 'new.fits'), str(tmp_path / 'old.fits'))
+        assert diff.added_hdus == tuple(names)
+        assert diff.to_dict()['added_hdus'] == names
+
+    def test_load(self, fitsfiles):
+        diff = compute_diff(str(fitsfiles[1].fullpath), str(fitsfiles[0].fullpath),
+                            versions=['v2', 'v1'])
+        hdulist, hdulist2 = diff.load()
+        try:
+            assert hdulist[0].header['VERSION'] == 'v2'
+            assert hdulist2[0].header['VERSION'] == 'v1'
+        finally:
+            hdulist.close()
+            hdulist2.close()
+        assert diff.to_dict()['added_keywords'] == ['NEWKEY']
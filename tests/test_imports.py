@@ -0,0 +1,67 @@
+# encoding: utf-8
+#
+# test_imports.py
+
+import os
+import pathlib
+
+import pytest
+
+import cthreepo
+from cthreepo.core.stats import format_import_profile, profile_imports
+
+# the recorded cold import budgets, as the maximum number of modules loaded.
+# Update these deliberately when a new dependency is needed at import time.
+IMPORT_BUDGETS = {
+    'cthreepo': 440,
+    'cthreepo.cli': 460,
+    'cthreepo.io.general': 510,
+    'cthreepo.core.fits': 520,
+    'cthreepo.datamodel': 560,
+}
+
+# the maximum cold import times, in seconds.  Wall-clock times vary with the load
+# of the machine, so these are only checked when CTHREEPO_IMPORT_TIMING is set.
+IMPORT_TIMES = {
+    'cthreepo': 2.0,
+    'cthreepo.cli': 2.0,
+    'cthreepo.io.general': 2.0,
+    'cthreepo.core.fits': 2.0,
+    'cthreepo.datamodel': 4.0,
+}
+
+# heavy dependencies that must only be imported at first use
+LAZY_MODULES = ('astropy', 'matplotlib', 'sdss_access')
+
+
+@pytest.fixture()
+def pythonpath(monkeypatch):
+    ''' make the package importable in a fresh interpreter '''
+    package_dir = str(pathlib.Path(cthreepo.__file__).resolve().parents[1])
+    path = os.environ.get('PYTHONPATH')
+    monkeypatch.setenv('PYTHONPATH', os.pathsep.join([package_dir, path]) if path else package_dir)
+
+
+class TestImports(object):
+    """Tests for the cold import budget of the package."""
+
+    @pytest.mark.parametrize('module', list(IMPORT_BUDGETS))
+    def test_import_budget(self, pythonpath, module):
+        profile = profile_imports(module)
+        assert profile.n_modules <= IMPORT_BUDGETS[module], format_import_profile(profile)
+
+        # heavy dependencies are not loaded, even indirectly
+        names = {item.module.split('.')[0] for item in profile.imports}
+        assert not names & set(LAZY_MODULES), format_import_profile(profile)
+
+    @pytest.mark.skipif(not os.environ.get('CTHREEPO_IMPORT_TIMING'),
+                        reason='set CTHREEPO_IMPORT_TIMING to check the import times')
+    @pytest.mark.parametrize('module', list(IMPORT_TIMES))
+    def test_import_time(self, pythonpath, module):
+        profile = profile_imports(module)
+        assert profile.time <= IMPORT_TIMES[module], format_import_profile(profile)
+
+    def test_format(self, pythonpath):
+        profile = profile_imports('cthreepo.io.yaml')
+        assert any(item.module == 'cthreepo.io.yaml' for item in profile.imports)
+        assert format_import_profile(profile, n=3).startswith('import cthreepo.io.yaml')
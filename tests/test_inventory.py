@@ -0,0 +1,48 @@
+# encoding: utf-8
+#
+# test_inventory.py
+
+import os
+
+from cthreepo.io.inventory import InventoryScanner, compile_component
+
+
+def make_tree(root):
+    ''' create a small tree of fake cube files '''
+    for plate, ifus in [(8485, [1901, 3702]), (7443, [12701])]:
+        stack = root / 'v2_4_3' / str(plate) / 'stack'
+        stack.mkdir(parents=True)
+        for ifu in ifus:
+            (stack / f'manga-{plate}-{ifu}-LOGCUBE.fits.gz').write_text('cube')
+        (stack / f'manga-{plate}-{ifus[0]}-LOGRSS.fits.gz').write_text('rss')
+    return root
+
+
+class TestInventory(object):
+    """Tests for the on-disk inventory scanner."""
+
+    def test_compile_component(self):
+        regex = compile_component('manga-{plate}-{ifu}-{wave}CUBE.fits.gz', last=True)
+        match = regex.fullmatch('manga-8485-1901-LOGCUBE.fits')
+        assert match.groupdict() == {'plate': '8485', 'ifu': '1901', 'wave': 'LOG'}
+        assert compile_component('stack') is None
+
+    def test_scan(self, tmp_path):
+        root = make_tree(tmp_path / 'redux')
+        template = str(root / '{drpver}/{plate}/stack/manga-{plate}-{ifu}-{wave}CUBE.fits.gz')
+        manifest = tmp_path / 'manifest.json'
+        scanner = InventoryScanner('mangacube', 'DR15', manifest=manifest, template=template)
+        files = list(scanner.scan())
+        assert [(f.kwargs['plate'], f.kwargs['ifu']) for f in files] == \
+            [(7443, 12701), (8485, 1901), (8485, 3702)]
+        assert all(f.size == 4 for f in files)
+        assert manifest.exists()
+
+        # a new file is picked up by an incremental re-scan
+        new = root / 'v2_4_3' / '7443' / 'stack' / 'manga-7443-1902-LINCUBE.fits.gz'
+        new.write_text('cube')
+        os.utime(new.parent, ns=(0, os.stat(new.parent).st_mtime_ns + 1))
+        files = list(scanner.scan())
+        assert len(files) == 4
+        assert {'drpver': 'v2_4_3', 'plate': 7443, 'ifu': 1902, 'wave': 'LIN'} in \
+            [f.kwargs for f in files]
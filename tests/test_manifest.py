@@ -0,0 +1,81 @@
+# encoding: utf-8
+#
+# test_manifest.py
+
+import sqlite3
+
+import pytest
+
+from cthreepo.io.manifest import set_manifest
+from cthreepo.io.matrix import DiffMatrix
+from cthreepo.io.pool import pool
+
+
+@pytest.fixture()
+def manifest(fitsfiles, tmp_path):
+    ''' a CSV manifest listing the first two FITS files, with the same checksum '''
+    filename = tmp_path / 'manifest.csv'
+    lines = ['path,size,mtime,checksum'] + \
+        [f'{f.filename},100,1700000000,abc123' for f in fitsfiles[:2]]
+    filename.write_text('\n'.join(lines) + '\n')
+    yield set_manifest(filename, root=tmp_path)
+    set_manifest(None)
+
+
+class TestManifest(object):
+    """Tests for manifest driven existence checks."""
+
+    def test_deferred(self, manifest, fitsfiles, tmp_path):
+        from cthreepo.core.fits import Fits
+        pool.clear()
+        opens = pool.opens
+        files = [Fits(str(f.fullpath), version=f.version) for f in fitsfiles]
+        assert [f.file_exists for f in files] == [True, True, False]
+        assert not any(f.loaded for f in files)
+        assert pool.opens == opens
+
+        files[0].load()
+        assert files[0].loaded
+
+    def test_identical_checksums(self, manifest, fitsfiles):
+        diffmatrix = DiffMatrix(fitsfiles[:2], change='fits')
+        assert diffmatrix.is_identical('v1', 'v2')
+        assert diffmatrix._fingerprints == {}
+
+    def test_different_checksums(self, fitsfiles, tmp_path):
+        import shutil
+        from astropy.io import fits
+        from cthreepo.core.fits import Fits
+
+        # a copy rewritten with different checksum keywords has a different file checksum
+        with fits.open(fitsfiles[0].fullpath) as hdulist:
+            hdulist.writeto(tmp_path / 'copy.fits', checksum=True)
+        shutil.copy(tmp_path / 'copy.fits', tmp_path / 'copy2.fits')
+        with fits.open(tmp_path / 'copy2.fits', mode='update') as hdulist:
+            hdulist[0].header['CHECKSUM'] = '0' * 16
+        filename = tmp_path / 'checksums.csv'
+        filename.write_text('path,size,mtime,checksum\ncopy.fits,100,1700000000,abc\n'
+                            'copy2.fits,100,1700000000,def\n')
+
+        set_manifest(filename, root=tmp_path)
+        try:
+            files = [Fits(str(tmp_path / name), version=f'v{i}')
+                     for i, name in enumerate(['copy.fits', 'copy2.fits'], start=1)]
+            assert DiffMatrix(files, change='fits').is_identical('v1', 'v2')
+        finally:
+            set_manifest(None)
+
+    def test_sqlite(self, fitsfiles, tmp_path):
+        filename = tmp_path / 'manifest.db'
+        with sqlite3.connect(filename) as conn:
+            conn.execute('CREATE TABLE files (path TEXT, size INT, mtime INT, checksum TEXT)')
+            conn.execute('INSERT INTO files VALUES (?, 100, 1700000000, NULL)',
+                         (fitsfiles[0].filename,))
+        manifest = set_manifest(filename, root=tmp_path)
+        try:
+            assert fitsfiles[0].fullpath in manifest
+            assert manifest.get(fitsfiles[0].fullpath).size == 100
+            assert fitsfiles[1].fullpath not in manifest
+            assert len(manifest) == 1
+        finally:
+            set_manifest(None)
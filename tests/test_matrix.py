@@ -0,0 +1,107 @@
+# encoding: utf-8
+#
+# test_matrix.py
+
+from cthreepo.io.matrix import compute_matrix, compute_diff_matrix
+
+
+class TestVersionMatrix(object):
+    """Tests for the N-way version matrix."""
+
+    def test_keywords(self, fitsfiles):
+        matrix = compute_matrix(fitsfiles, change='fits')
+        assert matrix.versions == ['v1', 'v2', 'v3']
+        assert matrix.keywords.versions_with('NEWKEY') == ['v2', 'v3']
+        assert matrix.keywords.first_seen('NEWKEY') == 'v2'
+        assert 'TELESCOP' in matrix.keywords.common()
+        assert matrix.keywords.changed('v1', 'v2') == ['VERSION']
+
+    def test_hdus_and_columns(self, fitsfiles):
+        matrix = compute_matrix(fitsfiles, change='fits')
+        assert matrix.hdus.added('v2', 'v3') == ['IVAR']
+        assert matrix.hdus.removed('v3', 'v1') == ['IVAR']
+        assert matrix.columns.names_in('v1') == ['TABLE.ID']
+        assert matrix.find('ivar') == {'hdus': ['v3']}
+
+
+class TestDiffMatrix(object):
+    """Tests for the all-pairs difference matrix."""
+
+    def test_summary(self, fitsfiles):
+        dm = compute_diff_matrix(fitsfiles, change='fits')
+        summary = dm.summary('v3', 'v1')
+        assert summary['identical'] is False
+        assert summary['added_hdus'] == ['IVAR']
+        assert 'FLUX' in summary['identical_hdus']
+        assert summary['changed_headers'] == ['PRIMARY', 'TABLE']
+        assert dm.matrix().tolist() == [[True, False, False], [False, True, False],
+                                        [False, False, True]]
+
+    def test_lazy_diff(self, fitsfiles):
+        dm = compute_diff_matrix(fitsfiles, change='fits')
+        diff = dm.diff('v3', 'v1')
+        assert diff.added_hdus == ('IVAR',)
+        assert dm.diff('v3', 'v1') is diff
+
+    def test_unnamed_hdus(self, tmp_path):
+        import numpy as np
+        from astropy.io import fits
+        from cthreepo.core.fits import Fits
+
+        files = []
+        for version, value in enumerate([1, 2], start=1):
+            hdus = [fits.PrimaryHDU(), fits.ImageHDU(np.zeros((2, 2))),
+                    fits.ImageHDU(np.full((2, 2), value))]
+            path = tmp_path / f'unnamed-v{version}.fits'
+            fits.HDUList(hdus).writeto(path)
+            files.append(Fits(str(path), version=f'v{version}'))
+
+        dm = compute_diff_matrix(files, change='fits')
+        assert len(dm.fingerprint('v1')) == 3
+        assert not dm.is_identical('v1', 'v2')
+        summary = dm.summary('v1', 'v2')
+        assert summary['identical_hdus'] == ['PRIMARY', 'HDU[1]']
+        assert summary['changed_data'] == ['HDU[2]']
+        assert dm.changed_hdus('v1', 'v2') == [(2, 2)]
+        diff = dm.diff('v1', 'v2', full=True)
+        assert diff.hdus == ((2, 2),)
+        assert 'HDU 2' in diff.astropy_diff and 'HDU 1 ' not in diff.astropy_diff
+
+    def test_vla_columns(self, tmp_path):
+        import numpy as np
+        from astropy.io import fits
+        from cthreepo.core.fits import Fits
+
+        # the heap values change between the last two versions, but not the array lengths
+        files = []
+        for version, offset in enumerate([0, 0, 10], start=1):
+            arrays = np.array([np.arange(3) + offset, np.arange(5)], dtype=object)
+            table = fits.BinTableHDU.from_columns(
+                [fits.Column(name='ID', format='J', array=np.arange(2)),
+                 fits.Column(name='SPEC', format='PJ()', array=arrays)], name='VLA')
+            path = tmp_path / f'vla-v{version}.fits'
+            fits.HDUList([fits.PrimaryHDU(), table]).writeto(path)
+            files.append(Fits(str(path), version=f'v{version}'))
+
+        dm = compute_diff_matrix(files, change='fits')
+        assert dm.is_identical('v1', 'v2')
+        assert not dm.is_identical('v2', 'v3')
+        assert dm.summary('v2', 'v3')['changed_data'] == ['VLA']
+
+
+class TestProductMatrix(object):
+    """Tests for the matrices cached on a product."""
+
+    def test_versions(self, tmp_path, monkeypatch):
+        from cthreepo.io.synthetic import load_synthetic_survey, write_synthetic_survey
+
+        write_synthetic_survey(tmp_path, n_products=1, n_versions=3, n_changelog=1, n_rows=5)
+        monkeypatch.setenv('CTHREEPO_DIR', str(tmp_path))
+        monkeypatch.setenv('SAS_BASE_DIR', str(tmp_path / 'sas'))
+        product = load_synthetic_survey(tmp_path).products[0]
+
+        for compute in (product.compute_matrix, product.compute_diff_matrix):
+            full = compute()
+            assert list(full.versions) == ['v001', 'v002', 'v003']
+            assert list(compute(versions=['v001', 'v003']).versions) == ['v001', 'v003']
+            assert compute() is full
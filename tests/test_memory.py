@@ -0,0 +1,50 @@
+# encoding: utf-8
+#
+# test_memory.py
+
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+
+from cthreepo.core.memory import CATEGORIES, deep_sizeof, measure_datamodel
+from cthreepo.io.pool import HandlePool
+
+
+class TestMemory(object):
+    """Tests for the datamodel memory report."""
+
+    def test_deep_sizeof(self):
+        array = np.zeros(1000)
+        data = {'a': array, 'b': [array]}
+        assert deep_sizeof(data) >= array.nbytes
+        seen = set()
+        deep_sizeof(array, seen)
+        assert deep_sizeof(data, seen) < array.nbytes
+        assert deep_sizeof(data, exclude={id(array)}) < array.nbytes
+        assert deep_sizeof(sys) == 0
+
+    def test_memory_report(self):
+        from cthreepo.datamodel import dm
+        report = dm['manga'].memory_report()
+        assert report.name == 'manga'
+        assert set(report.totals) == set(CATEGORIES)
+        assert report.totals['models'] > 0 and report.totals['products'] > 0
+        assert report.total == sum(report.totals.values())
+        largest = report.largest(3)
+        assert len(largest) == 3
+        assert largest[0].size >= largest[1].size >= largest[2].size
+
+    def test_cached_and_pooled(self, fitsfiles):
+        pool = HandlePool(max_open=5)
+        for inst in fitsfiles:
+            pool.get(inst.fullpath)
+        product = SimpleNamespace(name='test', _expanded=fitsfiles, _changes=['a change'],
+                                  _matrix=None, _diffmatrix=None)
+        datamodel = SimpleNamespace(survey='test', models={}, products=[product])
+        report = measure_datamodel(datamodel, pool=pool)
+        totals = report.totals
+        assert totals['expanded'] > 0 and totals['changelogs'] > 0
+        assert totals['hdulists'] > 0
+        assert report.to_dict(n=2)['largest'][0]['category'] in ('expanded', 'hdulists')
+        pool.clear()
@@ -0,0 +1,87 @@
+# encoding: utf-8
+#
+# test_paths.py
+
+from sdss_access.path import Path
+
+from cthreepo.core.paths import PathResolver, parse_request, resolve_paths
+
+KWARGS = {'plate': 8485, 'ifu': 1901, 'drpver': 'v2_4_3', 'wave': 'LOG'}
+
+
+class TestPathResolver(object):
+    """Tests for the streaming batch path resolver."""
+
+    def test_parse_request(self):
+        assert parse_request('mangacube DR15 plate=8485 wave=LOG') == \
+            ('mangacube', 'DR15', {'plate': 8485, 'wave': 'LOG'})
+        assert parse_request('{"name": "mangacube", "release": "DR15"}') == \
+            ('mangacube', 'DR15', {})
+        assert parse_request('# a comment') is None
+
+    def test_matches_sdss_access(self):
+        path, exists = PathResolver().resolve('mangacube', 'DR15', **KWARGS)
+        expected = Path(release='DR15').full('mangacube', **KWARGS)
+        assert path == expected
+        assert exists is False
+
+    def test_stream(self):
+        lines = ['mangacube DR15 plate=8485 ifu=1901 drpver=v2_4_3 wave=LOG', '',
+                 'mangacube DR15 plate=8485']
+        results = list(resolve_paths(lines, check_exists=False))
+        assert len(results) == 2
+        assert results[0].path.endswith('manga-8485-1901-LOGCUBE.fits.gz')
+        assert results[1].path is None
+
+
+class TestExpandGrid(object):
+    """Tests for the grid expansion of products."""
+
+    def test_grid(self):
+        from cthreepo.datamodel import dm
+        cube = dm['manga'].products['cube']
+        files = cube.expand_grid(versions=['DR15'], grid={'plate': [8485, 7443],
+                                                          'ifu': [1901, 3702]})
+        assert not isinstance(files, list)
+        files = list(files)
+        assert len(files) == 4
+        assert files[-1].kwargs == {'plate': 7443, 'ifu': 3702}
+        assert files[-1].path.endswith('manga-7443-3702-LOGCUBE.fits.gz')
+        assert files[-1].exists is None
+
+    def test_kwargs_exists(self):
+        from cthreepo.datamodel import dm
+        cube = dm['manga'].products['cube']
+        kwargs = [{'plate': 8485, 'wave': 'LIN'}, {'plate': 7443}]
+        files = list(cube.expand_grid(versions=['DR14', 'DR15'], kwargs=kwargs, exists=True,
+                                      jobs=2))
+        assert [(f.version, f.kwargs['plate']) for f in files] == \
+            [('DR14', 8485), ('DR14', 7443), ('DR15', 8485), ('DR15', 7443)]
+        assert 'LINCUBE' in files[0].path
+        assert all(f.exists is False for f in files)
+
+    def test_partial_grid(self, monkeypatch):
+        from cthreepo.datamodel import dm
+        from cthreepo.core.paths import resolver
+        cube = dm['manga'].products['cube']
+        monkeypatch.setattr(cube, 'path_kwargs', {'wave': 'LOG'})
+
+        # keywords in neither the grid nor the path_kwargs are filled from the version
+        files = list(cube.expand_grid(versions=['DR15'], grid={'plate': [8485], 'ifu': [1901]}))
+        assert files[0].kwargs == {'plate': 8485, 'ifu': 1901}
+        assert files[0].path == resolver.resolve('mangacube', 'DR15', plate=8485, ifu=1901,
+                                                 wave='LOG', drpver='DR15')[0]
+
+
+class TestReverseIndex(object):
+    """Tests for the reverse lookup of file paths."""
+
+    def test_resolve(self):
+        from cthreepo.core.paths import ReverseIndex, resolver
+        index = ReverseIndex()
+        path, __ = resolver.resolve('mangacube', 'DR15', **KWARGS)
+        match = index.resolve(path)
+        assert (match.survey, match.product, match.version) == ('manga', 'CUBE', 'DR15')
+        assert match.kwargs == KWARGS
+        assert index.resolve(path[:-3]).kwargs == KWARGS
+        assert index.resolve('/not/a/product.fits') is None
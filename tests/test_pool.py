@@ -0,0 +1,70 @@
+# encoding: utf-8
+#
+# test_pool.py
+
+from cthreepo.io.pool import HandlePool
+
+
+class TestHandlePool(object):
+    """Tests for the FITS handle pool."""
+
+    def test_lru_eviction(self, fitsfiles):
+        pool = HandlePool(max_open=2)
+        names = [str(f.fullpath) for f in fitsfiles]
+        first = pool.get(names[0])
+        assert pool.get(names[0]) is first
+        pool.get(names[1])
+        pool.get(names[2])
+        assert len(pool) == 2
+        assert names[0] not in pool
+        assert pool.stats == {'n_open': 2, 'max_open': 2, 'opens': 3, 'hits': 1, 'evictions': 1}
+
+    def test_reopen(self, fitsfiles):
+        pool = HandlePool(max_open=1)
+        names = [str(f.fullpath) for f in fitsfiles]
+        pool.get(names[0])
+        pool.get(names[1])
+        hdulist = pool.get(names[0])
+        assert hdulist['FLUX'].data.shape == (3, 3)
+        assert pool.opens == 3
+        pool.clear()
+        assert len(pool) == 0
+
+    def test_lease_not_evicted(self, fitsfiles):
+        pool = HandlePool(max_open=1)
+        names = [str(f.fullpath) for f in fitsfiles]
+        with pool.lease(names[0]) as hdulist:
+            assert pool.get(names[1])['FLUX'].data.shape == (3, 3)
+            with pool.lease(names[2]):
+                assert pool.is_leased(names[0])
+                assert len(pool) == 2
+            assert hdulist['FLUX'].data.shape == (3, 3)
+        assert not pool.is_leased(names[0])
+        assert len(pool) == 1
+
+    def test_diff_with_single_handle(self, fitsfiles, monkeypatch):
+        from cthreepo.io import general
+        from cthreepo.io.general import compute_diff
+
+        pool = HandlePool(max_open=1)
+        monkeypatch.setattr(general, 'pool', pool)
+        diff = compute_diff(str(fitsfiles[0].fullpath), str(fitsfiles[2].fullpath), full=True)
+        assert diff.astropy_diff
+        assert diff.get_astropy_diff() == diff.astropy_diff
+        assert len(pool) == 1
+
+    def test_hdulist_proxy(self, fitsfiles, monkeypatch):
+        from cthreepo.core import fits
+
+        pool = HandlePool(max_open=1)
+        monkeypatch.setattr(fits, 'pool', pool)
+        hdulist = fitsfiles[0].hdulist
+        assert hdulist['FLUX'].data.shape == (3, 3)
+
+        # the kept HDUList reopens its file once evicted by the other files
+        for f in fitsfiles[1:]:
+            assert len(f.hdulist) > 0
+        assert str(fitsfiles[0].fullpath) not in pool
+        assert hdulist[1].data.shape == (3, 3)
+        assert [hdu.name for hdu in hdulist] == ['PRIMARY', 'FLUX', 'TABLE']
+        assert pool.evictions == 3
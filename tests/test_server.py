@@ -0,0 +1,136 @@
+# encoding: utf-8
+#
+# test_server.py
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+import pytest
+
+from cthreepo.exceptions import CthreepoAPIError
+from cthreepo.server import DataModelClient, DataModelIndex, DataModelServer, QueryError
+
+
+@pytest.fixture(scope='module')
+def client():
+    server = DataModelServer(host='127.0.0.1', port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield DataModelClient(url=server.url)
+    server.shutdown()
+    server.server_close()
+
+
+class TestServer(object):
+    """Tests for the local datamodel query server."""
+
+    def test_surveys(self, client):
+        assert {'manga', 'simple'} <= set(client.surveys())
+        assert client.products('simple') == ['catalog']
+
+    def test_product(self, client):
+        product = client.product('simple', 'catalog')
+        assert product['datatype'] == 'catalog'
+        versions = client.versions('simple', 'catalog')
+        assert [v[0] for v in versions] == ['v1.0', 'v2.0', 'DR14', 'v3.0']
+
+    def test_cached(self, client):
+        client.versions('simple', 'catalog')
+        hits = client.stats()['hits']
+        client.versions('simple', 'catalog')
+        assert client.stats()['hits'] == hits + 1
+
+    def test_not_found(self, client):
+        with pytest.raises(CthreepoAPIError, match='404'):
+            client.product('simple', 'nothere')
+
+
+@pytest.fixture()
+def index(tmp_path, monkeypatch):
+    ''' a datamodel index over a synthetic survey with data files '''
+    from cthreepo.io.synthetic import load_synthetic_survey, write_synthetic_survey
+
+    write_synthetic_survey(tmp_path, n_products=2, n_versions=2, n_changelog=1, n_rows=5)
+    monkeypatch.setenv('CTHREEPO_DIR', str(tmp_path))
+    monkeypatch.setenv('SAS_BASE_DIR', str(tmp_path / 'sas'))
+    return DataModelIndex(datamodel=[load_synthetic_survey(tmp_path)])
+
+
+class TestDataModelIndex(object):
+    """Tests for the response cache of the datamodel index."""
+
+    def test_invalidated_by_files(self, index, tmp_path):
+        path = '/surveys/synth/products/prod0001/files'
+        files = orjson.loads(index.query(path))
+        assert [f['exists'] for f in files] == [True, True]
+        assert index.query(path) == orjson.dumps(files)
+        assert index.stats['hits'] == 1
+
+        # removing a file invalidates the cached answer
+        with open(files[-1]['path']) as f:
+            content = f.read()
+        os.remove(files[-1]['path'])
+        files = orjson.loads(index.query(path))
+        assert [f['exists'] for f in files] == [True, False]
+        assert index.stats['invalidations'] == 1
+
+        changelog = '/surveys/synth/products/prod0001/changelog'
+        assert orjson.loads(index.query(changelog)) == []
+        with open(files[-1]['path'], 'w') as f:
+            f.write(content)
+        assert len(orjson.loads(index.query(changelog))) == 1
+
+    def test_concurrent_keys(self, index, monkeypatch):
+        barrier = threading.Barrier(2, timeout=10)
+        answer = index._answer
+        calls = []
+
+        def blocking_answer(path, params, refresh=None):
+            calls.append(path)
+            if path.endswith('versions'):
+                barrier.wait()
+            return answer(path, params, refresh=refresh)
+
+        monkeypatch.setattr(index, '_answer', blocking_answer)
+
+        # different queries are computed at the same time
+        paths = [f'/surveys/synth/products/{name}/versions' for name in ('prod0000', 'prod0001')]
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(index.query, paths))
+        assert [orjson.loads(r)[0][0] for r in results] == ['v001', 'v001']
+
+        # the same query is computed once
+        calls.clear()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(index.query, ['/surveys/synth/products'] * 4))
+        assert calls == ['/surveys/synth/products']
+
+    def test_resolve(self, monkeypatch):
+        from cthreepo.core.paths import resolver
+        from cthreepo.datamodel import dm
+
+        index = DataModelIndex(datamodel=[dm['manga']])
+        cube = index.get_product('manga', 'cube')
+        path = '/surveys/manga/products/cube/resolve'
+        data = orjson.loads(index.query(path, {'version': 'DR15', 'plate': '7443'}))
+        assert data['path'] == resolver.resolve('mangacube', 'DR15',
+                                                **dict(cube.path_kwargs, plate=7443))[0]
+        assert data['exists'] is False
+
+        # numeric format specs are given numbers, not the query strings
+        monkeypatch.setattr(cube, 'path_name', 'mangaslitmap')
+        monkeypatch.setattr(cube, 'path_kwargs', {})
+        params = {'version': 'DR15', 'plate': '8485', 'mjd': '57000', 'plugging': '1'}
+        assert orjson.loads(index.query(path, params))['path'].endswith(
+            'slitmap-8485-57000-01.par')
+        with pytest.raises(QueryError, match='plugging'):
+            index.query(path, {'version': 'DR15', 'plate': '8485', 'mjd': '57000'})
+
+    def test_refresh_matrix(self, index):
+        product = index.get_product('synth', 'prod0000')
+        product.compute_matrix()
+        product.compute_diff_matrix()
+        index._get_files(product, refresh=True)
+        assert product._matrix is None and product._diffmatrix is None
@@ -0,0 +1,54 @@
+# encoding: utf-8
+#
+# test_stats.py
+
+import pytest
+
+from cthreepo.core.stats import TimingStats, stats
+from cthreepo.io.general import compute_diff
+
+
+@pytest.fixture()
+def timing():
+    ''' enable the shared timing stats for a single test '''
+    stats.reset()
+    stats.enable()
+    yield stats
+    stats.disable()
+    stats.reset()
+
+
+class TestTimingStats(object):
+    """Tests for the per-stage timing stats."""
+
+    def test_disabled_by_default(self):
+        timings = TimingStats()
+        assert timings.enabled is False
+        with timings.timer('stage'):
+            pass
+        assert 'stage' not in timings
+
+    def test_record(self):
+        timings = TimingStats(enabled=True)
+        for elapsed in (0.1, 0.3):
+            timings.record('stage', elapsed)
+        with timings.timer('other'):
+            pass
+        result = timings['stage']
+        assert (result.count, result.max) == (2, 0.3)
+        assert result.total == pytest.approx(0.4)
+        assert set(timings.to_dict()) == {'stage', 'other'}
+        assert timings.report().splitlines()[1].startswith('stage')
+        timings.reset()
+        assert list(timings) == []
+
+    def test_hooks(self, fitsfiles, timing):
+        fitsfiles[0]._read_file()
+        compute_diff(fitsfiles[0].fullpath, fitsfiles[1].fullpath)
+        assert timing['read_fits'].count == 1
+        assert timing['compute_diff'].count == 1
+
+    def test_no_timing_when_disabled(self, fitsfiles):
+        stats.reset()
+        compute_diff(fitsfiles[0].fullpath, fitsfiles[1].fullpath)
+        assert 'compute_diff' not in stats
@@ -0,0 +1,44 @@
+# encoding: utf-8
+#
+# test_synthetic.py
+
+from cthreepo.io.synthetic import (ScalingResult, load_synthetic_survey, scaling_exponents,
+                                   scaling_report, synthetic_environ, write_synthetic_survey)
+
+
+class TestSynthetic(object):
+    """Tests for the synthetic datamodel generator."""
+
+    def test_survey(self, tmp_path):
+        write_synthetic_survey(tmp_path, n_products=4, n_versions=3, n_changelog=2, n_models=5)
+        dm = load_synthetic_survey(tmp_path)
+        assert len(dm.products) == 4
+        assert len(dm.models['wavelengths']) == 5
+        changelog = dm.products[0].changelog
+        assert sorted(str(w) for w in changelog['v002']['wavelengths']) == ['W0', 'W1']
+        with synthetic_environ(tmp_path):
+            files = dm.products[1].expand_product()
+        assert all(f.file_exists for f in files)
+
+    def test_exponents(self):
+        results = [ScalingResult('linear', 10, 1.0, 0), ScalingResult('linear', 20, 2.0, 0),
+                   ScalingResult('quadratic', 10, 1.0, 0), ScalingResult('quadratic', 20, 4.0, 0)]
+        exponents = scaling_exponents(results)
+        assert round(exponents['linear'], 2) == 1.0
+        assert round(exponents['quadratic'], 2) == 2.0
+
+    def test_report(self, tmp_path):
+        results = scaling_report(sizes=(2, 4), outdir=tmp_path, files=False, n_versions=2)
+        assert {r.stage for r in results} == {'find_datamodels', 'expand_yaml',
+                                              'generate_models', 'generate_products',
+                                              'organize_by_version'}
+        assert all(r.memory > 0 for r in results)
+
+    def test_measure_cold(self, tmp_path):
+        from cthreepo.io import datamodel
+        from cthreepo.io.synthetic import _measure
+
+        # the timed and the traced runs both start without a cached datamodel tree
+        cached = []
+        _measure(lambda: cached.append(len(datamodel._trees)) or datamodel.get_tree(tmp_path))
+        assert cached == [0, 0]
@@ -0,0 +1,53 @@
+# encoding: utf-8
+#
+# test_yaml.py
+
+import pytest
+
+from cthreepo.io.yaml import compile_versions, expand_yaml, parse_expression, parse_value
+
+
+class TestExpandYaml(object):
+    """Tests for the changelog version substitution."""
+
+    def test_parse_expression(self):
+        pattern = compile_versions(['v1', 'v10'])
+        expression = parse_expression('v10+=[A,B]-=C+=C', pattern)
+        assert expression.version == 'v10'
+        assert expression.operators == (('+=', ('A', 'B')), ('-=', ('C',)), ('+=', ('C',)))
+        assert parse_expression('plain', pattern) is None
+
+    def test_syntax(self):
+        with pytest.raises(ValueError):
+            parse_value('key', 'v1 ++ A', {}, ['v1'])
+        with pytest.raises(AssertionError):
+            parse_value('key', 'other += A', {}, ['v1'])
+
+    def test_repeated_operators(self):
+        data = {'v1': {'key': ['A', 'B']}}
+        assert parse_value('key', 'v1 -= A += A', data, ['v1', 'v2']) == ['B', 'A']
+        assert parse_value('key', 'v1 += C += [D,C]', data, ['v1', 'v2']) == ['A', 'B', 'C', 'D']
+
+    def test_expand(self):
+        data = {'prod': {'versions': ['v1', 'v2', 'v3', 'v4'], 'defaults': {'key': ['Z']},
+                         'changelog': {'v1': {'key': ['A', 'B']},
+                                       'v2': {'key': 'v1 += C -= A'},
+                                       'v3': {'key': 'v2 += [A,D]'}}}}
+        changelog = expand_yaml(data)['prod']['changelog']
+        assert changelog == {'v1': {'key': ['A', 'B']}, 'v2': {'key': ['B', 'C']},
+                             'v3': {'key': ['B', 'C', 'A', 'D']}, 'v4': {'key': ['Z']}}
+        assert 'defaults' not in data['prod']
+
+
+class TestReadYamlFiles(object):
+    """Tests for reading several yaml files."""
+
+    def test_read_files(self, tmp_path):
+        from cthreepo.io.yaml import read_yaml_files
+        files = []
+        for i in range(3):
+            files.append(tmp_path / f'survey{i}' / 'products.yaml')
+            files[-1].parent.mkdir()
+            files[-1].write_text(f'prod{i}: {{versions: [v{i}]}}\n')
+        assert read_yaml_files(files, jobs=2) == read_yaml_files(files)
+        assert read_yaml_files(files)[2] == {'prod2': {'versions': ['v2']}}